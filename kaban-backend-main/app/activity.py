@@ -0,0 +1,149 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.logging_config import logger
+from app.models import Activity, utcnow
+from app.sharding import group_by_project_shard
+
+
+class ActivityLog:
+    """
+    Журнал действий над задачами, колонками и проектами.
+
+    Обработчики только кладут запись в ограниченный буфер в памяти;
+    фоновая задача пишет буфер в таблицу activity пачками - по размеру,
+    по таймеру и при остановке приложения.
+    """
+
+    def __init__(self, max_buffer: int, batch_size: int, flush_interval: float, session_factory=SessionLocal):
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self.dropped = 0
+        self._buffer = deque()
+        self._flush_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        *,
+        project_id: int,
+        user_id: int,
+        entity_type: str,
+        entity_id: int,
+        action: str,
+        changes: Optional[dict] = None,
+    ):
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            logger.warning("Activity buffer is full, dropping %s %s event", entity_type, action)
+            return
+
+        self._buffer.append({
+            "project_id": project_id,
+            "user_id": user_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "action": action,
+            "changes": json.dumps(changes, default=str) if changes else None,
+            "created_at": utcnow(),
+        })
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Пишет всё содержимое буфера пачками по batch_size.
+        При ошибке записи пачка возвращается в начало буфера.
+        С шардами каждая пачка пишется по частям в базы своих проектов,
+        и возвращаются только строки частей, которые не удалось записать.
+        """
+        written = 0
+        with self._flush_lock:
+            own_session = db is None
+            if own_session:
+                db = self.session_factory()
+            try:
+                while self._buffer:
+                    batch = []
+                    while self._buffer and len(batch) < self.batch_size:
+                        batch.append(self._buffer.popleft())
+                    committed = set()
+                    try:
+                        for shard, rows in group_by_project_shard(db, batch).items():
+                            if shard is not None:
+                                db.shard = shard
+                            db.execute(insert(Activity), rows)
+                            db.commit()
+                            committed.update(id(row) for row in rows)
+                    except Exception:
+                        db.rollback()
+                        # Части, уже записанные в другие шарды, повторно не пишем
+                        self._requeue([row for row in batch if id(row) not in committed])
+                        raise
+                    written += len(batch)
+            finally:
+                if own_session:
+                    db.close()
+        return written
+
+    def clear(self):
+        self._buffer.clear()
+        self.dropped = 0
+
+    def _requeue(self, batch):
+        free = self.max_buffer - len(self._buffer)
+        if free < len(batch):
+            self.dropped += len(batch) - free
+            batch = batch[len(batch) - free:] if free > 0 else []
+        self._buffer.extendleft(reversed(batch))
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await self._flush_in_thread()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush_in_thread()
+
+    async def _flush_in_thread(self):
+        if not self._buffer:
+            return
+        try:
+            await asyncio.to_thread(self.flush)
+        except Exception as e:
+            logger.error("Failed to write activity batch: %s", e, exc_info=True)
+
+
+activity_log = ActivityLog(
+    max_buffer=settings.ACTIVITY_BUFFER_SIZE,
+    batch_size=settings.ACTIVITY_BATCH_SIZE,
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL_SECONDS,
+)
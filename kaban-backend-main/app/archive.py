@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.jobs import job_runner
+from app.logging_config import logger
+from app.models import Section, Ticket, TicketArchive, TicketArchiveAssignee, TicketAssignee, utcnow
+from app.sharding import for_each_shard
+
+# Колонки, которые переносятся из ticket в ticket_archive как есть
+ARCHIVED_COLUMNS = (
+    "id", "name", "task", "priority", "complexity",
+    "section_id", "due_at", "comment_count", "version", "created_at", "updated_at",
+)
+ARCHIVED_ASSIGNEE_COLUMNS = ("ticket_id", "user_id", "project_id", "created_at")
+
+
+def archive_tickets(db: Session, *, batch_size: int, now: Optional[datetime] = None) -> int:
+    """
+    Переносит задачи, которые не менялись дольше archive_after_days своей
+    колонки, в ticket_archive, а их исполнителей - в ticket_archive_assignee.
+    Каждая пачка - INSERT ... SELECT и DELETE по списку id в отдельной
+    транзакции, чтобы не держать долгие блокировки.
+    Возвращает число перенесённых задач.
+    """
+    now = now or utcnow()
+    sections = db.execute(
+        select(Section.id, Section.archive_after_days).where(Section.archive_after_days > 0)
+    ).all()
+
+    moved = 0
+    for section_id, days in sections:
+        cutoff = now - timedelta(days=days)
+        while True:
+            ids = _stale_ids(db, section_id, cutoff, batch_size)
+            if not ids:
+                break
+
+            # Задачу могли изменить после выборки id: условие по cutoff
+            # повторяется, чтобы такая задача осталась на доске
+            stale = (Ticket.id.in_(ids), Ticket.updated_at < cutoff)
+            db.execute(insert(TicketArchive).from_select(
+                [*ARCHIVED_COLUMNS, "archived_at"],
+                select(
+                    *(getattr(Ticket, column) for column in ARCHIVED_COLUMNS),
+                    literal(now),
+                ).where(*stale)
+            ))
+            assigned = TicketAssignee.ticket_id.in_(select(Ticket.id).where(*stale))
+            db.execute(insert(TicketArchiveAssignee).from_select(
+                ARCHIVED_ASSIGNEE_COLUMNS,
+                select(*(getattr(TicketAssignee, column) for column in ARCHIVED_ASSIGNEE_COLUMNS)).where(assigned)
+            ))
+            db.execute(delete(TicketAssignee).where(assigned))
+            result = db.execute(
+                delete(Ticket).where(*stale).execution_options(synchronize_session=False)
+            )
+            db.commit()
+            moved += result.rowcount
+
+            if len(ids) < batch_size:
+                break
+    return moved
+
+
+def _stale_ids(db: Session, section_id: int, cutoff: datetime, batch_size: int) -> List[int]:
+    # FOR UPDATE держит строки до commit пачки: правка задачи подождёт
+    # переноса, а не потеряется в архиве. SKIP LOCKED - чтобы не ждать
+    # задачи, которые сейчас редактируют
+    return db.execute(
+        select(Ticket.id)
+        .where(Ticket.section_id == section_id, Ticket.updated_at < cutoff)
+        .order_by(Ticket.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+
+@job_runner.handler("tickets.archive", max_attempts=1)
+def archive_stale_tickets(payload: dict) -> int:
+    """
+    Периодическое задание архивации (ставится раз в ARCHIVE_INTERVAL_SECONDS).
+    """
+    batch_size = payload.get("batch_size", settings.ARCHIVE_BATCH_SIZE)
+
+    def archive_shard(db: Session) -> int:
+        try:
+            return archive_tickets(db, batch_size=batch_size)
+        except Exception:
+            db.rollback()
+            raise
+
+    moved = sum(for_each_shard(SessionLocal, archive_shard))
+    if moved:
+        logger.info("Archived %s tickets", moved)
+    return moved
@@ -0,0 +1,125 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import PriorityEnum, Project, Ticket, TicketAssignee
+from app.schemas import AssignedTicketResponse, TicketResponse
+
+# Порядок приоритетов в списке задач: сначала срочные
+PRIORITY_RANK = {PriorityEnum.high: 0, PriorityEnum.medium: 1, PriorityEnum.low: 2}
+
+# Позиция в списке: значение сортировки, id задачи и id проекта
+# (id задач уникальны только в пределах шарда)
+Cursor = Tuple[object, int, int]
+
+
+def encode_cursor(sort: str, item: AssignedTicketResponse) -> str:
+    value = PRIORITY_RANK[item.priority] if sort == "priority" else item.updated_at.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, item.id, item.project_id]).encode()).decode()
+
+
+def decode_cursor(sort: str, cursor: str) -> Cursor:
+    try:
+        value, ticket_id, project_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort == "priority":
+            return int(value), int(ticket_id), int(project_id)
+        return datetime.fromisoformat(value), int(ticket_id), int(project_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def sort_keys(ticket: Ticket) -> dict:
+    """
+    Ключи сортировки задачи, которые хранятся в её назначениях.
+    """
+    return {
+        "priority_rank": PRIORITY_RANK[PriorityEnum(ticket.priority)],
+        "ticket_updated_at": ticket.updated_at,
+    }
+
+
+def sync_sort_keys(db: Session, ticket: Ticket):
+    """
+    Переносит приоритет и время изменения задачи в её назначения.
+    Вызывается в той же транзакции, что и изменение задачи.
+    """
+    db.execute(
+        update(TicketAssignee)
+        .where(TicketAssignee.ticket_id == ticket.id)
+        .values(**sort_keys(ticket))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def sort_key(sort: str, item: AssignedTicketResponse):
+    # Тот же порядок, что и ORDER BY в assigned_tickets
+    if sort == "priority":
+        return PRIORITY_RANK[item.priority], item.id, item.project_id
+    return -item.updated_at.timestamp(), -item.id, -item.project_id
+
+
+def assigned_tickets(
+    db: Session,
+    *,
+    user_id: int,
+    team_ids: Sequence[int],
+    sort: str,
+    after: Optional[Cursor],
+    limit: int,
+) -> List[AssignedTicketResponse]:
+    """
+    Задачи пользователя во всех доступных ему проектах одним запросом:
+    назначения читаются по индексу (user_id, priority_rank, ticket_id,
+    project_id) или (user_id, ticket_updated_at, ticket_id, project_id) уже
+    в нужном порядке и останавливаются на limit, задачи и проекты - по первичному ключу.
+    Колонки и доски не читаются.
+    """
+    query = (
+        select(Ticket, Project.id, Project.name)
+        .select_from(TicketAssignee)
+        .join(Ticket, Ticket.id == TicketAssignee.ticket_id)
+        .join(Project, Project.id == TicketAssignee.project_id)
+        .where(
+            TicketAssignee.user_id == user_id,
+            or_(Project.team_id.in_(team_ids), Project.owner_id == user_id),
+        )
+    )
+
+    # project_id различает задачи разных шардов с одинаковым id; он же
+    # последняя колонка индекса, так что ORDER BY совпадает с индексом
+    ticket_id, project_id = TicketAssignee.ticket_id, TicketAssignee.project_id
+    if sort == "priority":
+        rank = TicketAssignee.priority_rank
+        if after is not None:
+            after_rank, after_ticket_id, after_project_id = after
+            query = query.where(or_(
+                rank > after_rank,
+                and_(rank == after_rank, ticket_id > after_ticket_id),
+                and_(rank == after_rank, ticket_id == after_ticket_id, project_id > after_project_id),
+            ))
+        query = query.order_by(rank, ticket_id, project_id)
+    else:
+        updated = TicketAssignee.ticket_updated_at
+        if after is not None:
+            after_updated_at, after_ticket_id, after_project_id = after
+            query = query.where(or_(
+                updated < after_updated_at,
+                and_(updated == after_updated_at, ticket_id < after_ticket_id),
+                and_(updated == after_updated_at, ticket_id == after_ticket_id, project_id < after_project_id),
+            ))
+        query = query.order_by(updated.desc(), ticket_id.desc(), project_id.desc())
+
+    return [
+        AssignedTicketResponse(
+            **TicketResponse.model_validate(ticket).model_dump(),
+            project_id=ticket_project_id,
+            project_name=project_name,
+        )
+        for ticket, ticket_project_id, project_name in db.execute(query.limit(limit)).all()
+    ]
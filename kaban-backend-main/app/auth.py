@@ -1,16 +1,39 @@
-from datetime import datetime, timedelta
-from typing import Optional
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.database import get_db
-from app.models import User
+from app.models import User, RefreshToken
+from app.revocation import revocation_list
 from app.schemas import TokenData
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def build_pwd_context(schemes: Optional[List[str]] = None, **params) -> CryptContext:
+    """
+    Собирает CryptContext из настроек. Первая схема используется для
+    новых хешей, остальные только проверяются и считаются устаревшими.
+    params переопределяют параметры стоимости (например, bcrypt__rounds).
+    """
+    schemes = schemes or [s.strip() for s in settings.PASSWORD_SCHEMES.split(",") if s.strip()]
+    options = {}
+    if "bcrypt" in schemes:
+        options["bcrypt__rounds"] = settings.BCRYPT_ROUNDS
+    if "argon2" in schemes:
+        options["argon2__time_cost"] = settings.ARGON2_TIME_COST
+        options["argon2__memory_cost"] = settings.ARGON2_MEMORY_COST
+        options["argon2__parallelism"] = settings.ARGON2_PARALLELISM
+    options.update(params)
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+pwd_context = build_pwd_context()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
@@ -18,53 +41,160 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Проверяет пароль и, если хеш сделан устаревшей схемой или с другими
+    параметрами стоимости, возвращает новый хеш для сохранения.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
+    to_encode = _with_string_sub(data)
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
 def create_refresh_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode = _with_string_sub(data)
+    expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def _with_string_sub(data: dict) -> dict:
+    # RFC 7519: sub is a string, python-jose rejects integers on decode
+    to_encode = data.copy()
+    if "sub" in to_encode:
+        to_encode["sub"] = str(to_encode["sub"])
+    return to_encode
+
+
+class VerifiedTokenCache:
+    """
+    LRU-кэш уже проверенных токенов. Один и тот же access-токен приходит
+    сотни раз за время жизни, поэтому полная проверка JWT (base64, JSON,
+    HMAC) выполняется один раз. Ключ - хеш токена, сам токен не хранится;
+    запись перестаёт действовать в момент exp.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, Tuple[TokenData, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[Tuple[TokenData, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: bytes, token_data: TokenData, token_type: str, expires_at: float):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (token_data, token_type, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_SIZE)
+
+
 def verify_token(token: str, token_type: str = "access") -> TokenData:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    cache_key = token_cache.key(token)
+    cached = token_cache.get(cache_key)
+    if cached is not None:
+        token_data, cached_type = cached
+        if cached_type != token_type:
+            raise credentials_exception
+        return token_data
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
+        user_id = payload.get("sub")
         token_type_check: str = payload.get("type")
         
         if user_id is None or token_type_check != token_type:
             raise credentials_exception
-        token_data = TokenData(user_id=user_id)
-    except JWTError:
+        token_data = TokenData(
+            user_id=int(user_id),
+            family_id=payload.get("fam"),
+            jti=payload.get("jti")
+        )
+    except (JWTError, ValueError):
         raise credentials_exception
+
+    if "exp" in payload:
+        token_cache.put(cache_key, token_data, token_type_check, float(payload["exp"]))
     return token_data
 
 
+def is_family_revoked(db: Session, family_id: str) -> bool:
+    return db.query(RefreshToken.id).filter(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at.isnot(None)
+    ).first() is not None
+
+
 async def get_current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> User:
-    token_data = verify_token(token, "access")
+    # Подзапросы POST /batch выполняются от имени уже проверенного пользователя
+    batch_user = getattr(request.state, "batch_user", None)
+    if batch_user is not None:
+        return batch_user
+
+    # RateLimitMiddleware already verified the same Authorization header
+    token_data = getattr(request.state, "token_data", None) or verify_token(token, "access")
+
+    # Logout and refresh token reuse revoke the whole token family
+    if token_data.family_id and await revocation_list.is_revoked(
+        token_data.family_id, lambda family_id: is_family_revoked(db, family_id)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     user = db.query(User).filter(User.id == token_data.user_id).first()
     if user is None:
         raise HTTPException(
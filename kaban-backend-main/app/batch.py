@@ -0,0 +1,218 @@
+import asyncio
+import json
+import re
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from sqlalchemy.orm import Session
+from starlette.exceptions import HTTPException
+
+from app.logging_config import logger
+from app.models import User
+from app.negotiation import (
+    MSGPACK_MEDIA_TYPE,
+    NegotiatedResponse,
+    http_exception_handler,
+    is_msgpack,
+    msgpack_requested,
+    request_validation_exception_handler,
+)
+from app.schemas import BatchRequestItem
+
+# Нельзя вызывать из пакета: вложенный batch, выдачу токенов и потоковые
+# экспорт/импорт - они работают с сессией из пула потоков
+UNBATCHABLE = re.compile(r"^/(batch|auth)(/|$)|/(export|import)(/\d+)?/?$")
+
+# Заголовки основного запроса, которые получают подзапросы
+FORWARDED_HEADERS = {b"authorization", b"accept", b"accept-language", b"user-agent"}
+SKIPPED_RESPONSE_HEADERS = {"content-length", "content-type", "vary"}
+
+# Копируются из scope основного запроса
+SCOPE_KEYS = ("type", "asgi", "http_version", "scheme", "server", "client", "root_path", "app")
+
+
+@dataclass
+class SubResponse:
+    id: str
+    status: int
+    headers: Dict[str, str]
+    content_type: str
+    body: bytes
+
+
+class BatchExecutor:
+    """
+    Выполняет подзапросы POST /batch через роутер приложения, минуя
+    middleware: пользователь берётся из основного запроса. Запись
+    выполняется в сессии основного запроса и служит барьером: всё, что
+    до неё, уже выполнено, следующие подзапросы ждут её. Идущие подряд
+    GET выполняются конкурентно, каждый в своей сессии из get_db.
+    """
+
+    def __init__(self, request: Request, user: User, db: Session):
+        self.request = request
+        self.user = user
+        self.db = db
+
+    async def run(self, items: Sequence[BatchRequestItem]) -> List[SubResponse]:
+        results: List[SubResponse] = []
+        reads: List[Tuple[int, BatchRequestItem]] = []
+        for index, item in enumerate(items):
+            if item.method == "GET":
+                reads.append((index, item))
+                continue
+            results += await self._gather(reads)
+            reads = []
+            results.append(await self._call(index, item, self.db))
+        results += await self._gather(reads)
+        return results
+
+    async def _gather(self, reads: List[Tuple[int, BatchRequestItem]]) -> List[SubResponse]:
+        # Одиночному чтению отдельная сессия ничего не даёт
+        if len(reads) == 1:
+            return [await self._call(*reads[0], self.db)]
+        return list(await asyncio.gather(*(self._call(index, item, None) for index, item in reads)))
+
+    async def _call(self, index: int, item: BatchRequestItem, db: Optional[Session]) -> SubResponse:
+        item_id = item.id if item.id is not None else str(index)
+        path, _, query = item.path.partition("?")
+        if UNBATCHABLE.search(path):
+            response = await http_exception_handler(
+                self.request, HTTPException(status_code=400, detail="Endpoint is not available in batch")
+            )
+            return _from_response(item_id, response)
+
+        started: dict = {}
+        chunks: List[bytes] = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                started.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        body, headers = self._body_and_headers(item)
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        try:
+            async with AsyncExitStack() as stack:
+                scope = {key: self.request.scope[key] for key in SCOPE_KEYS if key in self.request.scope}
+                scope.update({
+                    "method": item.method,
+                    "path": path,
+                    "raw_path": path.encode(),
+                    "query_string": query.encode(),
+                    "headers": headers,
+                    "state": {"batch_db": db, "batch_user": self.user},
+                    "fastapi_astack": stack,
+                })
+                await self.request.app.router(scope, receive, send)
+        except HTTPException as exc:
+            response = await http_exception_handler(self.request, exc)
+        except RequestValidationError as exc:
+            response = await request_validation_exception_handler(self.request, exc)
+        except Exception as e:
+            logger.error("Batch sub-request %s %s failed: %s", item.method, path, e, exc_info=True)
+            response = NegotiatedResponse({"detail": "Internal Server Error"}, status_code=500)
+        else:
+            result = SubResponse(item_id, started["status"], {}, "", b"".join(chunks))
+            for key, value in started.get("headers", []):
+                name = key.decode("latin-1")
+                if name == "content-type":
+                    result.content_type = value.decode("latin-1")
+                elif name not in SKIPPED_RESPONSE_HEADERS:
+                    result.headers[name] = value.decode("latin-1")
+            return self._after(item, result)
+        return self._after(item, _from_response(item_id, response))
+
+    def _after(self, item: BatchRequestItem, result: SubResponse) -> SubResponse:
+        # Неудачная запись не должна оставить изменения в общей сессии
+        if result.status >= 400 and item.method != "GET":
+            self.db.rollback()
+        return result
+
+    def _body_and_headers(self, item: BatchRequestItem) -> Tuple[bytes, list]:
+        own = {key.lower().encode("latin-1"): value.encode("latin-1") for key, value in item.headers.items()}
+        headers = [
+            (key, value) for key, value in self.request.scope["headers"]
+            if key in FORWARDED_HEADERS and key not in own
+        ]
+        headers += [(key, value) for key, value in own.items() if key not in (b"content-type", b"content-length")]
+        body = b""
+        if item.body is not None:
+            body = json.dumps(item.body).encode()
+            headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode()))
+        return body, headers
+
+
+def multiplexed_response(results: Sequence[SubResponse]) -> Response:
+    """
+    Собирает ответы подзапросов в один. Тела уже сериализованы в нужном
+    формате и вставляются как есть, без повторного разбора.
+    """
+    if msgpack_requested():
+        content = _render_msgpack(results)
+        media_type = MSGPACK_MEDIA_TYPE
+    else:
+        content = _render_json(results)
+        media_type = "application/json"
+    return Response(content=content, media_type=media_type, headers={"Vary": "Accept"})
+
+
+def _render_json(results: Sequence[SubResponse]) -> bytes:
+    parts = []
+    for result in results:
+        if not result.body:
+            body = b"null"
+        elif _is_json(result.content_type):
+            body = result.body
+        else:
+            body = json.dumps(result.body.decode("utf-8", "replace")).encode()
+        parts.append(
+            b'{"id":%s,"status":%d,"headers":%s,"body":%s}'
+            % (json.dumps(result.id).encode(), result.status, json.dumps(result.headers).encode(), body)
+        )
+    return b'{"responses":[' + b",".join(parts) + b"]}"
+
+
+def _render_msgpack(results: Sequence[SubResponse]) -> bytes:
+    packer = msgpack.Packer(use_bin_type=True)
+    parts = [packer.pack_map_header(1), packer.pack("responses"), packer.pack_array_header(len(results))]
+    for result in results:
+        if not result.body:
+            body = packer.pack(None)
+        elif is_msgpack(result.content_type):
+            body = result.body
+        elif _is_json(result.content_type):
+            body = packer.pack(json.loads(result.body))
+        else:
+            body = packer.pack(result.body.decode("utf-8", "replace"))
+        parts += [
+            packer.pack_map_header(4),
+            packer.pack("id"), packer.pack(result.id),
+            packer.pack("status"), packer.pack(result.status),
+            packer.pack("headers"), packer.pack(result.headers),
+            packer.pack("body"), body,
+        ]
+    return b"".join(parts)
+
+
+def _from_response(item_id: str, response: Response) -> SubResponse:
+    headers = {
+        key.decode("latin-1"): value.decode("latin-1")
+        for key, value in response.raw_headers
+        if key.decode("latin-1") not in SKIPPED_RESPONSE_HEADERS
+    }
+    return SubResponse(item_id, response.status_code, headers, response.media_type or "", response.body)
+
+
+def _is_json(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type == "application/json" or media_type.endswith("+json")
@@ -0,0 +1,96 @@
+from typing import List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Desk, PriorityEnum, Section, Ticket
+from app.negotiation import NegotiatedResponse
+
+COMPACT_MEDIA_TYPE = "application/vnd.kaban.board-compact+json"
+
+# Порядок полей в строке задачи компактного формата
+TICKET_FIELDS = (
+    "id", "name", "task", "priority", "complexity", "due_at", "comment_count", "version", "created_at", "updated_at",
+)
+
+# priority передаётся индексом в этом списке
+PRIORITY_CODES = [priority.value for priority in PriorityEnum]
+_PRIORITY_INDEX = {priority: index for index, priority in enumerate(PriorityEnum)}
+
+
+def wants_compact(accept: Optional[str], format: Optional[str]) -> bool:
+    if format is not None:
+        return format == "compact"
+    return bool(accept) and COMPACT_MEDIA_TYPE in accept
+
+
+def board_tickets(db: Session, desk_id: int) -> List[Ticket]:
+    # Все задачи доски одним запросом вместо запроса на каждую колонку
+    return db.query(Ticket).join(Section, Section.id == Ticket.section_id).filter(
+        Section.desk_id == desk_id
+    ).order_by(Ticket.id).all()
+
+
+def compact_board_response(db: Session, desk: Desk, sections: Sequence[Section]) -> NegotiatedResponse:
+    """
+    Доска в колоночном формате: имена полей задачи передаются один раз
+    в заголовке, каждая задача - массив значений, priority - код из
+    PRIORITY_CODES. Строки читаются без создания ORM-объектов.
+    """
+    rows = db.execute(
+        select(
+            Ticket.section_id,
+            Ticket.id,
+            Ticket.name,
+            Ticket.task,
+            Ticket.priority,
+            Ticket.complexity,
+            Ticket.due_at,
+            Ticket.comment_count,
+            Ticket.version,
+            Ticket.created_at,
+            Ticket.updated_at,
+        )
+        .join(Section, Section.id == Ticket.section_id)
+        .where(Section.desk_id == desk.id)
+        .order_by(Ticket.id)
+    ).all()
+
+    tickets_by_section = {section.id: [] for section in sections}
+    for (section_id, ticket_id, name, task, priority, complexity, due_at, comment_count,
+         version, created_at, updated_at) in rows:
+        tickets_by_section[section_id].append([
+            ticket_id,
+            name,
+            task,
+            _PRIORITY_INDEX[priority],
+            complexity,
+            _isoformat(due_at),
+            comment_count,
+            version,
+            _isoformat(created_at),
+            _isoformat(updated_at),
+        ])
+
+    content = {
+        "desk_id": desk.id,
+        "desk_name": desk.name,
+        "ticket_fields": TICKET_FIELDS,
+        "priorities": PRIORITY_CODES,
+        "sections": [
+            {
+                "id": section.id,
+                "name": section.name,
+                "order": section.order,
+                "archive_after_days": section.archive_after_days,
+                "version": section.version,
+                "tickets": tickets_by_section[section.id],
+            }
+            for section in sections
+        ],
+    }
+    return NegotiatedResponse(content=content, media_type=COMPACT_MEDIA_TYPE)
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
@@ -0,0 +1,113 @@
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from itertools import groupby
+from typing import List, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException, status
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Project, Section, Ticket
+from app.schemas import CalendarDay, CalendarResponse, CalendarTicket
+
+
+def calendar_zone(name: str) -> tzinfo:
+    """
+    Часовой пояс календаря по имени IANA (Europe/Moscow, UTC).
+    """
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown time zone")
+
+
+def day_range(start: date, end: date, zone: tzinfo = timezone.utc) -> Tuple[datetime, datetime]:
+    """
+    Полуинтервал [start 00:00, end+1 00:00) для дней from..to включительно:
+    полночь берётся в часовом поясе zone и переводится в UTC, в котором
+    хранится срок. Длина ограничена CALENDAR_MAX_DAYS.
+    """
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'to' must not be before 'from'")
+    if (end - start).days + 1 > settings.CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Calendar range is limited to {settings.CALENDAR_MAX_DAYS} days"
+        )
+    try:
+        return _midnight_utc(start, zone), _midnight_utc(end + timedelta(days=1), zone)
+    except OverflowError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Calendar range is out of bounds")
+
+
+def _midnight_utc(day: date, zone: tzinfo) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def project_due_tickets(db: Session, project: Project, start: datetime, end: datetime) -> List[CalendarTicket]:
+    """
+    Задачи проекта со сроком в диапазоне: по колонкам доски через индекс
+    (section_id, due_at), без чтения остальных задач.
+    """
+    rows = db.execute(
+        select(Ticket.id, Ticket.name, Ticket.priority, Ticket.section_id, Ticket.due_at)
+        .where(
+            Ticket.section_id.in_(select(Section.id).where(Section.desk_id == project.desk_id)),
+            Ticket.due_at >= start,
+            Ticket.due_at < end,
+        )
+        .order_by(Ticket.due_at, Ticket.id)
+    ).all()
+    return [
+        CalendarTicket(
+            id=ticket_id,
+            name=name,
+            priority=priority,
+            project_id=project.id,
+            section_id=section_id,
+            due_at=due_at,
+        )
+        for ticket_id, name, priority, section_id, due_at in rows
+    ]
+
+
+def user_due_tickets(
+    db: Session, user_id: int, team_ids: Sequence[int], start: datetime, end: datetime
+) -> List[CalendarTicket]:
+    """
+    Задачи со сроком в диапазоне во всех проектах, доступных пользователю.
+    """
+    rows = db.execute(
+        select(Ticket.id, Ticket.name, Ticket.priority, Project.id, Ticket.section_id, Ticket.due_at)
+        .join(Section, Section.id == Ticket.section_id)
+        .join(Project, Project.desk_id == Section.desk_id)
+        .where(
+            or_(Project.team_id.in_(team_ids), Project.owner_id == user_id),
+            Ticket.due_at >= start,
+            Ticket.due_at < end,
+        )
+        .order_by(Ticket.due_at, Project.id, Ticket.id)
+    ).all()
+    return [
+        CalendarTicket(
+            id=ticket_id,
+            name=name,
+            priority=priority,
+            project_id=project_id,
+            section_id=section_id,
+            due_at=due_at,
+        )
+        for ticket_id, name, priority, project_id, section_id, due_at in rows
+    ]
+
+
+def calendar_days(tickets: Sequence[CalendarTicket], zone: tzinfo = timezone.utc) -> CalendarResponse:
+    # Задачи уже отсортированы по сроку; пустые дни не передаются.
+    # День - дата срока в поясе zone, сам due_at остаётся в UTC
+    return CalendarResponse(days=[
+        CalendarDay(date=day, tickets=list(day_tickets))
+        for day, day_tickets in groupby(
+            tickets, key=lambda ticket: ticket.due_at.replace(tzinfo=timezone.utc).astimezone(zone).date()
+        )
+    ])
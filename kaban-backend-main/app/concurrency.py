@@ -0,0 +1,56 @@
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models import utcnow
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    Достаёт версию из заголовка If-Match ("3", W/"3" или *).
+    None означает, что версию проверять не нужно.
+    """
+    if if_match is None:
+        return None
+    value = if_match.strip()
+    if value == "*":
+        return None
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid If-Match header"
+        )
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def versioned_update(db: Session, model, criteria, values: dict, expected_version: Optional[int]):
+    """
+    Обновляет строку одним UPDATE ... WHERE version = ? и увеличивает версию.
+    Если диалект поддерживает RETURNING, новая строка возвращается тем же
+    запросом; иначе перечитывается одним SELECT. Возвращает None, если
+    строка не найдена или версия не совпала.
+    """
+    stmt = update(model).where(*criteria)
+    if expected_version is not None:
+        stmt = stmt.where(model.version == expected_version)
+    stmt = stmt.values(
+        **values,
+        version=model.version + 1,
+        updated_at=utcnow()
+    ).execution_options(synchronize_session=False)
+
+    if db.get_bind().dialect.update_returning:
+        return db.execute(stmt.returning(model)).scalars().first()
+
+    if db.execute(stmt).rowcount == 0:
+        return None
+    return db.query(model).filter(*criteria).populate_existing().first()
@@ -4,12 +4,45 @@ from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Шарды для данных команд: "name=url,name=url"; пусто - всё в DATABASE_URL
+    SHARD_URLS: str = ""
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: int = 10  # повторный обмен того же токена без отзыва семейства
+    TOKEN_CACHE_SIZE: int = 10000  # проверенных токенов в LRU-кэше, 0 - без кэша
+
+    # Хеширование паролей (подобрать стоимость: python calibrate_hashing.py)
+    PASSWORD_SCHEMES: str = "bcrypt"  # через запятую, первая - для новых хешей
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 64 * 1024  # KiB
+    ARGON2_PARALLELISM: int = 2
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+
+    # Отзыв токенов: фильтр Блума + TTL-кэш, синхронизация между воркерами
+    REVOCATION_BLOOM_BITS: int = 1 << 20
+    REVOCATION_BLOOM_HASHES: int = 7
+    REVOCATION_CACHE_SIZE: int = 10000
+    REVOCATION_CACHE_TTL_SECONDS: float = 60
+    REVOCATION_SYNC_SECONDS: float = 5
+
+    # Production-запуск (serve.py)
+    WEB_CONCURRENCY: int = 0  # число воркеров, 0 - по числу CPU
+    WORKER_MAX_REQUESTS: int = 10000  # перезапуск воркера после N запросов
+    WORKER_MAX_REQUESTS_JITTER: int = 1000
+    WORKER_TIMEOUT: int = 60
+    WORKER_GRACEFUL_TIMEOUT: int = 30
+    WORKER_KEEPALIVE: int = 5
+    CREATE_SCHEMA_ON_STARTUP: bool = True  # create_all при старте приложения; serve.py делает это сам
+
+    # Пул соединений БД: общий бюджет делится между воркерами
+    DB_CONNECTION_BUDGET: int = 40
+    DB_POOL_SIZE: Optional[int] = None  # явный размер пула на воркер
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 3600
     
     # SMTP Settings for Mail.ru
     SMTP_HOST: str = "smtp.mail.ru"
@@ -19,6 +52,73 @@ class Settings(BaseSettings):
     SMTP_FROM_EMAIL: str
     FRONTEND_URL: str = "http://localhost:3000"  # URL для ссылок активации
 
+    # Idempotency-Key для POST-запросов
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_MAX_KEYS: int = 10000
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 1024 * 1024  # тело запроса с ключом читается в память целиком
+
+    # Ограничение частоты запросов (токен-бакеты)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_AUTH_PER_MINUTE: int = 20  # /auth/* на один IP
+    RATE_LIMIT_AUTH_BURST: int = 10
+    RATE_LIMIT_USER_PER_SECOND: float = 20  # остальные запросы на пользователя
+    RATE_LIMIT_USER_BURST: int = 60
+    RATE_LIMIT_MAX_KEYS: int = 100000
+
+    # Сброс нагрузки (503 + Retry-After)
+    LOAD_SHED_ENABLED: bool = True
+    LOAD_SHED_LOOP_LAG_MS: int = 500
+    LOAD_SHED_POOL_WAIT_MS: int = 1000
+    LOAD_SHED_RETRY_AFTER_SECONDS: int = 1
+    LOOP_LAG_INTERVAL_MS: int = 100
+
+    # Детектор блокирующих вызовов в event loop
+    BLOCKING_CALL_THRESHOLD_MS: int = 200
+    BLOCKING_CALL_HISTORY: int = 20
+    METRICS_TOKEN: str = ""  # заголовок X-Metrics-Token для /metrics, пусто - эндпоинт выключен
+
+    # Логирование
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json или text
+    LOG_INFO_SAMPLE_RATE: float = 1.0  # доля INFO-записей, которые попадут в лог
+    LOG_QUEUE_SIZE: int = 10000
+
+    # Журнал действий: буфер в памяти, запись в БД пачками
+    ACTIVITY_BUFFER_SIZE: int = 10000
+    ACTIVITY_BATCH_SIZE: int = 200
+    ACTIVITY_FLUSH_INTERVAL_SECONDS: float = 2.0
+
+    # Фоновые задания (таблица job)
+    JOBS_ENABLED: bool = True
+    JOB_CONCURRENCY: int = 4  # заданий одновременно на воркер
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: int = 10  # задержка перед повтором: base * 2^(attempt-1)
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600  # после этого задание упавшего воркера берёт другой
+    JOB_RETENTION_DAYS: int = 7  # выполненные и упавшие задания старше удаляются
+
+    # Архивация старых задач из колонок с archive_after_days
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_INTERVAL_SECONDS: int = 60 * 60
+    ARCHIVE_BATCH_SIZE: int = 500
+
+    # Потоковый экспорт: строк за одно чтение серверного курсора
+    EXPORT_YIELD_PER: int = 1000
+
+    # Потоковый импорт задач
+    IMPORT_BATCH_SIZE: int = 500  # строк в одном INSERT
+    IMPORT_MAX_RECORD_BYTES: int = 1024 * 1024
+    IMPORT_MAX_ERRORS: int = 100  # сколько ошибок по строкам хранить в задании
+
+    # POST /batch
+    BATCH_MAX_REQUESTS: int = 20
+
+    # Календарь: максимальная длина запрошенного диапазона в днях
+    CALENDAR_MAX_DAYS: int = 92
+
+    # Комментарии к задачам
+    COMMENT_MAX_LENGTH: int = 10000
+
     class Config:
         env_file = ".env"
         case_sensitive = True
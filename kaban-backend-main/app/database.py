@@ -1,17 +1,135 @@
+from typing import Dict, Optional
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.util import find_tables
 from app.config import settings
+from app.monitoring import measure_checkout
+
+
+def engine_options(url: str) -> dict:
+    """
+    Параметры пула для одного воркера: общий бюджет соединений
+    DB_CONNECTION_BUDGET делится на WEB_CONCURRENCY процессов. Сессии
+    MySQL работают в UTC.
+    """
+    options = {"pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        return options
+    if url.startswith("mysql"):
+        # Приложение пишет время в UTC, server_default=func.now() должен
+        # давать то же самое независимо от часового пояса сервера MySQL
+        options["connect_args"] = {"init_command": "SET time_zone = '+00:00'"}
+
+    workers = max(1, settings.WEB_CONCURRENCY)
+    options.update(
+        pool_size=settings.DB_POOL_SIZE or max(1, settings.DB_CONNECTION_BUDGET // workers),
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def parse_shard_urls(value: str) -> Dict[str, str]:
+    """
+    Разбирает SHARD_URLS вида "eu1=mysql+pymysql://...,eu2=mysql+pymysql://...".
+    """
+    shards = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, url = item.partition("=")
+        if not name.strip() or not url.strip():
+            raise ValueError(f"Invalid SHARD_URLS entry: {item}")
+        shards[name.strip()] = url.strip()
+    return shards
+
+
+DEFAULT_SHARD = "default"
+
+# Данные команд: проекты, доски, колонки, задачи и всё, что к ним привязано.
+# Остальные таблицы (пользователи, команды, токены, задания) общие и живут
+# в основной базе.
+TENANT_TABLES = frozenset({
+    "projects", "desk", "section", "ticket", "ticket_assignee", "ticket_comment", "ticket_archive",
+    "ticket_archive_assignee", "activity", "import_job",
+})
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+
+# Основная база - тоже шард: в ней остаются команды, у которых shard не задан
+shard_engines: Dict[str, Engine] = {DEFAULT_SHARD: engine}
+for _name, _url in parse_shard_urls(settings.SHARD_URLS).items():
+    shard_engines[_name] = create_engine(_url, **engine_options(_url))
+
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class ShardNotSelected(RuntimeError):
+    pass
+
+
+class ShardedSession(Session):
+    """
+    Сессия, которая отправляет запросы к данным команд в базу шарда
+    self.shard, а к общим таблицам - в основную базу. Пока шард один,
+    это обычная сессия.
+    """
+
+    def __init__(self, *args, engines: Optional[Dict[str, Engine]] = None, shard: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.engines = shard_engines if engines is None else engines
+        self.shard = shard
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.engines) > 1
+
+    def spawn(self, shard: str) -> "ShardedSession":
+        return ShardedSession(engines=self.engines, shard=shard, autoflush=False, expire_on_commit=False)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self.sharded:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if not _touches_tenant(mapper, clause):
+            return self.engines[DEFAULT_SHARD]
+        if self.shard is None:
+            raise ShardNotSelected("Session is not bound to a shard")
+        try:
+            return self.engines[self.shard]
+        except KeyError:
+            raise ShardNotSelected(f"Unknown shard: {self.shard}")
+
+
+def _touches_tenant(mapper, clause) -> bool:
+    if mapper is not None:
+        return mapper.persist_selectable.name in TENANT_TABLES
+    if clause is not None:
+        return any(getattr(table, "name", None) in TENANT_TABLES for table in find_tables(clause, include_crud=True))
+    return False
+
+
+# Objects keep their in-memory state after commit, so write endpoints can
+# build responses without a refresh SELECT
+SessionLocal = sessionmaker(
+    class_=ShardedSession, autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 
 Base = declarative_base()
 
 
-def get_db():
+def get_db(request: Request):
+    # Записи из POST /batch работают в сессии основного запроса (кроме
+    # шардированной базы: там сессия закрепляется за шардом), чтения -
+    # каждое в своей
+    shared = getattr(request.state, "batch_db", None)
+    if shared is not None and not getattr(shared, "sharded", False):
+        yield shared
+        return
+
     db = SessionLocal()
     try:
+        measure_checkout(db)
         yield db
     finally:
         db.close()
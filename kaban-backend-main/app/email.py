@@ -1,3 +1,4 @@
+import asyncio
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -5,6 +6,19 @@ from app.config import settings
 from app.logging_config import logger
 
 
+def _deliver(email: str, message: MIMEMultipart):
+    """
+    Отправляет письмо через SMTP. Вызов блокирующий, поэтому
+    выполняется в пуле потоков.
+    """
+    # Подключаемся к SMTP серверу Mail.ru
+    logger.debug("Connecting to SMTP server: %s:%s", settings.SMTP_HOST, settings.SMTP_PORT)
+    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
+        server.starttls()  # Включаем TLS шифрование
+        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        server.sendmail(settings.SMTP_FROM_EMAIL, email, message.as_string())
+
+
 async def send_activation_email(email: str, username: str, activation_token: str):
     """
     Отправляет email с ссылкой активации аккаунта через Mail.ru SMTP
@@ -59,16 +73,11 @@ async def send_activation_email(email: str, username: str, activation_token: str
     message.attach(html_part)
     
     try:
-        # Подключаемся к SMTP серверу Mail.ru
-        logger.debug(f"Connecting to SMTP server: {settings.SMTP_HOST}:{settings.SMTP_PORT}")
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()  # Включаем TLS шифрование
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.sendmail(settings.SMTP_FROM_EMAIL, email, message.as_string())
-        logger.info(f"Activation email sent successfully to: {email}")
+        await asyncio.to_thread(_deliver, email, message)
+        logger.info("Activation email sent successfully to: %s", email)
         return True
     except Exception as e:
-        logger.error(f"Error sending activation email to {email}: {str(e)}", exc_info=True)
+        logger.error("Error sending activation email to %s: %s", email, e, exc_info=True)
         return False
 
 
@@ -121,12 +130,10 @@ async def send_reset_password_email(email: str, username: str, reset_token: str)
     message.attach(html_part)
 
     try:
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.sendmail(settings.SMTP_FROM_EMAIL, email, message.as_string())
+        await asyncio.to_thread(_deliver, email, message)
+        logger.info("Reset password email sent successfully to: %s", email)
         return True
     except Exception as e:
-        print(f"Ошибка при отправке email: {e}")
+        logger.error("Error sending reset password email to %s: %s", email, e, exc_info=True)
         return False
 
@@ -0,0 +1,101 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import Iterator
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Project, Section, Ticket
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+TICKET_COLUMNS = (
+    Section.name.label("section"),
+    Section.order.label("section_order"),
+    Ticket.id,
+    Ticket.name,
+    Ticket.task,
+    Ticket.priority,
+    Ticket.complexity,
+    Ticket.due_at,
+    Ticket.created_at,
+    Ticket.updated_at,
+)
+
+
+def project_tickets_query(desk_id: int) -> Select:
+    return (
+        select(*TICKET_COLUMNS)
+        .join(Section, Section.id == Ticket.section_id)
+        .where(Section.desk_id == desk_id)
+        .order_by(Section.order, Section.id, Ticket.id)
+    )
+
+
+def team_tickets_query(team_id: int) -> Select:
+    return (
+        select(Project.id.label("project_id"), Project.name.label("project"), *TICKET_COLUMNS)
+        .join(Section, Section.desk_id == Project.desk_id)
+        .join(Ticket, Ticket.section_id == Section.id)
+        .where(Project.team_id == team_id)
+        .order_by(Project.id, Section.order, Section.id, Ticket.id)
+    )
+
+
+def stream_rows(db: Session, stmt: Select, fmt: str, yield_per: int) -> Iterator[str]:
+    """
+    Читает строки через серверный курсор (yield_per) и отдаёт их
+    кусками по одной пачке, поэтому память не зависит от размера выгрузки.
+    """
+    result = db.execute(stmt.execution_options(yield_per=yield_per))
+    columns = list(result.keys())
+    try:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield _drain(buffer)
+            for rows in result.partitions():
+                writer.writerows([_plain(value) for value in row] for row in rows)
+                yield _drain(buffer)
+        else:
+            for rows in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+    finally:
+        result.close()
+
+
+def export_response(db: Session, stmt: Select, fmt: str, filename: str) -> StreamingResponse:
+    # Синхронный генератор Starlette крутит в пуле потоков, а сессия из
+    # get_db закрывается только после отправки ответа
+    return StreamingResponse(
+        stream_rows(db, stmt, fmt, settings.EXPORT_YIELD_PER),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+def _drain(buffer: io.StringIO) -> str:
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
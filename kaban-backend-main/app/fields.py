@@ -0,0 +1,249 @@
+import re
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.board import board_tickets
+from app.models import Desk, Project, Section, Team, Ticket, User
+from app.schemas import ProjectResponse, SectionResponse, SectionSummary, TeamResponse, TicketResponse, UserSummary
+
+# Разобранный параметр fields: имя поля -> вложенный выбор или None (все поля)
+Fields = Dict[str, Optional["Fields"]]
+
+FIELDS_MAX_LENGTH = 500
+
+_TOKEN = re.compile(r"\s*(?:([A-Za-z_][A-Za-z0-9_]*)|(\S))")
+
+
+def parse_fields(spec: str) -> Fields:
+    """
+    Разбирает выбор полей вида "id,name,team(name),sections(name,ticket_count)".
+    """
+    tokens = []
+    for name, symbol in _TOKEN.findall(spec):
+        if symbol and symbol not in "(),":
+            raise _bad_fields(f"Unexpected character in fields: {symbol}")
+        tokens.append(name or symbol)
+
+    position = 0
+
+    def parse_list() -> Fields:
+        nonlocal position
+        fields: Fields = {}
+        while True:
+            if position >= len(tokens) or tokens[position] in "(),":
+                raise _bad_fields("Expected a field name")
+            name = tokens[position]
+            position += 1
+            nested = None
+            if position < len(tokens) and tokens[position] == "(":
+                position += 1
+                nested = parse_list()
+                if position >= len(tokens) or tokens[position] != ")":
+                    raise _bad_fields("Unbalanced parentheses in fields")
+                position += 1
+            fields[name] = nested
+            if position < len(tokens) and tokens[position] == ",":
+                position += 1
+                continue
+            return fields
+
+    fields = parse_list()
+    if position != len(tokens):
+        raise _bad_fields("Unbalanced parentheses in fields")
+    return fields
+
+
+class Loader:
+    """
+    Загружает объекты по ключам пачкой: один запрос с IN (...) на все
+    ключи, которых ещё нет в кэше загрузчика.
+    """
+
+    def __init__(self, fetch: Callable[[List[Hashable]], Dict]):
+        self.fetch = fetch
+        self._cache: Dict = {}
+
+    def load_many(self, keys: Iterable[Hashable]) -> Dict:
+        keys = set(keys)
+        missing = [key for key in keys if key not in self._cache]
+        if missing:
+            found = self.fetch(missing)
+            for key in missing:
+                self._cache[key] = found.get(key)
+        return {key: self._cache[key] for key in keys}
+
+    def load(self, key: Hashable):
+        return self.load_many([key])[key]
+
+
+class Loaders:
+    """
+    Загрузчики связей на один запрос: вместо ленивой загрузки
+    relationship() по объекту - один запрос на тип связи.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.users = Loader(self._users)
+        self.teams = Loader(self._teams)
+        self.sections_by_desk = Loader(self._sections_by_desk)
+        self.ticket_counts = Loader(self._ticket_counts)
+
+    def _users(self, ids: List[int]) -> Dict[int, User]:
+        return {user.id: user for user in self.db.query(User).filter(User.id.in_(ids))}
+
+    def _teams(self, ids: List[int]) -> Dict[int, Team]:
+        return {team.id: team for team in self.db.query(Team).filter(Team.id.in_(ids))}
+
+    def _sections_by_desk(self, desk_ids: List[int]) -> Dict[int, List[Section]]:
+        sections = defaultdict(list)
+        for section in self.db.query(Section).filter(Section.desk_id.in_(desk_ids)).order_by(Section.order):
+            sections[section.desk_id].append(section)
+        return {desk_id: sections[desk_id] for desk_id in desk_ids}
+
+    def _ticket_counts(self, section_ids: List[int]) -> Dict[int, int]:
+        counts = dict(
+            self.db.query(Ticket.section_id, func.count(Ticket.id))
+            .filter(Ticket.section_id.in_(section_ids))
+            .group_by(Ticket.section_id)
+            .all()
+        )
+        return {section_id: counts.get(section_id, 0) for section_id in section_ids}
+
+
+def shape_projects(db: Session, projects: Sequence[Project], fields: Fields) -> List[dict]:
+    """
+    Проекты с выбранными полями и связями (team, owner, sections,
+    ticket_count). Каждая связь загружается одним запросом на все проекты.
+    """
+    _check(fields, set(ProjectResponse.model_fields) | {"ticket_count"}, {"team", "owner", "sections"})
+    rows = [_dump(ProjectResponse, project, _include(ProjectResponse, fields)) for project in projects]
+    loaders = Loaders(db)
+
+    if "team" in fields:
+        include = _related_include(TeamResponse, fields["team"])
+        teams = loaders.teams.load_many(project.team_id for project in projects)
+        for row, project in zip(rows, projects):
+            row["team"] = _dump(TeamResponse, teams[project.team_id], include)
+
+    if "owner" in fields:
+        include = _related_include(UserSummary, fields["owner"])
+        owners = loaders.users.load_many(project.owner_id for project in projects)
+        for row, project in zip(rows, projects):
+            row["owner"] = _dump(UserSummary, owners[project.owner_id], include)
+
+    if "sections" in fields or "ticket_count" in fields:
+        section_fields = fields.get("sections")
+        if section_fields is not None:
+            _check(section_fields, set(SectionSummary.model_fields), set())
+        sections_by_desk = loaders.sections_by_desk.load_many(project.desk_id for project in projects)
+
+        counts: Dict[int, int] = {}
+        if "ticket_count" in fields or ("sections" in fields and (section_fields is None or "ticket_count" in section_fields)):
+            counts = loaders.ticket_counts.load_many(
+                section.id for sections in sections_by_desk.values() for section in sections
+            )
+
+        for row, project in zip(rows, projects):
+            sections = sections_by_desk[project.desk_id]
+            if "sections" in fields:
+                row["sections"] = [
+                    SectionSummary(
+                        id=section.id,
+                        name=section.name,
+                        order=section.order,
+                        ticket_count=counts.get(section.id, 0),
+                    ).model_dump(mode="json", include=_include(SectionSummary, section_fields))
+                    for section in sections
+                ]
+            if "ticket_count" in fields:
+                row["ticket_count"] = sum(counts[section.id] for section in sections)
+
+    return rows
+
+
+def shape_board(db: Session, project: Project, desk: Desk, sections: Sequence[Section], fields: Fields) -> dict:
+    """
+    Доска с выбранными полями. Задачи читаются, только если выбраны
+    sections(tickets); владелец и команда проекта - через загрузчики.
+    """
+    _check(fields, {"desk_id", "desk_name"}, {"sections", "team", "owner"})
+    loaders = Loaders(db)
+    board: dict = {}
+    if "desk_id" in fields:
+        board["desk_id"] = desk.id
+    if "desk_name" in fields:
+        board["desk_name"] = desk.name
+
+    if "sections" in fields:
+        section_fields = fields["sections"]
+        if section_fields is not None:
+            _check(section_fields, set(SectionResponse.model_fields) | {"ticket_count"}, {"tickets"})
+        with_tickets = section_fields is None or "tickets" in section_fields
+        with_counts = section_fields is not None and "ticket_count" in section_fields
+
+        tickets_by_section: Dict[int, list] = {section.id: [] for section in sections}
+        ticket_include = None
+        if with_tickets:
+            ticket_fields = section_fields.get("tickets") if section_fields is not None else None
+            ticket_include = _related_include(TicketResponse, ticket_fields)
+            for ticket in board_tickets(db, desk.id):
+                tickets_by_section[ticket.section_id].append(ticket)
+
+        counts: Dict[int, int] = {}
+        if with_counts:
+            if with_tickets:
+                counts = {section_id: len(tickets) for section_id, tickets in tickets_by_section.items()}
+            else:
+                counts = loaders.ticket_counts.load_many(section.id for section in sections)
+
+        board["sections"] = []
+        for section in sections:
+            row = _dump(SectionResponse, section, _include(SectionResponse, section_fields))
+            if with_counts:
+                row["ticket_count"] = counts[section.id]
+            if with_tickets:
+                row["tickets"] = [
+                    _dump(TicketResponse, ticket, ticket_include) for ticket in tickets_by_section[section.id]
+                ]
+            board["sections"].append(row)
+
+    if "team" in fields:
+        board["team"] = _dump(TeamResponse, loaders.teams.load(project.team_id), _related_include(TeamResponse, fields["team"]))
+    if "owner" in fields:
+        board["owner"] = _dump(UserSummary, loaders.users.load(project.owner_id), _related_include(UserSummary, fields["owner"]))
+    return board
+
+
+def _check(fields: Fields, plain: Set[str], relations: Set[str]):
+    for name, nested in fields.items():
+        if name not in plain and name not in relations:
+            raise _bad_fields(f"Unknown field: {name}")
+        if nested is not None and name not in relations:
+            raise _bad_fields(f"Field {name} has no nested fields")
+
+
+def _include(schema: Type[BaseModel], fields: Optional[Fields]) -> Optional[Set[str]]:
+    # Поля самой схемы из выбора; связи и вычисляемые поля добавляются отдельно
+    if fields is None:
+        return None
+    return {name for name in fields if name in schema.model_fields}
+
+
+def _related_include(schema: Type[BaseModel], fields: Optional[Fields]) -> Optional[Set[str]]:
+    if fields is not None:
+        _check(fields, set(schema.model_fields), set())
+    return _include(schema, fields)
+
+
+def _dump(schema: Type[BaseModel], obj, include: Optional[Set[str]]) -> dict:
+    return schema.model_validate(obj).model_dump(mode="json", include=include)
+
+
+def _bad_fields(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
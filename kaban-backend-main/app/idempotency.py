@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.negotiation import (
+    MSGPACK_MEDIA_TYPE,
+    NegotiatedResponse,
+    is_json,
+    is_msgpack,
+    msgpack_requested,
+    packb,
+    unpackb,
+)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAY_HEADER = b"idempotent-replayed"
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    expires_at: float
+
+
+class IdempotencyStore:
+    """
+    Ограниченное хранилище недавних Idempotency-Key с сохранёнными ответами.
+    Старые ключи вытесняются по LRU и по TTL.
+    """
+
+    def __init__(self, max_keys: int, ttl_seconds: int):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, StoredResponse]" = OrderedDict()
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+
+    def get(self, key: tuple) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, fingerprint: str, status: int, headers, body: bytes) -> StoredResponse:
+        entry = StoredResponse(
+            fingerprint=fingerprint,
+            status=status,
+            headers=headers,
+            body=body,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+        return entry
+
+    def in_flight(self, key: tuple) -> Optional[asyncio.Future]:
+        return self._in_flight.get(key)
+
+    def begin(self, key: tuple) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        return future
+
+    def finish(self, key: tuple, future: asyncio.Future, entry: Optional[StoredResponse]):
+        self._in_flight.pop(key, None)
+        if not future.done():
+            future.set_result(entry)
+
+    def clear(self):
+        self._entries.clear()
+
+
+idempotency_store = IdempotencyStore(
+    max_keys=settings.IDEMPOTENCY_MAX_KEYS,
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+)
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware для POST-запросов с заголовком Idempotency-Key.
+
+    Повтор запроса с тем же ключом возвращает сохранённый ответ без повторного
+    выполнения обработчика, а одновременные одинаковые запросы схлопываются
+    в один: остальные ждут завершения первого. Тело запроса читается в
+    память целиком, поэтому его размер ограничен max_body_bytes; загрузка
+    файлов (PUT .../import/{job_id}) сюда не попадает.
+    """
+
+    def __init__(self, app, store: IdempotencyStore = idempotency_store, max_body_bytes: Optional[int] = None):
+        self.app = app
+        self.store = store
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        max_body_bytes = self.max_body_bytes or settings.IDEMPOTENCY_MAX_BODY_BYTES
+        body = await _read_body(receive, headers, max_body_bytes)
+        if body is None:
+            await _too_large(scope, receive, send, max_body_bytes)
+            return
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key = (_principal(scope, headers), scope["path"], idempotency_key)
+
+        entry = self.store.get(key)
+        if entry is None and (pending := self.store.in_flight(key)) is not None:
+            # Такой же запрос уже выполняется - дожидаемся его ответа
+            entry = await asyncio.shield(pending)
+
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                await _conflict(scope, receive, send)
+                return
+            await _replay(entry, send)
+            return
+
+        future = self.store.begin(key)
+        status_code = 500
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, _replay_receive(body, receive), send_wrapper)
+            # Ошибки сервера не кэшируем, чтобы повтор мог выполниться заново
+            if status_code < 500:
+                stored = self.store.put(key, fingerprint, status_code, response_headers, b"".join(chunks))
+        finally:
+            self.store.finish(key, future, stored)
+
+
+def _principal(scope, headers: Headers) -> str:
+    authorization = headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+async def _read_body(receive, headers: Headers, limit: int) -> Optional[bytes]:
+    # None - тело больше limit, дочитывать его не нужно
+    content_length = headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        return None
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+def _replay_receive(body: bytes, receive):
+    sent = False
+
+    async def wrapped():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return wrapped
+
+
+async def _replay(entry: StoredResponse, send):
+    headers, body = _in_requested_format(entry)
+    await send({
+        "type": "http.response.start",
+        "status": entry.status,
+        "headers": headers + [(REPLAY_HEADER, b"true")],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _in_requested_format(entry: StoredResponse) -> Tuple[List[Tuple[bytes, bytes]], bytes]:
+    # Повтор может прийти с другим Accept, чем первый запрос
+    headers = MutableHeaders(raw=list(entry.headers))
+    content_type = headers.get("content-type")
+    if is_msgpack(content_type) and not msgpack_requested():
+        body = JSONResponse(unpackb(entry.body)).body
+        headers["content-type"] = "application/json"
+    elif is_json(content_type) and msgpack_requested():
+        body = packb(json.loads(entry.body))
+        headers["content-type"] = MSGPACK_MEDIA_TYPE
+    else:
+        return entry.headers, entry.body
+    headers["content-length"] = str(len(body))
+    return headers.raw, body
+
+
+async def _too_large(scope, receive, send, limit: int):
+    response = NegotiatedResponse(
+        status_code=413,
+        content={"detail": f"Request body with Idempotency-Key is limited to {limit} bytes"},
+    )
+    await response(scope, receive, send)
+
+
+async def _conflict(scope, receive, send):
+    response = NegotiatedResponse(
+        status_code=422,
+        content={"detail": "Idempotency-Key was already used with a different request body"},
+    )
+    await response(scope, receive, send)
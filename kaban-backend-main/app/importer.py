@@ -0,0 +1,236 @@
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.models import ImportJob, PriorityEnum, Project, Section, Ticket, as_timestamp, utcnow
+from app.schemas import COMPLEXITY_MAX, COMPLEXITY_MIN
+
+# Названия колонок в выгрузках других трекеров -> поля задачи
+FIELD_ALIASES = {
+    "section": "section",
+    "status": "section",
+    "column": "section",
+    "list": "section",
+    "name": "name",
+    "title": "name",
+    "summary": "name",
+    "task": "task",
+    "description": "task",
+    "body": "task",
+    "priority": "priority",
+    "complexity": "complexity",
+    "points": "complexity",
+    "estimate": "complexity",
+    "due_at": "due_at",
+    "due": "due_at",
+    "due_date": "due_at",
+    "deadline": "due_at",
+}
+
+DEFAULT_SECTION = "Imported"
+NAME_MAX_LENGTH = 50
+SECTION_NAME_MAX_LENGTH = 255
+
+
+class ImportFailed(Exception):
+    pass
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_record_bytes: int) -> AsyncIterator[str]:
+    """
+    Режет поток байтов на строки, не собирая тело запроса целиком.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+        if len(pending) > max_record_bytes:
+            raise ImportFailed("Record is too large")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(lines: AsyncIterator[str], max_record_bytes: int) -> AsyncIterator[List[str]]:
+    """
+    Собирает строки в записи CSV: поле в кавычках может содержать перевод
+    строки, поэтому запись закончена, только когда кавычки сбалансированы.
+    """
+    parts: List[str] = []
+    quotes = 0
+    size = 0
+    async for line in lines:
+        parts.append(line)
+        quotes += line.count('"')
+        size += len(line)
+        if quotes % 2:
+            if size > max_record_bytes:
+                raise ImportFailed("Record is too large")
+            continue
+        record = "\n".join(parts)
+        parts, quotes, size = [], 0, 0
+        if record.strip():
+            yield next(csv.reader([record]))
+    if parts:
+        raise ImportFailed("Unterminated quoted field at end of file")
+
+
+class TicketImporter:
+    """
+    Потоково разбирает CSV/NDJSON и вставляет задачи пачками через
+    executemany. В памяти держится не больше одной пачки строк.
+    """
+
+    def __init__(self, db: Session, project: Project, job: ImportJob):
+        self.db = db
+        self.project = project
+        self.job = job
+        self.batch_size = settings.IMPORT_BATCH_SIZE
+        self.max_record_bytes = settings.IMPORT_MAX_RECORD_BYTES
+        self.sections: Dict[str, int] = {}
+        self.next_order = 1
+        self.errors: List[dict] = []
+        self._batch: List[dict] = []
+
+    async def run(self, chunks: AsyncIterator[bytes]):
+        await run_in_threadpool(self._load_sections)
+        lines = iter_lines(chunks, self.max_record_bytes)
+        if self.job.format == "csv":
+            await self._import_csv(lines)
+        else:
+            await self._import_ndjson(lines)
+        await self._flush()
+
+    async def _import_csv(self, lines: AsyncIterator[str]):
+        header: Optional[List[Optional[str]]] = None
+        async for values in iter_csv_records(lines, self.max_record_bytes):
+            if header is None:
+                header = [FIELD_ALIASES.get(name.strip().lower()) for name in values]
+                if "name" not in header:
+                    raise ImportFailed("CSV header must contain a name or title column")
+                continue
+            await self._add({field: value for field, value in zip(header, values) if field})
+
+    async def _import_ndjson(self, lines: AsyncIterator[str]):
+        async for line in lines:
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                self.job.rows_processed += 1
+                self._row_error("Expected a JSON object")
+                continue
+            row = {}
+            for key, value in data.items():
+                field = FIELD_ALIASES.get(str(key).lower())
+                if field:
+                    row[field] = value
+            await self._add(row)
+
+    async def _add(self, row: dict):
+        self.job.rows_processed += 1
+        name = str(row.get("name") or "").strip()
+        if not name:
+            self._row_error("Missing name")
+            return
+        if len(name) > NAME_MAX_LENGTH:
+            self._row_error(f"Name is longer than {NAME_MAX_LENGTH} characters")
+            return
+
+        priority = str(row.get("priority") or PriorityEnum.medium.value).strip().lower()
+        if priority not in PriorityEnum.__members__:
+            self._row_error(f"Unknown priority: {priority}")
+            return
+
+        try:
+            complexity = int(row.get("complexity") or 1)
+        except (TypeError, ValueError):
+            self._row_error("Complexity must be an integer")
+            return
+        if not COMPLEXITY_MIN <= complexity <= COMPLEXITY_MAX:
+            self._row_error(f"Complexity must be between {COMPLEXITY_MIN} and {COMPLEXITY_MAX}")
+            return
+
+        due_at = None
+        if row.get("due_at"):
+            try:
+                due_at = as_timestamp(datetime.fromisoformat(str(row["due_at"]).strip()))
+            except ValueError:
+                self._row_error("Due date must be an ISO 8601 date or datetime")
+                return
+
+        section_name = str(row.get("section") or DEFAULT_SECTION).strip() or DEFAULT_SECTION
+        if len(section_name) > SECTION_NAME_MAX_LENGTH:
+            self._row_error(f"Section is longer than {SECTION_NAME_MAX_LENGTH} characters")
+            return
+        section_id = self.sections.get(section_name)
+        if section_id is None:
+            section_id = await run_in_threadpool(self._create_section, section_name)
+
+        now = utcnow()
+        self._batch.append({
+            "name": name,
+            "task": str(row.get("task") or ""),
+            "priority": PriorityEnum(priority),
+            "complexity": complexity,
+            "section_id": section_id,
+            "due_at": due_at,
+            "created_at": now,
+            "updated_at": now,
+        })
+        if len(self._batch) >= self.batch_size:
+            await self._flush()
+
+    async def _flush(self):
+        batch, self._batch = self._batch, []
+        await run_in_threadpool(self._write_batch, batch)
+
+    def _write_batch(self, batch: List[dict]):
+        # Вставка пачки и прогресс задания - в одной транзакции
+        if batch:
+            self.db.execute(insert(Ticket), batch)
+        self.job.tickets_created += len(batch)
+        self.job.errors = json.dumps(self.errors) if self.errors else None
+        self.db.commit()
+
+    def _load_sections(self):
+        rows = self.db.execute(
+            select(Section.name, Section.id).where(Section.desk_id == self.project.desk_id)
+        ).all()
+        self.sections = {name: section_id for name, section_id in rows}
+        max_order = self.db.execute(
+            select(func.max(Section.order)).where(Section.desk_id == self.project.desk_id)
+        ).scalar()
+        self.next_order = (max_order or 0) + 1
+
+    def _create_section(self, name: str) -> int:
+        now = utcnow()
+        result = self.db.execute(insert(Section).values(
+            desk_id=self.project.desk_id,
+            name=name,
+            order=self.next_order,
+            created_at=now,
+            updated_at=now,
+        ))
+        section_id = result.inserted_primary_key[0]
+        self.sections[name] = section_id
+        self.next_order += 1
+        self.job.sections_created += 1
+        return section_id
+
+    def _row_error(self, message: str):
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append({"row": self.job.rows_processed, "error": message})
@@ -0,0 +1,356 @@
+import asyncio
+import json
+import os
+import socket
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.logging_config import logger
+from app.models import Job, utcnow
+
+
+@dataclass
+class JobHandler:
+    func: Callable
+    max_attempts: Optional[int] = None
+
+
+@dataclass
+class Schedule:
+    name: str
+    interval: int
+    payload: Optional[dict] = None
+    next_run: float = field(default=0.0)
+
+
+class JobRunner:
+    """
+    Выполняет фоновые задания из таблицы job внутри процесса приложения.
+
+    Задание ставится в очередь строкой в БД (в транзакции вызывающего кода),
+    воркеры забирают его атомарным UPDATE ... WHERE status = 'pending',
+    поэтому одно задание выполняет только один процесс. Пока задание
+    выполняется, воркер продлевает locked_at; задания упавшего воркера
+    подхватываются после JOB_LOCK_TIMEOUT_SECONDS без продления. Доставка
+    "хотя бы один раз": задание, чей воркер упал посреди работы, выполнится
+    повторно, поэтому обработчики должны быть идемпотентными. Асинхронные
+    обработчики выполняются в event loop, синхронные - в пуле потоков.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_interval: float,
+        max_attempts: int,
+        retry_base: int,
+        lock_timeout: int,
+        session_factory=SessionLocal,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.lock_timeout = lock_timeout
+        self.session_factory = session_factory
+        self.handlers: Dict[str, JobHandler] = {}
+        self.schedules: List[Schedule] = []
+        self.completed = 0
+        self.failed = 0
+        self._running: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_at = 0.0
+
+    @property
+    def worker_id(self) -> str:
+        # pid читается каждый раз: после fork у воркера gunicorn он другой
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def register(self, name: str, func: Callable, max_attempts: Optional[int] = None):
+        self.handlers[name] = JobHandler(func, max_attempts)
+
+    def handler(self, name: str, max_attempts: Optional[int] = None):
+        def decorator(func: Callable) -> Callable:
+            self.register(name, func, max_attempts)
+            return func
+        return decorator
+
+    def schedule(self, name: str, interval_seconds: int, payload: Optional[dict] = None):
+        """
+        Периодическое задание: раз в interval_seconds ставится одно задание
+        на все воркеры (dedup_key по номеру интервала).
+        """
+        self.schedules = [s for s in self.schedules if s.name != name]
+        self.schedules.append(Schedule(name, interval_seconds, payload))
+
+    def enqueue(
+        self,
+        db: Session,
+        name: str,
+        payload: Optional[dict] = None,
+        *,
+        delay: float = 0,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        """
+        Добавляет задание в сессию вызывающего кода. Задание появится в
+        очереди после его commit - вместе с остальными изменениями запроса.
+        """
+        handler = self.handlers.get(name)
+        if handler is None:
+            raise ValueError(f"Unknown job: {name}")
+
+        job = Job(
+            name=name,
+            payload=json.dumps(payload, default=str) if payload is not None else None,
+            status="pending",
+            attempts=0,
+            max_attempts=max_attempts or handler.max_attempts or self.max_attempts,
+            run_at=utcnow() + timedelta(seconds=delay),
+        )
+        db.add(job)
+        self.wake()
+        return job
+
+    def wake(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(self._task, *self._running, return_exceptions=True)
+        self._task = None
+        self._wakeup = None
+        self._loop = None
+        # Незавершённые задания сразу возвращаем в очередь, не дожидаясь таймаута
+        try:
+            await asyncio.to_thread(self._release)
+        except Exception as e:
+            logger.error("Failed to release jobs: %s", e, exc_info=True)
+
+    async def run_pending(self):
+        """
+        Выполняет все задания, срок которых наступил, и ждёт их завершения.
+        """
+        while True:
+            rows = await asyncio.to_thread(self.claim, self.concurrency)
+            if not rows:
+                return
+            await asyncio.gather(*(self._execute(*row) for row in rows))
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._enqueue_scheduled)
+                if self._running and time.monotonic() - self._heartbeat_at > self.lock_timeout / 3:
+                    self._heartbeat_at = time.monotonic()
+                    await asyncio.to_thread(self._heartbeat)
+                free = self.concurrency - len(self._running)
+                if free > 0:
+                    for row in await asyncio.to_thread(self.claim, free):
+                        task = asyncio.create_task(self._execute(*row))
+                        self._running.add(task)
+                        task.add_done_callback(self._on_done)
+            except Exception as e:
+                logger.error("Job dispatcher error: %s", e, exc_info=True)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _on_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def claim(self, limit: int) -> list:
+        """
+        Забирает до limit заданий: ожидающих, у которых наступил run_at,
+        и зависших у упавших воркеров.
+        """
+        now = utcnow()
+        claimable = or_(
+            and_(Job.status == "pending", Job.run_at <= now),
+            and_(Job.status == "running", Job.locked_at < now - timedelta(seconds=self.lock_timeout)),
+        )
+        db = self.session_factory()
+        try:
+            candidates = db.execute(
+                select(Job.id).where(claimable).order_by(Job.run_at, Job.id).limit(limit)
+            ).scalars().all()
+
+            claimed = []
+            for job_id in candidates:
+                # Условие повторяется в UPDATE: задание получит только один воркер
+                result = db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, claimable)
+                    .values(
+                        status="running",
+                        locked_by=self.worker_id,
+                        locked_at=now,
+                        attempts=Job.attempts + 1,
+                        updated_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 1:
+                    claimed.append(job_id)
+            db.commit()
+
+            if not claimed:
+                return []
+            return db.execute(
+                select(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts)
+                .where(Job.id.in_(claimed))
+                .order_by(Job.run_at, Job.id)
+            ).all()
+        finally:
+            db.close()
+
+    async def _execute(self, job_id: int, name: str, payload: Optional[str], attempts: int, max_attempts: int):
+        try:
+            handler = self.handlers.get(name)
+            if handler is None:
+                raise LookupError(f"No handler registered for job {name}")
+            args = json.loads(payload) if payload else {}
+            if asyncio.iscoroutinefunction(handler.func):
+                await handler.func(args)
+            else:
+                await asyncio.to_thread(handler.func, args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Job %s (%s) failed on attempt %s: %s", job_id, name, attempts, e, exc_info=True)
+            await asyncio.to_thread(self._finish_failed, job_id, attempts, max_attempts, repr(e))
+        else:
+            await asyncio.to_thread(self._finish, job_id, {"status": "done", "last_error": None})
+            self.completed += 1
+
+    def _finish_failed(self, job_id: int, attempts: int, max_attempts: int, error: str):
+        if attempts < max_attempts:
+            delay = self.retry_base * 2 ** (attempts - 1)
+            self._finish(job_id, {
+                "status": "pending",
+                "run_at": utcnow() + timedelta(seconds=delay),
+                "last_error": error,
+            })
+        else:
+            self._finish(job_id, {"status": "failed", "last_error": error})
+            self.failed += 1
+
+    def _finish(self, job_id: int, values: dict):
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.locked_by == self.worker_id)
+                .values(**values, locked_by=None, locked_at=None, updated_at=utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _heartbeat(self):
+        # Выполняющиеся задания этого воркера не должны считаться зависшими
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.status == "running", Job.locked_by == self.worker_id)
+                .values(locked_at=utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _release(self):
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.status == "running", Job.locked_by == self.worker_id)
+                .values(status="pending", attempts=Job.attempts - 1, locked_by=None, locked_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _enqueue_scheduled(self):
+        now = time.time()
+        for schedule in self.schedules:
+            if schedule.next_run > now:
+                continue
+            handler = self.handlers.get(schedule.name)
+            slot = int(now // schedule.interval)
+            schedule.next_run = (slot + 1) * schedule.interval
+            db = self.session_factory()
+            try:
+                db.execute(insert(Job).values(
+                    name=schedule.name,
+                    payload=json.dumps(schedule.payload) if schedule.payload is not None else None,
+                    status="pending",
+                    attempts=0,
+                    max_attempts=(handler and handler.max_attempts) or self.max_attempts,
+                    run_at=utcnow(),
+                    dedup_key=f"{schedule.name}:{slot}",
+                ))
+                db.commit()
+            except IntegrityError:
+                # Задание на этот интервал уже поставил другой воркер
+                db.rollback()
+            finally:
+                db.close()
+
+
+job_runner = JobRunner(
+    concurrency=settings.JOB_CONCURRENCY,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_base=settings.JOB_RETRY_BASE_SECONDS,
+    lock_timeout=settings.JOB_LOCK_TIMEOUT_SECONDS,
+)
+
+
+@job_runner.handler("jobs.purge", max_attempts=1)
+def purge_finished_jobs(payload: dict) -> int:
+    """
+    Периодическое задание: удаляет выполненные и упавшие задания старше
+    JOB_RETENTION_DAYS.
+    """
+    cutoff = utcnow() - timedelta(days=payload.get("days", settings.JOB_RETENTION_DAYS))
+    db = job_runner.session_factory()
+    try:
+        result = db.execute(
+            delete(Job)
+            .where(Job.status.in_(("done", "failed")), Job.updated_at < cutoff)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
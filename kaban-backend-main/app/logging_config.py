@@ -1,7 +1,22 @@
+import asyncio
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
+import random
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import settings
 
 # Создаем директорию для логов если её нет
 LOG_DIR = Path("logs")
@@ -10,24 +25,120 @@ LOG_DIR.mkdir(exist_ok=True)
 # Файл логов
 LOG_FILE = LOG_DIR / "app.log"
 
+# Идентификатор текущего запроса, подставляется во все записи лога
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# request_id записей вне запроса (фоновые задачи, запуск приложения)
+NO_REQUEST_ID = "-"
+
+# Запросы, которые сейчас обрабатываются: задача event loop -> ASGI scope.
+# Contextvars из другого потока не прочитать, поэтому сторожевой поток
+# монитора узнаёт маршрут заблокировавшего цикл запроса отсюда
+active_requests: dict = {}
+
+# Поля, которые можно передать через extra и которые попадут в JSON
+EXTRA_FIELDS = ("method", "path", "route", "status", "duration_ms", "user_id", "client")
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись лога в одну JSON-строку.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id and request_id != NO_REQUEST_ID:
+            data["request_id"] = request_id
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Добавляет request_id и сэмплирует INFO-записи. Работает в потоке,
+    который пишет в лог, поэтому должен оставаться дешёвым.
+    """
+
+    def __init__(self, info_sample_rate: float):
+        super().__init__()
+        self.info_sample_rate = info_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if (
+            record.levelno == logging.INFO
+            and self.info_sample_rate < 1
+            and random.random() >= self.info_sample_rate
+        ):
+            return False
+        record.request_id = request_id_var.get() or NO_REQUEST_ID
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Кладёт запись в очередь, не блокируясь: при переполнении очереди
+    запись отбрасывается. Форматирование (JSON, трейсбек) выполняет
+    фоновый поток.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # msg % args подставляется сразу, как в QueueHandler: аргументы
+        # могут измениться до того, как запись дойдёт до фонового потока.
+        # Отброшенные сэмплированием записи сюда не доходят
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 def setup_logging():
     """
     Настраивает логирование приложения.
-    Логи записываются в файл и выводятся в консоль.
+    Запись в файл и консоль выполняет фоновый QueueListener,
+    запросы только кладут записи в очередь.
     """
+    global _listener, _queue_handler
+
     # Создаем логгер для приложения
     logger = logging.getLogger("kaban")
-    logger.setLevel(logging.INFO)
-    
+    logger.setLevel(settings.LOG_LEVEL)
+
     # Убираем дублирование логов от других библиотек
     logger.propagate = False
-    
+
     # Формат логов
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+
     # Handler для файла с ротацией
     file_handler = RotatingFileHandler(
         LOG_FILE,
@@ -35,21 +146,102 @@ def setup_logging():
         backupCount=5,  # Хранить 5 резервных копий
         encoding='utf-8'
     )
-    file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
-    
+
     # Handler для консоли
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
-    
-    # Добавляем handlers к логгеру
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+
+    # Логгер пишет только в очередь, файл и консоль обслуживает фоновый поток
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter(settings.LOG_INFO_SAMPLE_RATE))
+    logger.addHandler(_queue_handler)
+
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
     return logger
 
-# Создаем глобальный логгер
-logger = setup_logging()
+
+def stop_logging():
+    """
+    Дописывает оставшиеся в очереди записи и останавливает фоновый поток.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    """
+    Поток QueueListener не переживает fork (воркеры gunicorn),
+    поэтому в дочернем процессе создаём новую очередь и новый поток.
+    """
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
 
 
+class RequestLoggingMiddleware:
+    """
+    Присваивает запросу request_id (или берёт из X-Request-ID),
+    возвращает его в ответе и пишет строку лога с кодом ответа и временем.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id") or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        task = asyncio.current_task()
+        active_requests[task] = scope
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            logger.info(
+                "%s %s %s", scope["method"], scope["path"], status_code,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_of(scope),
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                },
+            )
+            active_requests.pop(task, None)
+            request_id_var.reset(token)
+
+
+def route_of(scope) -> str:
+    """
+    Метод и шаблон пути маршрута ("GET /projects/{project_id}"). До
+    маршрутизации и для несуществующих путей используется сам путь.
+    """
+    path = getattr(scope.get("route"), "path", None) or scope["path"]
+    return f"{scope['method']} {path}"
+
+# Создаем глобальный логгер
+logger = setup_logging()
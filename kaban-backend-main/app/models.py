@@ -1,10 +1,37 @@
-from sqlalchemy import Column, BigInteger, String, Text, Integer, Enum, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, BigInteger, String, Text, Integer, SmallInteger, Enum, ForeignKey, TIMESTAMP, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
+from datetime import datetime, timezone
+from typing import Optional
 import enum
 
 
+def utcnow() -> datetime:
+    # Naive UTC: TIMESTAMP columns store whole seconds, keep app-side values identical
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+# Range of MySQL DATETIME; TIMESTAMP would end in 2038
+DATETIME_MIN = datetime(1000, 1, 1)
+DATETIME_MAX = datetime(9999, 12, 31, 23, 59, 59)
+
+
+def as_timestamp(value: Optional[datetime]) -> Optional[datetime]:
+    # Client-supplied datetimes: convert to naive UTC with whole seconds
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        try:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        except OverflowError:
+            raise ValueError("Date is out of range")
+    value = value.replace(microsecond=0)
+    if not DATETIME_MIN <= value <= DATETIME_MAX:
+        raise ValueError(f"Date must be between {DATETIME_MIN.year} and {DATETIME_MAX.year}")
+    return value
+
+
 class PriorityEnum(str, enum.Enum):
     low = "low"
     medium = "medium"
@@ -19,8 +46,8 @@ class User(Base):
     email = Column(String(100), nullable=False, unique=True, index=True)
     password = Column(String(255), nullable=False)
     avatar_url = Column(String(150), default="")
-    created_at = Column(TIMESTAMP, server_default=func.now())
-    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+    updated_at = Column(TIMESTAMP, default=utcnow, server_default=func.now(), onupdate=utcnow)
 
     # Relationships
     owned_teams = relationship("Team", back_populates="owner", foreign_keys="Team.owner_id")
@@ -35,13 +62,15 @@ class Team(Base):
     id = Column(BigInteger, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     owner_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(TIMESTAMP, server_default=func.now())
-    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    shard = Column(String(32))  # шард с данными команды, None - основная база
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+    updated_at = Column(TIMESTAMP, default=utcnow, server_default=func.now(), onupdate=utcnow)
 
     # Relationships
     owner = relationship("User", back_populates="owned_teams", foreign_keys=[owner_id])
     members = relationship("UserToTeam", back_populates="team")
     projects = relationship("Project", back_populates="team")
+    desk_templates = relationship("DeskTemplate", back_populates="team")
 
 
 class UserToTeam(Base):
@@ -49,7 +78,7 @@ class UserToTeam(Base):
 
     user_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
     team_id = Column(BigInteger, ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
-    created_at = Column(TIMESTAMP, server_default=func.now())
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
 
     # Relationships
     user = relationship("User", back_populates="team_memberships")
@@ -62,8 +91,8 @@ class Desk(Base):
     id = Column(BigInteger, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     owner_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(TIMESTAMP, server_default=func.now())
-    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+    updated_at = Column(TIMESTAMP, default=utcnow, server_default=func.now(), onupdate=utcnow)
 
     # Relationships
     owner = relationship("User", back_populates="owned_desks", foreign_keys=[owner_id])
@@ -80,8 +109,8 @@ class Project(Base):
     team_id = Column(BigInteger, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False, index=True)
     desk_id = Column(BigInteger, ForeignKey("desk.id", ondelete="CASCADE"), nullable=False)
     owner_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
-    created_at = Column(TIMESTAMP, server_default=func.now())
-    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+    updated_at = Column(TIMESTAMP, default=utcnow, server_default=func.now(), onupdate=utcnow)
 
     # Relationships
     team = relationship("Team", back_populates="projects")
@@ -96,13 +125,17 @@ class Section(Base):
     desk_id = Column(BigInteger, ForeignKey("desk.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(255), nullable=False)
     order = Column(Integer, nullable=False)
-    created_at = Column(TIMESTAMP, server_default=func.now())
-    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    archive_after_days = Column(Integer)  # None/0 - не архивировать
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+    updated_at = Column(TIMESTAMP, default=utcnow, server_default=func.now(), onupdate=utcnow)
 
     # Relationships
     desk = relationship("Desk", back_populates="sections")
     tickets = relationship("Ticket", back_populates="section")
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class Ticket(Base):
     __tablename__ = "ticket"
@@ -113,12 +146,212 @@ class Ticket(Base):
     priority = Column(Enum(PriorityEnum), nullable=False, default=PriorityEnum.medium)
     complexity = Column(Integer, nullable=False, default=1)
     section_id = Column(BigInteger, ForeignKey("section.id", ondelete="CASCADE"), nullable=False, index=True)
-    created_at = Column(TIMESTAMP, server_default=func.now())
-    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    due_at = Column(DateTime, nullable=True)
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")  # = COUNT(ticket_comment)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+    updated_at = Column(TIMESTAMP, default=utcnow, server_default=func.now(), onupdate=utcnow)
 
     # Relationships
     section = relationship("Section", back_populates="tickets")
 
+    __table_args__ = (
+        Index("idx_ticket_section_updated", "section_id", "updated_at"),
+        Index("idx_ticket_section_due", "section_id", "due_at"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+
+class TicketAssignee(Base):
+    """
+    Исполнители задачи. project_id повторяет проект задачи, чтобы список
+    задач пользователя не проходил через колонки и доски, а priority_rank и
+    ticket_updated_at - ключи сортировки этого списка: с ними страница
+    читается по индексу без сортировки всех назначений пользователя.
+    Ключи обновляются вместе с задачей (app.assignments.sync_sort_keys).
+    """
+    __tablename__ = "ticket_assignee"
+
+    ticket_id = Column(BigInteger, ForeignKey("ticket.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(BigInteger, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    priority_rank = Column(SmallInteger, nullable=False)
+    ticket_updated_at = Column(TIMESTAMP, nullable=False)
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_ticket_assignee_user_rank", "user_id", "priority_rank", "ticket_id", "project_id"),
+        Index("idx_ticket_assignee_user_updated", "user_id", "ticket_updated_at", "ticket_id", "project_id"),
+    )
+
+
+class TicketComment(Base):
+    """
+    Комментарий к задаче. Внешнего ключа на ticket нет: при архивации
+    задача переезжает в ticket_archive с тем же id, а обсуждение остаётся.
+    """
+    __tablename__ = "ticket_comment"
+
+    id = Column(BigInteger, primary_key=True, index=True)
+    ticket_id = Column(BigInteger, nullable=False)
+    user_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_ticket_comment_ticket", "ticket_id", "id"),
+    )
+
+
+class TicketArchive(Base):
+    """
+    Холодное хранилище задач: строки переносятся сюда из ticket
+    фоновой архивацией и сохраняют исходный id.
+    """
+    __tablename__ = "ticket_archive"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    name = Column(String(50), nullable=False)
+    task = Column(Text, nullable=False)
+    priority = Column(Enum(PriorityEnum), nullable=False)
+    complexity = Column(Integer, nullable=False)
+    section_id = Column(BigInteger, ForeignKey("section.id", ondelete="CASCADE"), nullable=False)
+    due_at = Column(DateTime, nullable=True)
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    version = Column(Integer, nullable=False)
+    created_at = Column(TIMESTAMP)
+    updated_at = Column(TIMESTAMP)
+    archived_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_ticket_archive_section", "section_id", "id"),
+    )
+
+
+class TicketArchiveAssignee(Base):
+    """
+    Исполнители архивных задач: переносятся из ticket_assignee вместе
+    с задачей.
+    """
+    __tablename__ = "ticket_archive_assignee"
+
+    ticket_id = Column(BigInteger, ForeignKey("ticket_archive.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(BigInteger, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(TIMESTAMP)
+
+
+class DeskTemplate(Base):
+    __tablename__ = "desk_template"
 
+    id = Column(BigInteger, primary_key=True, index=True)
+    team_id = Column(BigInteger, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+    updated_at = Column(TIMESTAMP, default=utcnow, server_default=func.now(), onupdate=utcnow)
+
+    # Relationships
+    team = relationship("Team", back_populates="desk_templates")
+    sections = relationship("DeskTemplateSection", back_populates="template", order_by="DeskTemplateSection.order")
+
+
+class DeskTemplateSection(Base):
+    __tablename__ = "desk_template_section"
+
+    id = Column(BigInteger, primary_key=True, index=True)
+    template_id = Column(BigInteger, ForeignKey("desk_template.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    order = Column(Integer, nullable=False)
+
+    # Relationships
+    template = relationship("DeskTemplate", back_populates="sections")
 
 
+class Activity(Base):
+    __tablename__ = "activity"
+
+    id = Column(BigInteger, primary_key=True, index=True)
+    project_id = Column(BigInteger, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    entity_type = Column(String(20), nullable=False)
+    entity_id = Column(BigInteger, nullable=False)
+    action = Column(String(20), nullable=False)
+    changes = Column(Text)
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_activity_project", "project_id", "id"),
+    )
+
+
+class ImportJob(Base):
+    __tablename__ = "import_job"
+
+    id = Column(BigInteger, primary_key=True, index=True)
+    project_id = Column(BigInteger, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    format = Column(String(10), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    rows_processed = Column(Integer, nullable=False, default=0)
+    tickets_created = Column(Integer, nullable=False, default=0)
+    sections_created = Column(Integer, nullable=False, default=0)
+    errors = Column(Text)  # JSON-список ошибок по строкам
+    error = Column(String(255))
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+    updated_at = Column(TIMESTAMP, default=utcnow, server_default=func.now(), onupdate=utcnow)
+
+
+class Job(Base):
+    """
+    Фоновое задание. Строка создаётся в транзакции вызывающего кода,
+    поэтому задание не теряется при перезапуске воркера.
+    """
+    __tablename__ = "job"
+
+    id = Column(BigInteger, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    payload = Column(Text)  # JSON
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(TIMESTAMP, nullable=False, default=utcnow)
+    dedup_key = Column(String(150), unique=True)  # для периодических заданий
+    locked_by = Column(String(100))
+    locked_at = Column(TIMESTAMP)
+    last_error = Column(Text)
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+    updated_at = Column(TIMESTAMP, default=utcnow, server_default=func.now(), onupdate=utcnow)
+
+    __table_args__ = (
+        Index("idx_job_status_run_at", "status", "run_at"),
+    )
+
+
+class RefreshToken(Base):
+    """
+    Выданный refresh-токен. Токены одного входа образуют семейство:
+    повторное использование уже обменянного токена отзывает всё семейство.
+    """
+    __tablename__ = "refresh_token"
+
+    id = Column(BigInteger, primary_key=True, index=True)
+    jti = Column(String(32), nullable=False, unique=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    user_id = Column(BigInteger, ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at = Column(TIMESTAMP, nullable=False)
+    used_at = Column(TIMESTAMP)
+    revoked_at = Column(TIMESTAMP, index=True)
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
+
+
+class ProjectShard(Base):
+    """
+    Каталог проектов в основной базе: на каком шарде лежат данные проекта.
+    Он же выдаёт id новым проектам, чтобы они не пересекались между шардами.
+    """
+    __tablename__ = "project_shard"
+
+    project_id = Column(BigInteger, primary_key=True)
+    team_id = Column(BigInteger, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False, index=True)
+    shard = Column(String(32), nullable=False)
+    created_at = Column(TIMESTAMP, default=utcnow, server_default=func.now())
@@ -0,0 +1,211 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+from app.logging_config import logger, active_requests, route_of
+
+# Корень проекта: по нему в стеке ищется код приложения
+APP_ROOT = Path(__file__).resolve().parent.parent
+
+
+class LoopLagMonitor:
+    """
+    Непрерывно измеряет задержку event loop: фоновая задача засыпает на
+    фиксированный интервал и смотрит, насколько позже она проснулась.
+    """
+
+    def __init__(self, interval: float, smoothing: float = 0.2):
+        self.interval = interval
+        self.smoothing = smoothing
+        self.lag = 0.0
+        self.smoothed_lag = 0.0
+        self.max_lag = 0.0
+        self.heartbeat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self.heartbeat = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def observe(self, lag: float):
+        self.lag = lag
+        self.smoothed_lag += self.smoothing * (lag - self.smoothed_lag)
+        self.max_lag = max(self.max_lag, lag)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.heartbeat = time.monotonic()
+            self.observe(max(0.0, loop.time() - started - self.interval))
+
+
+class BlockingCallDetector:
+    """
+    Сторожевой поток: если event loop не отвечает дольше порога, снимает
+    стек потока цикла и находит место в коде приложения, которое его
+    заблокировало (синхронный SQLAlchemy, bcrypt, smtplib и т.п. внутри
+    async def), и маршрут запроса, в котором это произошло. Полный стек
+    пишется только в лог.
+    """
+
+    def __init__(self, monitor: LoopLagMonitor, threshold: float, history: int):
+        self.monitor = monitor
+        self.threshold = threshold
+        self.blocking_count = 0
+        self.events = deque(maxlen=history)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """
+        Вызывается из потока event loop.
+        """
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="kaban-blocking-detector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self):
+        reported_heartbeat = None
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self.monitor.heartbeat
+            stalled = time.monotonic() - heartbeat - self.monitor.interval
+            if stalled > self.threshold and heartbeat != reported_heartbeat:
+                reported_heartbeat = heartbeat
+                self._report(stalled)
+
+    def _report(self, stalled: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+        location = _find_location(frame)
+        route = self._current_route()
+        self.blocking_count += 1
+        self.events.append({
+            "detected_at": time.time(),
+            "blocked_ms": round(stalled * 1000),
+            "location": location,
+            "route": route,
+            "stack": stack,
+        })
+        logger.warning(
+            "Event loop blocked for %.0f ms in %s (%s)\n%s",
+            stalled * 1000, location or "unknown location", route or "outside a request", stack,
+            extra={"route": route},
+        )
+
+    def _current_route(self) -> Optional[str]:
+        # Задача, которую сейчас выполняет цикл. Для задач, порождённых
+        # запросом (фоновые задачи, create_task), маршрут неизвестен
+        task = asyncio.current_task(self._loop)
+        scope = active_requests.get(task) if task is not None else None
+        return route_of(scope) if scope is not None else None
+
+
+def _find_location(frame) -> Optional[str]:
+    # Ближайший к месту блокировки кадр из кода приложения. Кадры чужого
+    # потока читаются только через f_code и f_lineno, без f_locals
+    while frame is not None:
+        path = Path(frame.f_code.co_filename)
+        if "site-packages" not in path.parts and APP_ROOT in path.parents:
+            return f"{path.relative_to(APP_ROOT).as_posix()}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class PoolWaitTracker:
+    """
+    Сглаженное время ожидания соединения из пула БД. Старые замеры
+    перестают учитываться, чтобы сброс нагрузки не длился бесконечно,
+    когда новые запросы до БД просто не доходят.
+    """
+
+    def __init__(self, smoothing: float = 0.2, stale_after: float = 5.0):
+        self.smoothing = smoothing
+        self.stale_after = stale_after
+        self.last_wait = 0.0
+        self.smoothed_wait = 0.0
+        self.max_wait = 0.0
+        self.observed_at = 0.0
+
+    def observe(self, wait: float):
+        self.last_wait = wait
+        self.smoothed_wait += self.smoothing * (wait - self.smoothed_wait)
+        self.max_wait = max(self.max_wait, wait)
+        self.observed_at = time.monotonic()
+
+    def current(self) -> float:
+        if time.monotonic() - self.observed_at > self.stale_after:
+            return 0.0
+        return self.smoothed_wait
+
+
+loop_monitor = LoopLagMonitor(interval=settings.LOOP_LAG_INTERVAL_MS / 1000)
+pool_wait = PoolWaitTracker()
+blocking_detector = BlockingCallDetector(
+    loop_monitor,
+    threshold=settings.BLOCKING_CALL_THRESHOLD_MS / 1000,
+    history=settings.BLOCKING_CALL_HISTORY,
+)
+
+
+def measure_checkout(db):
+    """
+    Берёт соединение для сессии сразу и запоминает, сколько ждали пул.
+    """
+    started = time.perf_counter()
+    db.connection()
+    pool_wait.observe(time.perf_counter() - started)
+
+
+def metrics_snapshot() -> dict:
+    return {
+        "event_loop": {
+            "lag_ms": round(loop_monitor.lag * 1000, 2),
+            "smoothed_lag_ms": round(loop_monitor.smoothed_lag * 1000, 2),
+            "max_lag_ms": round(loop_monitor.max_lag * 1000, 2),
+        },
+        "db_pool": {
+            "last_wait_ms": round(pool_wait.last_wait * 1000, 2),
+            "smoothed_wait_ms": round(pool_wait.smoothed_wait * 1000, 2),
+            "max_wait_ms": round(pool_wait.max_wait * 1000, 2),
+        },
+        "blocking_calls": {
+            "count": blocking_detector.blocking_count,
+            # Стеки остаются в логе и в ответ не попадают
+            "recent": [
+                {key: value for key, value in event.items() if key != "stack"}
+                for event in blocking_detector.events
+            ],
+        },
+    }
@@ -0,0 +1,185 @@
+import contextvars
+from datetime import date, datetime, time, timedelta
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Выставляется middleware по заголовку Accept и читается классом ответа
+_wants_msgpack: contextvars.ContextVar[bool] = contextvars.ContextVar("wants_msgpack", default=False)
+
+
+def msgpack_requested() -> bool:
+    return _wants_msgpack.get()
+
+
+def accepts_msgpack(accept: Optional[str]) -> bool:
+    """
+    MessagePack выбирается, если он указан в Accept с q > 0 и JSON
+    (application/json, application/* или */*) не предпочтён ему с большим q.
+    """
+    if not accept:
+        return False
+    qualities = _media_ranges(accept)
+    msgpack_q = max((qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES), default=0.0)
+    json_q = next(
+        (qualities[media_range] for media_range in ("application/json", "application/*", "*/*") if media_range in qualities),
+        0.0,
+    )
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def _media_ranges(accept: str) -> Dict[str, float]:
+    qualities: Dict[str, float] = {}
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        qualities[media_type.lower()] = q
+    return qualities
+
+
+def _media_type(content_type: Optional[str]) -> str:
+    return content_type.split(";", 1)[0].strip().lower() if content_type else ""
+
+
+def is_msgpack(content_type: Optional[str]) -> bool:
+    return _media_type(content_type) in MSGPACK_MEDIA_TYPES
+
+
+def is_json(content_type: Optional[str]) -> bool:
+    return _media_type(content_type) == "application/json"
+
+
+def encode_default(value: Any) -> Any:
+    """
+    Типы, которых нет в MessagePack, кодируются так же, как в JSON-ответах:
+    даты - строками ISO 8601, перечисления - значением.
+    """
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=encode_default, use_bin_type=True)
+
+
+def unpackb(body: bytes) -> Any:
+    return msgpack.unpackb(body, raw=False)
+
+
+class NegotiatedResponse(JSONResponse):
+    """
+    Ответ по умолчанию для всего API: JSON, а если клиент прислал
+    Accept: application/msgpack - то же содержимое в MessagePack.
+    """
+
+    def __init__(self, content: Any, status_code: int = 200, headers=None, media_type=None, background=None):
+        self.msgpack = msgpack_requested()
+        if self.msgpack:
+            media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, status_code, headers, media_type, background)
+        self.headers.add_vary_header("Accept")
+
+    def render(self, content: Any) -> bytes:
+        if self.msgpack:
+            return packb(content)
+        return super().render(content)
+
+
+class ContentNegotiationMiddleware:
+    """
+    Запоминает на время запроса, просил ли клиент MessagePack.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _wants_msgpack.set(accepts_msgpack(Headers(scope=scope).get("accept")))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _wants_msgpack.reset(token)
+
+
+class MsgPackRoute(APIRoute):
+    """
+    Маршрут, принимающий тело запроса в MessagePack наравне с JSON.
+    Декодированное тело подставляется FastAPI как уже разобранный JSON.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if is_msgpack(request.headers.get("content-type")):
+                request = await _as_json_request(request)
+            return await handler(request)
+
+        return route_handler
+
+
+async def _as_json_request(request: Request) -> Request:
+    body = await request.body()
+    try:
+        data = unpackb(body) if body else None
+    except (ValueError, msgpack.UnpackException):
+        raise RequestValidationError([{
+            "type": "msgpack_invalid",
+            "loc": ("body",),
+            "msg": "Invalid MessagePack body",
+            "input": {},
+        }])
+
+    scope = dict(request.scope)
+    scope["headers"] = [
+        (key, value) for key, value in request.scope["headers"] if key != b"content-type"
+    ] + [(b"content-type", b"application/json")]
+    decoded = Request(scope, request.receive)
+    decoded._body = body
+    decoded._json = data
+    return decoded
+
+
+async def http_exception_handler(request: Request, exc: HTTPException) -> Response:
+    headers = getattr(exc, "headers", None)
+    if exc.status_code in (204, 304):
+        return Response(status_code=exc.status_code, headers=headers)
+    return NegotiatedResponse({"detail": exc.detail}, status_code=exc.status_code, headers=headers)
+
+
+async def request_validation_exception_handler(request: Request, exc: RequestValidationError) -> Response:
+    return NegotiatedResponse({"detail": jsonable_encoder(exc.errors())}, status_code=422)
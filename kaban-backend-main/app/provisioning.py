@@ -0,0 +1,136 @@
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models import Desk, Project, Section, Ticket, utcnow
+from app.schemas import ProjectResponse
+from app.sharding import is_sharded, register_project
+
+DEFAULT_SECTIONS: List[Tuple[str, int]] = [
+    ("To Do", 1),
+    ("In Progress", 2),
+    ("Done", 3),
+]
+
+
+def provision_project(
+    db: Session,
+    *,
+    name: str,
+    description: Optional[str],
+    team_id: int,
+    owner_id: int,
+    sections: Sequence[Tuple[str, int]] = DEFAULT_SECTIONS,
+) -> ProjectResponse:
+    """
+    Создаёт доску, её колонки и проект тремя INSERT-запросами:
+    все колонки вставляются одним многострочным INSERT.
+    Время создания считается на стороне приложения, поэтому
+    перечитывать строки после вставки не нужно.
+    """
+    now = utcnow()
+    desk_id = _insert_desk(db, name, owner_id, now)
+
+    if sections:
+        db.execute(insert(Section).values([
+            {
+                "desk_id": desk_id,
+                "name": section_name,
+                "order": order,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for section_name, order in sections
+        ]))
+
+    return _insert_project(db, name, description, team_id, desk_id, owner_id, now)
+
+
+def clone_project(
+    db: Session,
+    source: Project,
+    *,
+    name: str,
+    description: Optional[str],
+    owner_id: int,
+) -> ProjectResponse:
+    """
+    Копирует проект вместе с колонками и задачами через INSERT ... SELECT,
+    не загружая задачи в память.
+    """
+    now = utcnow()
+    desk_id = _insert_desk(db, name, owner_id, now)
+
+    old_section_ids = db.execute(
+        select(Section.id).where(Section.desk_id == source.desk_id).order_by(Section.id)
+    ).scalars().all()
+
+    if old_section_ids:
+        # Новые id выдаются в том же порядке, в котором идут исходные колонки
+        db.execute(insert(Section).from_select(
+            ["desk_id", "name", "order", "archive_after_days", "created_at", "updated_at"],
+            select(
+                literal(desk_id), Section.name, Section.order, Section.archive_after_days,
+                literal(now), literal(now)
+            ).where(Section.desk_id == source.desk_id).order_by(Section.id)
+        ))
+        new_section_ids = db.execute(
+            select(Section.id).where(Section.desk_id == desk_id).order_by(Section.id)
+        ).scalars().all()
+
+        section_map = dict(zip(old_section_ids, new_section_ids))
+        db.execute(insert(Ticket).from_select(
+            ["name", "task", "priority", "complexity", "section_id", "due_at", "created_at", "updated_at"],
+            select(
+                Ticket.name,
+                Ticket.task,
+                Ticket.priority,
+                Ticket.complexity,
+                case(section_map, value=Ticket.section_id),
+                Ticket.due_at,
+                literal(now),
+                literal(now),
+            ).where(Ticket.section_id.in_(old_section_ids)).order_by(Ticket.id)
+        ))
+
+    return _insert_project(db, name, description, source.team_id, desk_id, owner_id, now)
+
+
+def _insert_desk(db: Session, name: str, owner_id: int, now) -> int:
+    result = db.execute(insert(Desk).values(
+        name=f"{name} Board",
+        owner_id=owner_id,
+        created_at=now,
+        updated_at=now,
+    ))
+    return result.inserted_primary_key[0]
+
+
+def _insert_project(db: Session, name, description, team_id, desk_id, owner_id, now) -> ProjectResponse:
+    values = dict(
+        name=name,
+        description=description,
+        team_id=team_id,
+        desk_id=desk_id,
+        owner_id=owner_id,
+        created_at=now,
+        updated_at=now,
+    )
+    # С шардами id выдаёт каталог проектов, иначе - автоинкремент таблицы
+    if is_sharded(db):
+        values["id"] = register_project(db, team_id)
+    project_id = db.execute(insert(Project).values(**values)).inserted_primary_key[0]
+    if not is_sharded(db):
+        register_project(db, team_id, project_id)
+
+    return ProjectResponse(
+        id=project_id,
+        name=name,
+        description=description,
+        team_id=team_id,
+        desk_id=desk_id,
+        owner_id=owner_id,
+        created_at=now,
+        updated_at=now,
+    )
@@ -0,0 +1,178 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+
+from app.auth import verify_token
+from app.config import settings
+from app.monitoring import loop_monitor, pool_wait
+from app.negotiation import NegotiatedResponse
+from app.schemas import TokenData
+
+
+@dataclass
+class TokenBucket:
+    tokens: float
+    updated_at: float
+
+
+class RateLimitBackend(ABC):
+    """
+    Хранилище токен-бакетов. Для нескольких воркеров/инстансов можно
+    подставить общую реализацию (например, на Redis) с тем же методом take.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, capacity: int, cost: int = 1) -> float:
+        """
+        Списывает cost токенов (не больше capacity). Возвращает 0, если
+        запрос разрешён, иначе - через сколько секунд токенов хватит.
+        """
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, capacity: int, cost: int = 1) -> float:
+        cost = min(cost, capacity)
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(tokens=capacity, updated_at=now)
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated_at) * rate)
+            bucket.updated_at = now
+            self._buckets.move_to_end(key)
+
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            return 0.0
+        return (cost - bucket.tokens) / rate
+
+    def clear(self):
+        self._buckets.clear()
+
+
+rate_limit_backend = InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+def user_rule(user_id: int) -> Tuple[str, float, int]:
+    return f"user:{user_id}", settings.RATE_LIMIT_USER_PER_SECOND, settings.RATE_LIMIT_USER_BURST
+
+
+async def charge_user(user_id: int, cost: int, backend: RateLimitBackend = rate_limit_backend):
+    """
+    Дополнительно списывает cost токенов пользователя, например за
+    подзапросы POST /batch. Без токенов - 429 с Retry-After.
+    """
+    if cost <= 0 or not settings.RATE_LIMIT_ENABLED:
+        return
+    retry_after = await backend.take(*user_rule(user_id), cost=cost)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+class RateLimitMiddleware:
+    """
+    Ограничивает частоту запросов: /auth/* - по IP, остальное - по id
+    пользователя из JWT (без токена - тоже по IP). Проверенный токен
+    сохраняется в request.state.token_data, чтобы get_current_user не
+    проверял его второй раз.
+    """
+
+    def __init__(self, app, backend: RateLimitBackend = rate_limit_backend):
+        self.app = app
+        self.backend = backend
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        key, rate, capacity = self._rule(scope)
+        retry_after = await self.backend.take(key, rate, capacity)
+        if retry_after > 0:
+            response = NegotiatedResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    def _rule(self, scope) -> Tuple[str, float, int]:
+        client = scope.get("client")
+        ip = client[0] if client else ""
+        if scope["path"].startswith("/auth/"):
+            return (
+                f"auth:{ip}",
+                settings.RATE_LIMIT_AUTH_PER_MINUTE / 60,
+                settings.RATE_LIMIT_AUTH_BURST,
+            )
+
+        token_data = _token_data(Headers(scope=scope).get("authorization"))
+        if token_data is None:
+            return f"ip:{ip}", settings.RATE_LIMIT_USER_PER_SECOND, settings.RATE_LIMIT_USER_BURST
+        scope.setdefault("state", {})["token_data"] = token_data
+        return user_rule(token_data.user_id)
+
+
+def _token_data(authorization: Optional[str]) -> Optional[TokenData]:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return verify_token(authorization[7:], "access")
+    except HTTPException:
+        return None
+
+
+class LoadSheddingMiddleware:
+    """
+    Отбрасывает запросы с 503, пока сглаженная задержка event loop или
+    ожидание пула соединений БД превышают пороги.
+    """
+
+    EXEMPT_PATHS = ("/health", "/metrics")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.LOAD_SHED_ENABLED
+            or scope["path"] in self.EXEMPT_PATHS
+            or not overloaded()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        response = NegotiatedResponse(
+            status_code=503,
+            content={"detail": "Server is overloaded, try again later"},
+            headers={"Retry-After": str(settings.LOAD_SHED_RETRY_AFTER_SECONDS)},
+        )
+        await response(scope, receive, send)
+
+
+def overloaded() -> bool:
+    return (
+        loop_monitor.smoothed_lag * 1000 > settings.LOAD_SHED_LOOP_LAG_MS
+        or pool_wait.current() * 1000 > settings.LOAD_SHED_POOL_WAIT_MS
+    )
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.database import SessionLocal
+from app.logging_config import logger
+from app.models import RefreshToken, utcnow
+
+
+class BloomFilter:
+    """
+    Битовый массив с k хешами: отвечает «точно нет» или «возможно да».
+    """
+
+    def __init__(self, size_bits: int, hashes: int):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self._bits = bytearray((size_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """
+    Список отозванных семейств refresh-токенов для проверки access-токенов.
+
+    Почти все проверки заканчиваются в фильтре Блума без обращения к БД.
+    При срабатывании фильтра ответ берётся из TTL-кэша, а при промахе
+    кэша - из БД. Отзывы, сделанные другими воркерами, подтягиваются
+    фоновой синхронизацией раз в sync_interval секунд. Фильтр хранит только
+    отзывы за время жизни access-токена и периодически пересобирается.
+
+    Синхронизация идёт в отдельном потоке, поэтому кэш и запись в фильтр
+    защищены блокировкой; обращение к БД при промахе кэша выполняется
+    в пуле потоков, а не в цикле событий.
+    """
+
+    def __init__(
+        self,
+        size_bits: int,
+        hashes: int,
+        cache_size: int,
+        cache_ttl: float,
+        sync_interval: float,
+        window: timedelta,
+        session_factory=SessionLocal,
+    ):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.sync_interval = sync_interval
+        self.window = window
+        self.session_factory = session_factory
+        self.db_lookups = 0
+        self._bloom = BloomFilter(size_bits, hashes)
+        self._cache: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+        self._built_at: Optional[datetime] = None
+        self._synced_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    def revoke(self, family_id: str):
+        with self._lock:
+            self._bloom.add(family_id)
+            self._remember(family_id, True)
+
+    async def is_revoked(self, family_id: str, lookup: Callable[[str], bool]) -> bool:
+        if family_id not in self._bloom:
+            return False
+
+        with self._lock:
+            cached = self._cache.get(family_id)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+            self.db_lookups += 1
+
+        revoked = await asyncio.to_thread(lookup, family_id)
+        with self._lock:
+            self._remember(family_id, revoked)
+        return revoked
+
+    def clear(self):
+        with self._lock:
+            self._bloom = BloomFilter(self.size_bits, self.hashes)
+            self._cache.clear()
+            self._built_at = None
+            self._synced_at = None
+
+    def sync(self):
+        """
+        Подтягивает отзывы из БД. Раз в окно фильтр собирается заново,
+        чтобы в нём не копились семейства с давно истёкшими access-токенами.
+        """
+        now = utcnow()
+        rebuild = self._built_at is None or now - self._built_at >= self.window
+        since = now - self.window if rebuild else self._synced_at - timedelta(seconds=1)
+
+        db = self.session_factory()
+        try:
+            families = db.execute(
+                select(RefreshToken.family_id).where(RefreshToken.revoked_at >= since).distinct()
+            ).scalars().all()
+        finally:
+            db.close()
+
+        with self._lock:
+            if rebuild:
+                bloom = BloomFilter(self.size_bits, self.hashes)
+                # Отзывы этого воркера, сделанные после запроса к БД
+                recent = [family_id for family_id, (revoked, _) in self._cache.items() if revoked]
+                self._add_all(bloom, [*families, *recent])
+                self._bloom = bloom
+                self._built_at = now
+            else:
+                self._add_all(self._bloom, families)
+            self._synced_at = now
+
+    def _add_all(self, bloom: BloomFilter, families: Iterable[str]):
+        for family_id in families:
+            bloom.add(family_id)
+            self._remember(family_id, True)
+
+    def _remember(self, family_id: str, revoked: bool):
+        # Вызывается под self._lock
+        self._cache[family_id] = (revoked, time.monotonic() + self.cache_ttl)
+        self._cache.move_to_end(family_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def start(self):
+        if self._task is None:
+            # Первая загрузка - при старте воркера, до приёма запросов
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error("Failed to load token revocations: %s", e, exc_info=True)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                logger.error("Failed to sync token revocations: %s", e, exc_info=True)
+
+
+revocation_list = RevocationList(
+    size_bits=settings.REVOCATION_BLOOM_BITS,
+    hashes=settings.REVOCATION_BLOOM_HASHES,
+    cache_size=settings.REVOCATION_CACHE_SIZE,
+    cache_ttl=settings.REVOCATION_CACHE_TTL_SECONDS,
+    sync_interval=settings.REVOCATION_SYNC_SECONDS,
+    window=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+)
@@ -1,18 +1,16 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.database import get_db
 from app.models import User
 from app.schemas import UserRegister, UserLogin, Token, RefreshTokenRequest
 from app.auth import (
-    verify_password,
+    oauth2_scheme,
+    verify_and_update_password,
     get_password_hash,
-    create_access_token,
-    create_refresh_token,
-    verify_token,
-    get_current_user
+    verify_token
 )
-from app.config import settings
+from app.tokens import issue_tokens, rotate_refresh_token, revoke_family
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -28,7 +26,8 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Hashing is deliberately slow, keep it off the event loop
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -36,38 +35,34 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         avatar_url=""
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-
-    # Create tokens
-    access_token = create_access_token(data={"sub": new_user.id})
-    refresh_token = create_refresh_token(data={"sub": new_user.id})
+    db.flush()
 
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer"
-    }
+    # Create tokens, the refresh token is stored in the same transaction
+    tokens = issue_tokens(db, new_user.id)
+    db.commit()
+    return tokens
 
 
 @router.post("/login", response_model=Token)
 async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == user_data.email).first()
-    if not user or not verify_password(user_data.password, user.password):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await run_in_threadpool(verify_and_update_password, user_data.password, user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user.id})
-    refresh_token = create_refresh_token(data={"sub": user.id})
+    # Transparently upgrade hashes made with an old scheme or cost
+    if new_hash:
+        user.password = new_hash
 
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer"
-    }
+    tokens = issue_tokens(db, user.id)
+    db.commit()
+    return tokens
 
 
 @router.post("/refresh", response_model=Token)
@@ -81,12 +76,16 @@ async def refresh_token(token_request: RefreshTokenRequest, db: Session = Depend
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user.id})
-    new_refresh_token = create_refresh_token(data={"sub": user.id})
+    # Rotate: the presented token is single-use, reuse revokes the family
+    tokens = rotate_refresh_token(db, token_data)
+    db.commit()
+    return tokens
+
 
-    return {
-        "access_token": access_token,
-        "refresh_token": new_refresh_token,
-        "token_type": "bearer"
-    }
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    token_data = verify_token(token, "access")
+    if token_data.family_id:
+        revoke_family(db, token_data.family_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models import User
+from app.schemas import BatchRequest, BatchResponse
+from app.auth import get_current_user
+from app.batch import BatchExecutor, multiplexed_response
+from app.config import settings
+from app.negotiation import MsgPackRoute
+from app.ratelimit import charge_user
+
+router = APIRouter(prefix="/batch", tags=["batch"], route_class=MsgPackRoute)
+
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    request: Request,
+    batch_data: BatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if len(batch_data.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can contain at most {settings.BATCH_MAX_REQUESTS} requests"
+        )
+
+    # One token per sub-request; the middleware has already charged the first
+    await charge_user(current_user.id, len(batch_data.requests) - 1)
+
+    # Sub-requests share this request's user; writes also share its DB session
+    results = await BatchExecutor(request, current_user, db).run(batch_data.requests)
+    return multiplexed_response(results)
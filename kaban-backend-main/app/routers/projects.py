@@ -1,20 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from datetime import date
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
-from app.models import User, Project, Team, Desk, Section, Ticket, UserToTeam
+from app.models import User, Project, Team, Desk, Section, UserToTeam, DeskTemplate, DeskTemplateSection, Activity, TicketArchive, ImportJob
 from app.schemas import (
     ProjectCreate,
-    ProjectUpdate,
     ProjectResponse,
+    ProjectClone,
     ProjectInvite,
     BoardResponse,
     BoardSection,
-    TicketResponse
+    TicketResponse,
+    ActivityResponse,
+    ActivityPage,
+    ArchivedTicketResponse,
+    ArchivePage,
+    ImportJobResponse,
+    CalendarResponse
 )
 from app.auth import get_current_user
+from app.provisioning import DEFAULT_SECTIONS, provision_project, clone_project
+from app.activity import activity_log
+from app.export import export_response, project_tickets_query
+from app.importer import ImportFailed, TicketImporter
+from app.board import board_tickets, compact_board_response, wants_compact
+from app.fields import FIELDS_MAX_LENGTH, parse_fields, shape_board, shape_projects
+from app.negotiation import NegotiatedResponse
+from app.sharding import fan_out, route_to_shard, use_team_shard
+from app.calendar_view import calendar_days, calendar_zone, day_range, project_due_tickets
 
-router = APIRouter(prefix="/projects", tags=["projects"])
+router = APIRouter(prefix="/projects", tags=["projects"], dependencies=[Depends(route_to_shard)])
 
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
@@ -46,51 +64,85 @@ async def create_project(
             detail="You are not a member of this team"
         )
 
-    # Create desk for the project
-    desk = Desk(name=f"{project_data.name} Board", owner_id=current_user.id)
-    db.add(desk)
-    db.flush()
-
-    # Create default sections
-    default_sections = [
-        Section(desk_id=desk.id, name="To Do", order=1),
-        Section(desk_id=desk.id, name="In Progress", order=2),
-        Section(desk_id=desk.id, name="Done", order=3)
-    ]
-    db.add_all(default_sections)
-
-    # Create project
-    project = Project(
+    # Sections come from the team's desk template or the default set
+    sections = DEFAULT_SECTIONS
+    if project_data.template_id is not None:
+        template_sections = db.query(DeskTemplateSection.name, DeskTemplateSection.order).join(
+            DeskTemplate
+        ).filter(
+            DeskTemplate.id == project_data.template_id,
+            DeskTemplate.team_id == project_data.team_id
+        ).order_by(DeskTemplateSection.order).all()
+
+        if not template_sections:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Template not found"
+            )
+        sections = [(row.name, row.order) for row in template_sections]
+
+    # Create desk, sections and project on the team's shard
+    use_team_shard(db, team)
+    project = provision_project(
+        db,
         name=project_data.name,
         description=project_data.description,
         team_id=project_data.team_id,
-        desk_id=desk.id,
-        owner_id=current_user.id
+        owner_id=current_user.id,
+        sections=sections
     )
-    db.add(project)
     db.commit()
-    db.refresh(project)
+
+    activity_log.record(
+        project_id=project.id,
+        user_id=current_user.id,
+        entity_type="project",
+        entity_id=project.id,
+        action="created",
+        changes={"name": project.name, "template_id": project_data.template_id}
+    )
 
     return project
 
 
 @router.get("", response_model=List[ProjectResponse])
 async def list_projects(
+    fields: Optional[str] = Query(None, max_length=FIELDS_MAX_LENGTH),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Get projects where user is owner or team member
-    projects = db.query(Project).join(Team).join(UserToTeam, Team.id == UserToTeam.team_id).filter(
-        (Project.owner_id == current_user.id) |
-        (UserToTeam.user_id == current_user.id)
-    ).distinct().all()
+    selected = parse_fields(fields) if fields is not None else None
+
+    # Teams live in the main database, projects on the teams' shards
+    team_ids = [
+        team_id for (team_id,) in
+        db.query(UserToTeam.team_id).filter(UserToTeam.user_id == current_user.id).distinct()
+    ]
 
-    return projects
+    # Get projects where user is owner or team member, on every shard
+    def shard_projects(shard_db: Session):
+        projects = shard_db.query(Project).filter(
+            (Project.owner_id == current_user.id) |
+            (Project.team_id.in_(team_ids))
+        ).order_by(Project.id).all()
+        # Client-selected shape with batched relation loading
+        if selected is not None:
+            return [(project.id, row) for project, row in zip(projects, shape_projects(shard_db, projects, selected))]
+        return [(project.id, ProjectResponse.model_validate(project)) for project in projects]
+
+    results = sorted(
+        (item for shard_items in await fan_out(db, shard_projects) for item in shard_items),
+        key=lambda item: item[0]
+    )
+    if selected is not None:
+        return NegotiatedResponse([row for _, row in results])
+    return [project for _, project in results]
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: int,
+    fields: Optional[str] = Query(None, max_length=FIELDS_MAX_LENGTH),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -118,9 +170,64 @@ async def get_project(
             detail="You don't have access to this project"
         )
 
+    if fields is not None:
+        return NegotiatedResponse(shape_projects(db, [project], parse_fields(fields))[0])
+
     return project
 
 
+@router.post("/{project_id}/clone", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
+async def clone_project_endpoint(
+    project_id: int,
+    clone_data: ProjectClone,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    # Check if user has access
+    team = db.query(Team).filter(Team.id == project.team_id).first()
+    is_member = (
+        project.owner_id == current_user.id or
+        team.owner_id == current_user.id or
+        db.query(UserToTeam).filter(
+            UserToTeam.user_id == current_user.id,
+            UserToTeam.team_id == project.team_id
+        ).first() is not None
+    )
+
+    if not is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    clone = clone_project(
+        db,
+        project,
+        name=clone_data.name or f"{project.name} (copy)",
+        description=clone_data.description if clone_data.description is not None else project.description,
+        owner_id=current_user.id
+    )
+    db.commit()
+
+    activity_log.record(
+        project_id=clone.id,
+        user_id=current_user.id,
+        entity_type="project",
+        entity_id=clone.id,
+        action="cloned",
+        changes={"source_project_id": project.id}
+    )
+
+    return clone
+
+
 @router.post("/{project_id}/invite", status_code=status.HTTP_200_OK)
 async def invite_user(
     project_id: int,
@@ -173,6 +280,9 @@ async def invite_user(
 @router.get("/{project_id}/board", response_model=BoardResponse)
 async def get_board(
     project_id: int,
+    format: Optional[str] = Query(None, pattern="^(full|compact)$"),
+    fields: Optional[str] = Query(None, max_length=FIELDS_MAX_LENGTH),
+    accept: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -204,15 +314,28 @@ async def get_board(
     desk = db.query(Desk).filter(Desk.id == project.desk_id).first()
     sections = db.query(Section).filter(Section.desk_id == project.desk_id).order_by(Section.order).all()
 
+    # Opt-in column-oriented format for big boards
+    if wants_compact(accept, format):
+        return compact_board_response(db, desk, sections)
+
+    if fields is not None:
+        return NegotiatedResponse(shape_board(db, project, desk, sections, parse_fields(fields)))
+
     # Build board response with tickets
+    tickets_by_section = {section.id: [] for section in sections}
+    for ticket in board_tickets(db, project.desk_id):
+        tickets_by_section[ticket.section_id].append(ticket)
+
     board_sections = []
     for section in sections:
-        tickets = db.query(Ticket).filter(Ticket.section_id == section.id).all()
+        tickets = tickets_by_section[section.id]
         section_data = BoardSection(
             id=section.id,
             desk_id=section.desk_id,
             name=section.name,
             order=section.order,
+            archive_after_days=section.archive_after_days,
+            version=section.version,
             created_at=section.created_at,
             updated_at=section.updated_at,
             tickets=[TicketResponse(
@@ -222,6 +345,9 @@ async def get_board(
                 priority=t.priority,
                 complexity=t.complexity,
                 section_id=t.section_id,
+                version=t.version,
+                due_at=t.due_at,
+                comment_count=t.comment_count,
                 created_at=t.created_at,
                 updated_at=t.updated_at
             ) for t in tickets]
@@ -234,3 +360,359 @@ async def get_board(
         sections=board_sections
     )
 
+
+@router.get("/{project_id}/calendar", response_model=CalendarResponse)
+async def get_calendar(
+    project_id: int,
+    from_: date = Query(..., alias="from"),
+    to: date = Query(...),
+    tz: str = Query("UTC"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    zone = calendar_zone(tz)
+    start, end = day_range(from_, to, zone)
+
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    # Check if user has access
+    team = db.query(Team).filter(Team.id == project.team_id).first()
+    is_member = (
+        project.owner_id == current_user.id or
+        team.owner_id == current_user.id or
+        db.query(UserToTeam).filter(
+            UserToTeam.user_id == current_user.id,
+            UserToTeam.team_id == project.team_id
+        ).first() is not None
+    )
+
+    if not is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    # Range scan over due dates, bucketed per day
+    return calendar_days(project_due_tickets(db, project, start, end), zone)
+
+
+@router.get("/{project_id}/activity", response_model=ActivityPage)
+async def get_activity(
+    project_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    # Check if user has access
+    team = db.query(Team).filter(Team.id == project.team_id).first()
+    is_member = (
+        project.owner_id == current_user.id or
+        team.owner_id == current_user.id or
+        db.query(UserToTeam).filter(
+            UserToTeam.user_id == current_user.id,
+            UserToTeam.team_id == project.team_id
+        ).first() is not None
+    )
+
+    if not is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    # Newest first, keyset pagination by id
+    query = db.query(Activity).filter(Activity.project_id == project_id)
+    if before_id is not None:
+        query = query.filter(Activity.id < before_id)
+    rows = query.order_by(Activity.id.desc()).limit(limit + 1).all()
+
+    items = [ActivityResponse(
+        id=row.id,
+        project_id=row.project_id,
+        user_id=row.user_id,
+        entity_type=row.entity_type,
+        entity_id=row.entity_id,
+        action=row.action,
+        changes=json.loads(row.changes) if row.changes else None,
+        created_at=row.created_at
+    ) for row in rows[:limit]]
+
+    return ActivityPage(
+        items=items,
+        next_before_id=items[-1].id if len(rows) > limit else None
+    )
+
+
+@router.get("/{project_id}/archive", response_model=ArchivePage)
+async def get_archive(
+    project_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    # Check if user has access
+    team = db.query(Team).filter(Team.id == project.team_id).first()
+    is_member = (
+        project.owner_id == current_user.id or
+        team.owner_id == current_user.id or
+        db.query(UserToTeam).filter(
+            UserToTeam.user_id == current_user.id,
+            UserToTeam.team_id == project.team_id
+        ).first() is not None
+    )
+
+    if not is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    # Archived tickets of the project's sections, newest first
+    section_ids = db.query(Section.id).filter(Section.desk_id == project.desk_id)
+    query = db.query(TicketArchive).filter(TicketArchive.section_id.in_(section_ids.scalar_subquery()))
+    if before_id is not None:
+        query = query.filter(TicketArchive.id < before_id)
+    rows = query.order_by(TicketArchive.id.desc()).limit(limit + 1).all()
+
+    items = [ArchivedTicketResponse.model_validate(row) for row in rows[:limit]]
+    return ArchivePage(
+        items=items,
+        next_before_id=items[-1].id if len(rows) > limit else None
+    )
+
+
+@router.get("/{project_id}/export")
+async def export_project(
+    project_id: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    # Check if user has access
+    team = db.query(Team).filter(Team.id == project.team_id).first()
+    is_member = (
+        project.owner_id == current_user.id or
+        team.owner_id == current_user.id or
+        db.query(UserToTeam).filter(
+            UserToTeam.user_id == current_user.id,
+            UserToTeam.team_id == project.team_id
+        ).first() is not None
+    )
+
+    if not is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    return export_response(db, project_tickets_query(project.desk_id), format, f"project-{project.id}")
+
+
+def _import_job_response(job: ImportJob) -> ImportJobResponse:
+    return ImportJobResponse(
+        id=job.id,
+        project_id=job.project_id,
+        format=job.format,
+        status=job.status,
+        rows_processed=job.rows_processed,
+        tickets_created=job.tickets_created,
+        sections_created=job.sections_created,
+        errors=json.loads(job.errors) if job.errors else [],
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at
+    )
+
+
+@router.post("/{project_id}/import", response_model=ImportJobResponse, status_code=status.HTTP_201_CREATED)
+async def create_import_job(
+    project_id: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    # Check if user has access
+    team = db.query(Team).filter(Team.id == project.team_id).first()
+    is_member = (
+        project.owner_id == current_user.id or
+        team.owner_id == current_user.id or
+        db.query(UserToTeam).filter(
+            UserToTeam.user_id == current_user.id,
+            UserToTeam.team_id == project.team_id
+        ).first() is not None
+    )
+
+    if not is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    # The file is uploaded to PUT /import/{job_id}; the id is known up front for polling
+    job = ImportJob(project_id=project.id, user_id=current_user.id, format=format, status="pending")
+    db.add(job)
+    db.commit()
+
+    return _import_job_response(job)
+
+
+@router.put("/{project_id}/import/{job_id}", response_model=ImportJobResponse)
+async def upload_import(
+    project_id: int,
+    job_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    # Check if user has access
+    team = db.query(Team).filter(Team.id == project.team_id).first()
+    is_member = (
+        project.owner_id == current_user.id or
+        team.owner_id == current_user.id or
+        db.query(UserToTeam).filter(
+            UserToTeam.user_id == current_user.id,
+            UserToTeam.team_id == project.team_id
+        ).first() is not None
+    )
+
+    if not is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    # Only the user who created the job uploads the file
+    job = db.query(ImportJob).filter(ImportJob.id == job_id, ImportJob.project_id == project_id).first()
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+
+    # Only one upload per job, even for concurrent requests
+    started = db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job.id, ImportJob.status == "pending")
+        .values(status="running")
+        .execution_options(synchronize_session="evaluate")
+    ).rowcount
+    db.commit()
+    if not started:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="File was already uploaded for this import job"
+        )
+
+    # The body is parsed while it is being uploaded; progress is committed per batch.
+    # On failure the committed batches stay and the job shows how many rows made it
+    try:
+        await TicketImporter(db, project, job).run(request.stream())
+    except Exception as e:
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)[:255] if isinstance(e, ImportFailed) else "Internal error"
+        db.commit()
+        if isinstance(e, ImportFailed):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Import failed after {job.rows_processed} rows "
+                       f"({job.tickets_created} tickets imported): {e}"
+            )
+        raise
+
+    job.status = "done"
+    db.commit()
+
+    activity_log.record(
+        project_id=project.id,
+        user_id=current_user.id,
+        entity_type="project",
+        entity_id=project.id,
+        action="imported",
+        changes={"import_job_id": job.id, "tickets_created": job.tickets_created}
+    )
+
+    return _import_job_response(job)
+
+
+@router.get("/{project_id}/import/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    project_id: int,
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    # Check if user has access
+    team = db.query(Team).filter(Team.id == project.team_id).first()
+    is_member = (
+        project.owner_id == current_user.id or
+        team.owner_id == current_user.id or
+        db.query(UserToTeam).filter(
+            UserToTeam.user_id == current_user.id,
+            UserToTeam.team_id == project.team_id
+        ).first() is not None
+    )
+
+    if not is_member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    job = db.query(ImportJob).filter(ImportJob.id == job_id, ImportJob.project_id == project_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+
+    return _import_job_response(job)
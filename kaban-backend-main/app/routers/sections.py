@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import User, Project, Section, Team, UserToTeam
 from app.schemas import SectionCreate, SectionUpdate, SectionResponse
 from app.auth import get_current_user
+from app.concurrency import parse_if_match, etag, versioned_update
+from app.activity import activity_log
+from app.negotiation import MsgPackRoute
+from app.sharding import route_to_shard
 
-router = APIRouter(prefix="/projects/{project_id}/sections", tags=["sections"])
+router = APIRouter(prefix="/projects/{project_id}/sections", tags=["sections"], route_class=MsgPackRoute,
+                   dependencies=[Depends(route_to_shard)])
 
 
 @router.post("", response_model=SectionResponse, status_code=status.HTTP_201_CREATED)
@@ -42,11 +48,20 @@ async def create_section(
     section = Section(
         desk_id=project.desk_id,
         name=section_data.name,
-        order=section_data.order
+        order=section_data.order,
+        archive_after_days=section_data.archive_after_days
     )
     db.add(section)
     db.commit()
-    db.refresh(section)
+
+    activity_log.record(
+        project_id=project.id,
+        user_id=current_user.id,
+        entity_type="section",
+        entity_id=section.id,
+        action="created",
+        changes={"name": section.name, "order": section.order}
+    )
 
     return section
 
@@ -56,9 +71,13 @@ async def update_section(
     project_id: int,
     section_id: int,
     section_data: SectionUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    expected_version = parse_if_match(if_match)
+
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(
@@ -66,17 +85,6 @@ async def update_section(
             detail="Project not found"
         )
 
-    section = db.query(Section).filter(
-        Section.id == section_id,
-        Section.desk_id == project.desk_id
-    ).first()
-
-    if not section:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Section not found"
-        )
-
     # Check if user has access
     team = db.query(Team).filter(Team.id == project.team_id).first()
     is_member = (
@@ -94,17 +102,35 @@ async def update_section(
             detail="You don't have access to this project"
         )
 
-    # Update section
-    if section_data.name is not None:
-        section.name = section_data.name
-    if section_data.order is not None:
-        section.order = section_data.order
+    # Update section with a single versioned UPDATE
+    values = section_data.model_dump(exclude_none=True)
+    criteria = [Section.id == section_id, Section.desk_id == project.desk_id]
+    section = versioned_update(db, Section, criteria, values, expected_version)
+
+    if section is None:
+        db.rollback()
+        exists = db.query(Section.id).filter(*criteria).first() is not None
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Section not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Section was modified by another request"
+        )
 
+    result = SectionResponse.model_validate(section)
     db.commit()
-    db.refresh(section)
-
-    return section
-
-
 
+    activity_log.record(
+        project_id=project.id,
+        user_id=current_user.id,
+        entity_type="section",
+        entity_id=result.id,
+        action="updated",
+        changes=values
+    )
 
+    response.headers["ETag"] = etag(result.version)
+    return result
@@ -1,11 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import User, Project, Ticket, Section, Team, UserToTeam
-from app.schemas import TicketCreate, TicketUpdate, TicketResponse
+from app.models import User, Project, Ticket, TicketAssignee, TicketComment, Section, Team, UserToTeam
+from app.schemas import (
+    TicketCreate,
+    TicketUpdate,
+    TicketResponse,
+    TicketAssign,
+    UserSummary,
+    CommentCreate,
+    CommentResponse,
+    CommentPage
+)
+from app.assignments import sort_keys, sync_sort_keys
 from app.auth import get_current_user
+from app.concurrency import parse_if_match, etag, versioned_update
+from app.activity import activity_log
+from app.negotiation import MsgPackRoute
+from app.sharding import route_to_shard
 
-router = APIRouter(prefix="/projects/{project_id}/tasks", tags=["tasks"])
+router = APIRouter(prefix="/projects/{project_id}/tasks", tags=["tasks"], route_class=MsgPackRoute,
+                   dependencies=[Depends(route_to_shard)])
+
+
+def _is_project_member(project: Project, user_id: int, db: Session) -> bool:
+    team = db.query(Team).filter(Team.id == project.team_id).first()
+    return (
+        project.owner_id == user_id or
+        team.owner_id == user_id or
+        db.query(UserToTeam).filter(
+            UserToTeam.user_id == user_id,
+            UserToTeam.team_id == project.team_id
+        ).first() is not None
+    )
+
+
+def _get_task_for_member(project_id: int, task_id: int, current_user: User, db: Session):
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    if not _is_project_member(project, current_user.id, db):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have access to this project"
+        )
+
+    ticket = db.query(Ticket).filter(
+        Ticket.id == task_id,
+        Ticket.section_id.in_(select(Section.id).where(Section.desk_id == project.desk_id))
+    ).first()
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return project, ticket
+
+
+def _count_comments(ticket_id: int, delta: int):
+    # Denormalized counter for the board; a comment is not an edit of the ticket.
+    # "evaluate" keeps a ticket already loaded in the session in sync
+    return update(Ticket).where(Ticket.id == ticket_id).values(
+        comment_count=Ticket.comment_count + delta,
+        updated_at=Ticket.updated_at
+    ).execution_options(synchronize_session="evaluate")
+
+
+def _assignees(ticket_id: int, db: Session) -> List[User]:
+    # Assignments live with the ticket, users in the main database
+    user_ids = db.execute(
+        select(TicketAssignee.user_id)
+        .where(TicketAssignee.ticket_id == ticket_id)
+        .order_by(TicketAssignee.user_id)
+    ).scalars().all()
+    if not user_ids:
+        return []
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids))}
+    return [users[user_id] for user_id in user_ids if user_id in users]
 
 
 @router.post("", response_model=TicketResponse, status_code=status.HTTP_201_CREATED)
@@ -56,11 +133,20 @@ async def create_task(
         task=task_data.task,
         priority=task_data.priority,
         complexity=task_data.complexity,
-        section_id=task_data.section_id
+        section_id=task_data.section_id,
+        due_at=task_data.due_at
     )
     db.add(ticket)
     db.commit()
-    db.refresh(ticket)
+
+    activity_log.record(
+        project_id=project.id,
+        user_id=current_user.id,
+        entity_type="ticket",
+        entity_id=ticket.id,
+        action="created",
+        changes={"name": ticket.name, "section_id": ticket.section_id}
+    )
 
     return ticket
 
@@ -70,9 +156,13 @@ async def update_task(
     project_id: int,
     task_id: int,
     task_data: TicketUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    expected_version = parse_if_match(if_match)
+
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(
@@ -80,17 +170,6 @@ async def update_task(
             detail="Project not found"
         )
 
-    ticket = db.query(Ticket).join(Section).filter(
-        Ticket.id == task_id,
-        Section.desk_id == project.desk_id
-    ).first()
-
-    if not ticket:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-
     # Check if user has access
     team = db.query(Team).filter(Team.id == project.team_id).first()
     is_member = (
@@ -120,23 +199,216 @@ async def update_task(
                 detail="Section doesn't belong to this project"
             )
 
-    # Update ticket
-    if task_data.name is not None:
-        ticket.name = task_data.name
-    if task_data.task is not None:
-        ticket.task = task_data.task
-    if task_data.priority is not None:
-        ticket.priority = task_data.priority
-    if task_data.complexity is not None:
-        ticket.complexity = task_data.complexity
-    if task_data.section_id is not None:
-        ticket.section_id = task_data.section_id
+    # Update ticket with a single versioned UPDATE
+    values = task_data.model_dump(exclude_none=True)
+    # An explicit null clears the due date
+    if "due_at" in task_data.model_fields_set and task_data.due_at is None:
+        values["due_at"] = None
+    criteria = [
+        Ticket.id == task_id,
+        Ticket.section_id.in_(select(Section.id).where(Section.desk_id == project.desk_id))
+    ]
+    ticket = versioned_update(db, Ticket, criteria, values, expected_version)
 
+    if ticket is None:
+        db.rollback()
+        exists = db.query(Ticket.id).filter(*criteria).first() is not None
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Task was modified by another request"
+        )
+
+    # Keep the denormalized sort keys of GET /user/me/tasks in step
+    sync_sort_keys(db, ticket)
+    result = TicketResponse.model_validate(ticket)
     db.commit()
-    db.refresh(ticket)
 
-    return ticket
+    activity_log.record(
+        project_id=project.id,
+        user_id=current_user.id,
+        entity_type="ticket",
+        entity_id=result.id,
+        action="moved" if "section_id" in values else "updated",
+        changes=values
+    )
 
+    response.headers["ETag"] = etag(result.version)
+    return result
 
 
+@router.get("/{task_id}/assignees", response_model=List[UserSummary])
+async def list_assignees(
+    project_id: int,
+    task_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    _, ticket = _get_task_for_member(project_id, task_id, current_user, db)
+    return _assignees(ticket.id, db)
+
 
+@router.post("/{task_id}/assignees", response_model=List[UserSummary], status_code=status.HTTP_201_CREATED)
+async def assign_task(
+    project_id: int,
+    task_id: int,
+    assign_data: TicketAssign,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project, ticket = _get_task_for_member(project_id, task_id, current_user, db)
+
+    # Only members of the project can be assigned
+    assignee = db.query(User).filter(User.id == assign_data.user_id).first()
+    if not assignee or not _is_project_member(project, assignee.id, db):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is not a member of this project"
+        )
+
+    # Assigning twice is a no-op
+    assigned = db.query(TicketAssignee).filter(
+        TicketAssignee.ticket_id == ticket.id,
+        TicketAssignee.user_id == assignee.id
+    ).first() is not None
+    if not assigned:
+        db.execute(insert(TicketAssignee).values(
+            ticket_id=ticket.id,
+            user_id=assignee.id,
+            project_id=project.id,
+            **sort_keys(ticket)
+        ))
+        db.commit()
+
+        activity_log.record(
+            project_id=project.id,
+            user_id=current_user.id,
+            entity_type="ticket",
+            entity_id=ticket.id,
+            action="assigned",
+            changes={"user_id": assignee.id}
+        )
+
+    return _assignees(ticket.id, db)
+
+
+@router.delete("/{task_id}/assignees/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def unassign_task(
+    project_id: int,
+    task_id: int,
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project, ticket = _get_task_for_member(project_id, task_id, current_user, db)
+
+    result = db.execute(delete(TicketAssignee).where(
+        TicketAssignee.ticket_id == ticket.id,
+        TicketAssignee.user_id == user_id
+    ))
+    if result.rowcount == 0:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User is not assigned to this task"
+        )
+    db.commit()
+
+    activity_log.record(
+        project_id=project.id,
+        user_id=current_user.id,
+        entity_type="ticket",
+        entity_id=ticket.id,
+        action="unassigned",
+        changes={"user_id": user_id}
+    )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/{task_id}/comments", response_model=CommentPage)
+async def list_comments(
+    project_id: int,
+    task_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    _, ticket = _get_task_for_member(project_id, task_id, current_user, db)
+
+    # Newest first, keyset pagination by id
+    query = db.query(TicketComment).filter(TicketComment.ticket_id == ticket.id)
+    if before_id is not None:
+        query = query.filter(TicketComment.id < before_id)
+    rows = query.order_by(TicketComment.id.desc()).limit(limit + 1).all()
+
+    items = [CommentResponse.model_validate(row) for row in rows[:limit]]
+    return CommentPage(
+        items=items,
+        next_before_id=items[-1].id if len(rows) > limit else None
+    )
+
+
+@router.post("/{task_id}/comments", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
+async def create_comment(
+    project_id: int,
+    task_id: int,
+    comment_data: CommentCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    project, ticket = _get_task_for_member(project_id, task_id, current_user, db)
+
+    # Comment and counter are committed together
+    comment = TicketComment(ticket_id=ticket.id, user_id=current_user.id, body=comment_data.body)
+    db.add(comment)
+    db.execute(_count_comments(ticket.id, 1))
+    db.commit()
+
+    activity_log.record(
+        project_id=project.id,
+        user_id=current_user.id,
+        entity_type="ticket",
+        entity_id=ticket.id,
+        action="commented",
+        changes={"comment_id": comment.id}
+    )
+
+    return comment
+
+
+@router.delete("/{task_id}/comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_comment(
+    project_id: int,
+    task_id: int,
+    comment_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    _, ticket = _get_task_for_member(project_id, task_id, current_user, db)
+
+    comment = db.query(TicketComment).filter(
+        TicketComment.id == comment_id,
+        TicketComment.ticket_id == ticket.id
+    ).first()
+    if not comment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Comment not found"
+        )
+    if comment.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the author can delete a comment"
+        )
+
+    # Delete only if still there, so concurrent deletes decrement once
+    result = db.execute(delete(TicketComment).where(TicketComment.id == comment.id))
+    if result.rowcount:
+        db.execute(_count_comments(ticket.id, -1))
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
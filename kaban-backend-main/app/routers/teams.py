@@ -1,12 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 from app.database import get_db
-from app.models import User, Team
-from app.schemas import TeamCreate, TeamResponse
+from app.models import User, Team, UserToTeam, Project, Desk, Section, Ticket, DeskTemplate, DeskTemplateSection
+from app.schemas import (
+    TeamCreate,
+    TeamResponse,
+    TeamOverview,
+    ProjectOverview,
+    SectionSummary,
+    DeskTemplateCreate,
+    DeskTemplateResponse
+)
 from app.auth import get_current_user
+from app.export import export_response, team_tickets_query
+from app.sharding import assign_team_shard, route_to_shard
 
-router = APIRouter(prefix="/teams", tags=["teams"])
+router = APIRouter(prefix="/teams", tags=["teams"], dependencies=[Depends(route_to_shard)])
+
+
+def _get_team_for_member(team_id: int, current_user: User, db: Session) -> Team:
+    row = db.query(Team, UserToTeam.user_id).outerjoin(
+        UserToTeam,
+        and_(UserToTeam.team_id == Team.id, UserToTeam.user_id == current_user.id)
+    ).filter(Team.id == team_id).first()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found"
+        )
+
+    team, membership_user_id = row
+    if team.owner_id != current_user.id and membership_user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not a member of this team"
+        )
+    return team
 
 
 @router.post("", response_model=TeamResponse, status_code=status.HTTP_201_CREATED)
@@ -20,8 +51,9 @@ async def create_team(
         owner_id=current_user.id
     )
     db.add(team)
+    db.flush()
+    assign_team_shard(db, team)
     db.commit()
-    db.refresh(team)
 
     return team
 
@@ -31,10 +63,116 @@ async def list_teams(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Get teams where user is owner or member
-    teams = db.query(Team).filter(Team.owner_id == current_user.id).all()
+    # Get teams where user is owner or member in a single join
+    teams = db.query(Team).outerjoin(
+        UserToTeam,
+        and_(UserToTeam.team_id == Team.id, UserToTeam.user_id == current_user.id)
+    ).filter(
+        or_(Team.owner_id == current_user.id, UserToTeam.user_id.isnot(None))
+    ).order_by(Team.id).all()
     return teams
 
 
+@router.get("/{team_id}/overview", response_model=TeamOverview)
+async def get_team_overview(
+    team_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Load team together with the user's membership row
+    team = _get_team_for_member(team_id, current_user, db)
+
+    # All projects of the team with their desk names
+    project_rows = db.query(Project, Desk.name).join(
+        Desk, Desk.id == Project.desk_id
+    ).filter(Project.team_id == team_id).order_by(Project.id).all()
+
+    # Section summaries with ticket counts for every desk at once
+    sections_by_desk = {project.desk_id: [] for project, _ in project_rows}
+    if sections_by_desk:
+        section_rows = db.query(Section, func.count(Ticket.id)).outerjoin(
+            Ticket, Ticket.section_id == Section.id
+        ).filter(
+            Section.desk_id.in_(list(sections_by_desk))
+        ).group_by(Section.id).order_by(Section.desk_id, Section.order).all()
+
+        for section, ticket_count in section_rows:
+            sections_by_desk[section.desk_id].append(SectionSummary(
+                id=section.id,
+                name=section.name,
+                order=section.order,
+                ticket_count=ticket_count
+            ))
+
+    return TeamOverview(
+        id=team.id,
+        name=team.name,
+        owner_id=team.owner_id,
+        created_at=team.created_at,
+        updated_at=team.updated_at,
+        projects=[ProjectOverview(
+            id=project.id,
+            name=project.name,
+            description=project.description,
+            desk_id=project.desk_id,
+            desk_name=desk_name,
+            owner_id=project.owner_id,
+            created_at=project.created_at,
+            updated_at=project.updated_at,
+            sections=sections_by_desk[project.desk_id]
+        ) for project, desk_name in project_rows]
+    )
+
 
+@router.post("/{team_id}/templates", response_model=DeskTemplateResponse, status_code=status.HTTP_201_CREATED)
+async def create_desk_template(
+    team_id: int,
+    template_data: DeskTemplateCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    _get_team_for_member(team_id, current_user, db)
 
+    if not template_data.sections:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Template must have at least one section"
+        )
+
+    template = DeskTemplate(
+        team_id=team_id,
+        name=template_data.name,
+        sections=[
+            DeskTemplateSection(name=section.name, order=section.order)
+            for section in template_data.sections
+        ]
+    )
+    db.add(template)
+    db.commit()
+
+    return template
+
+
+@router.get("/{team_id}/templates", response_model=List[DeskTemplateResponse])
+async def list_desk_templates(
+    team_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    _get_team_for_member(team_id, current_user, db)
+
+    templates = db.query(DeskTemplate).options(
+        selectinload(DeskTemplate.sections)
+    ).filter(DeskTemplate.team_id == team_id).order_by(DeskTemplate.id).all()
+    return templates
+
+
+@router.get("/{team_id}/export")
+async def export_team(
+    team_id: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    team = _get_team_for_member(team_id, current_user, db)
+    return export_response(db, team_tickets_query(team.id), format, f"team-{team.id}")
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends
-from app.models import User
-from app.schemas import UserResponse
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models import User, UserToTeam
+from app.schemas import UserResponse, AssignedTicketPage, CalendarResponse
 from app.auth import get_current_user
+from app.assignments import assigned_tickets, decode_cursor, encode_cursor, sort_key
+from app.calendar_view import calendar_days, calendar_zone, day_range, user_due_tickets
+from app.sharding import fan_out
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -11,5 +18,56 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+@router.get("/me/tasks", response_model=AssignedTicketPage)
+async def get_my_tasks(
+    sort: str = Query("priority", pattern="^(priority|updated_at)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    after = decode_cursor(sort, cursor) if cursor is not None else None
+    team_ids = [
+        team_id for (team_id,) in
+        db.query(UserToTeam.team_id).filter(UserToTeam.user_id == current_user.id)
+    ]
 
+    # Keyset page from every shard, merged in the same order
+    pages = await fan_out(db, lambda shard_db: assigned_tickets(
+        shard_db,
+        user_id=current_user.id,
+        team_ids=team_ids,
+        sort=sort,
+        after=after,
+        limit=limit + 1
+    ))
+    items = sorted((item for page in pages for item in page), key=lambda item: sort_key(sort, item))
 
+    return AssignedTicketPage(
+        items=items[:limit],
+        next_cursor=encode_cursor(sort, items[limit - 1]) if len(items) > limit else None
+    )
+
+
+@router.get("/me/calendar", response_model=CalendarResponse)
+async def get_my_calendar(
+    from_: date = Query(..., alias="from"),
+    to: date = Query(...),
+    tz: str = Query("UTC"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    zone = calendar_zone(tz)
+    start, end = day_range(from_, to, zone)
+    team_ids = [
+        team_id for (team_id,) in
+        db.query(UserToTeam.team_id).filter(UserToTeam.user_id == current_user.id)
+    ]
+
+    # Due tickets from every shard, merged by due date
+    per_shard = await fan_out(db, lambda shard_db: user_due_tickets(shard_db, current_user.id, team_ids, start, end))
+    tickets = sorted(
+        (ticket for tickets in per_shard for ticket in tickets),
+        key=lambda ticket: (ticket.due_at, ticket.project_id, ticket.id)
+    )
+    return calendar_days(tickets, zone)
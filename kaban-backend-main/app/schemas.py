@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime
-from app.models import PriorityEnum
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Any, Dict, Optional, List
+from datetime import date, datetime
+from app.models import PriorityEnum, as_timestamp
+from app.config import settings
 
 
 # Auth Schemas
@@ -24,6 +25,8 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     user_id: Optional[int] = None
+    family_id: Optional[str] = None
+    jti: Optional[str] = None
 
 
 class RefreshTokenRequest(BaseModel):
@@ -46,6 +49,15 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserSummary(BaseModel):
+    id: int
+    username: str
+    avatar_url: Optional[str] = ""
+
+    class Config:
+        from_attributes = True
+
+
 # Team Schemas
 class TeamCreate(BaseModel):
     name: str
@@ -62,11 +74,40 @@ class TeamResponse(BaseModel):
         from_attributes = True
 
 
+class SectionSummary(BaseModel):
+    id: int
+    name: str
+    order: int
+    ticket_count: int = 0
+
+
+class ProjectOverview(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    desk_id: int
+    desk_name: str
+    owner_id: int
+    created_at: datetime
+    updated_at: datetime
+    sections: List[SectionSummary] = []
+
+
+class TeamOverview(TeamResponse):
+    projects: List[ProjectOverview] = []
+
+
 # Project Schemas
 class ProjectCreate(BaseModel):
     name: str
     description: Optional[str] = None
     team_id: int
+    template_id: Optional[int] = None
+
+
+class ProjectClone(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
 
 
 class ProjectUpdate(BaseModel):
@@ -92,15 +133,43 @@ class ProjectInvite(BaseModel):
     email: EmailStr
 
 
+# Desk Template Schemas
+class DeskTemplateSectionData(BaseModel):
+    name: str
+    order: int
+
+    class Config:
+        from_attributes = True
+
+
+class DeskTemplateCreate(BaseModel):
+    name: str
+    sections: List[DeskTemplateSectionData]
+
+
+class DeskTemplateResponse(BaseModel):
+    id: int
+    team_id: int
+    name: str
+    sections: List[DeskTemplateSectionData] = []
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 # Section Schemas
 class SectionCreate(BaseModel):
     name: str
     order: int
+    archive_after_days: Optional[int] = Field(None, ge=0)
 
 
 class SectionUpdate(BaseModel):
     name: Optional[str] = None
     order: Optional[int] = None
+    archive_after_days: Optional[int] = Field(None, ge=0)
 
 
 class SectionResponse(BaseModel):
@@ -108,6 +177,8 @@ class SectionResponse(BaseModel):
     desk_id: int
     name: str
     order: int
+    archive_after_days: Optional[int] = None
+    version: int
     created_at: datetime
     updated_at: datetime
 
@@ -116,20 +187,36 @@ class SectionResponse(BaseModel):
 
 
 # Ticket Schemas
+COMPLEXITY_MIN = 0
+COMPLEXITY_MAX = 2 ** 31 - 1  # ticket.complexity - INT
+
+
 class TicketCreate(BaseModel):
     name: str
     task: str
     priority: PriorityEnum = PriorityEnum.medium
-    complexity: int = 1
+    complexity: int = Field(1, ge=COMPLEXITY_MIN, le=COMPLEXITY_MAX)
     section_id: int
+    due_at: Optional[datetime] = None
+
+    @field_validator("due_at")
+    @classmethod
+    def due_at_utc(cls, value):
+        return as_timestamp(value)
 
 
 class TicketUpdate(BaseModel):
     name: Optional[str] = None
     task: Optional[str] = None
     priority: Optional[PriorityEnum] = None
-    complexity: Optional[int] = None
+    complexity: Optional[int] = Field(None, ge=COMPLEXITY_MIN, le=COMPLEXITY_MAX)
     section_id: Optional[int] = None
+    due_at: Optional[datetime] = None  # null снимает срок
+
+    @field_validator("due_at")
+    @classmethod
+    def due_at_utc(cls, value):
+        return as_timestamp(value)
 
 
 class TicketResponse(BaseModel):
@@ -139,6 +226,9 @@ class TicketResponse(BaseModel):
     priority: PriorityEnum
     complexity: int
     section_id: int
+    due_at: Optional[datetime] = None
+    comment_count: int = 0
+    version: int
     created_at: datetime
     updated_at: datetime
 
@@ -146,6 +236,41 @@ class TicketResponse(BaseModel):
         from_attributes = True
 
 
+class TicketAssign(BaseModel):
+    user_id: int
+
+
+class AssignedTicketResponse(TicketResponse):
+    project_id: int
+    project_name: str
+
+
+class AssignedTicketPage(BaseModel):
+    items: List[AssignedTicketResponse] = []
+    next_cursor: Optional[str] = None
+
+
+# Comment Schemas
+class CommentCreate(BaseModel):
+    body: str = Field(..., min_length=1, max_length=settings.COMMENT_MAX_LENGTH)
+
+
+class CommentResponse(BaseModel):
+    id: int
+    ticket_id: int
+    user_id: int
+    body: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CommentPage(BaseModel):
+    items: List[CommentResponse] = []
+    next_before_id: Optional[int] = None
+
+
 # Board Schemas
 class BoardSection(SectionResponse):
     tickets: List[TicketResponse] = []
@@ -155,3 +280,93 @@ class BoardResponse(BaseModel):
     desk_id: int
     desk_name: str
     sections: List[BoardSection] = []
+
+
+# Calendar Schemas
+class CalendarTicket(BaseModel):
+    id: int
+    name: str
+    priority: PriorityEnum
+    project_id: int
+    section_id: int
+    due_at: datetime
+
+
+class CalendarDay(BaseModel):
+    date: date
+    tickets: List[CalendarTicket] = []
+
+
+class CalendarResponse(BaseModel):
+    days: List[CalendarDay] = []
+
+
+# Activity Schemas
+class ActivityResponse(BaseModel):
+    id: int
+    project_id: int
+    user_id: int
+    entity_type: str
+    entity_id: int
+    action: str
+    changes: Optional[dict] = None
+    created_at: datetime
+
+
+class ActivityPage(BaseModel):
+    items: List[ActivityResponse] = []
+    next_before_id: Optional[int] = None
+
+
+# Archive Schemas
+class ArchivedTicketResponse(TicketResponse):
+    archived_at: datetime
+
+
+class ArchivePage(BaseModel):
+    items: List[ArchivedTicketResponse] = []
+    next_before_id: Optional[int] = None
+
+
+# Import Schemas
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportJobResponse(BaseModel):
+    id: int
+    project_id: int
+    format: str
+    status: str
+    rows_processed: int
+    tickets_created: int
+    sections_created: int
+    errors: List[ImportRowError] = []
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+# Batch Schemas
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = None
+    method: str = Field("GET", pattern="^(GET|POST|PUT|PATCH|DELETE)$")
+    path: str = Field(..., pattern="^/")
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1)
+
+
+class BatchResponseItem(BaseModel):
+    id: str
+    status: int
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem] = []
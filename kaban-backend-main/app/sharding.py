@@ -0,0 +1,165 @@
+import asyncio
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+from fastapi import Depends, Request
+from sqlalchemy import ForeignKeyConstraint, MetaData, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.database import DEFAULT_SHARD, TENANT_TABLES, Base, get_db
+from app.models import ProjectShard, Team, utcnow
+
+T = TypeVar("T")
+
+
+def is_sharded(db: Session) -> bool:
+    return getattr(db, "sharded", False)
+
+
+def shard_for_team(db: Session, team_id: int) -> str:
+    return db.query(Team.shard).filter(Team.id == team_id).scalar() or DEFAULT_SHARD
+
+
+def shard_for_project(db: Session, project_id: int) -> str:
+    # Проекты без записи в каталоге созданы до шардирования и лежат в основной базе
+    return db.query(ProjectShard.shard).filter(ProjectShard.project_id == project_id).scalar() or DEFAULT_SHARD
+
+
+def route_to_shard(request: Request, db: Session = Depends(get_db)):
+    """
+    Зависимость роутеров с данными команд: закрепляет сессию запроса
+    за шардом проекта или команды из пути.
+    """
+    if not is_sharded(db):
+        return
+    params = request.path_params
+    try:
+        if "project_id" in params:
+            db.shard = shard_for_project(db, int(params["project_id"]))
+        elif "team_id" in params:
+            db.shard = shard_for_team(db, int(params["team_id"]))
+    except ValueError:
+        # Некорректный id отклонит валидация параметров пути
+        pass
+
+
+def use_team_shard(db: Session, team: Team):
+    if is_sharded(db):
+        db.shard = team.shard or DEFAULT_SHARD
+
+
+def assign_team_shard(db: Session, team: Team):
+    """
+    Размещает новую команду на шарде по её id. Вызывается после flush,
+    когда id уже известен.
+    """
+    if is_sharded(db):
+        names = sorted(db.engines)
+        team.shard = names[team.id % len(names)]
+
+
+def register_project(db: Session, team_id: int, project_id: Optional[int] = None) -> int:
+    """
+    Записывает проект в каталог. Без project_id каталог сам выдаёт id:
+    так id проектов уникальны во всех шардах.
+    """
+    values = {"team_id": team_id, "shard": getattr(db, "shard", None) or DEFAULT_SHARD, "created_at": utcnow()}
+    if project_id is not None:
+        values["project_id"] = project_id
+    result = db.execute(insert(ProjectShard).values(**values))
+    return project_id if project_id is not None else result.inserted_primary_key[0]
+
+
+def group_by_project_shard(db: Session, rows: Iterable[dict]) -> Dict[Optional[str], List[dict]]:
+    """
+    Раскладывает строки с project_id по шардам одним запросом к каталогу.
+    Без шардирования все строки попадают под ключ None.
+    """
+    rows = list(rows)
+    if not is_sharded(db):
+        return {None: rows}
+    project_ids = {row["project_id"] for row in rows}
+    shards = dict(db.execute(
+        select(ProjectShard.project_id, ProjectShard.shard).where(ProjectShard.project_id.in_(project_ids))
+    ).all())
+    grouped: Dict[Optional[str], List[dict]] = defaultdict(list)
+    for row in rows:
+        grouped[shards.get(row["project_id"], DEFAULT_SHARD)].append(row)
+    return grouped
+
+
+async def fan_out(db: Session, func: Callable[[Session], T]) -> List[T]:
+    """
+    Выполняет func на каждом шарде параллельно, каждый раз в отдельной
+    сессии. Без шардирования - один вызов в сессии запроса.
+    """
+    if not is_sharded(db):
+        return [func(db)]
+
+    def run(shard: str) -> T:
+        shard_db = db.spawn(shard)
+        try:
+            return func(shard_db)
+        finally:
+            shard_db.close()
+
+    return list(await asyncio.gather(*(run_in_threadpool(run, shard) for shard in sorted(db.engines))))
+
+
+def for_each_shard(session_factory, func: Callable[[Session], T]) -> List[T]:
+    """
+    Синхронный обход шардов для фоновых заданий.
+    """
+    db = session_factory()
+    try:
+        if not is_sharded(db):
+            return [func(db)]
+        shards = sorted(db.engines)
+    finally:
+        db.close()
+
+    results = []
+    for shard in shards:
+        db = session_factory()
+        db.shard = shard
+        try:
+            results.append(func(db))
+        finally:
+            db.close()
+    return results
+
+
+def tenant_metadata() -> MetaData:
+    """
+    Таблицы данных команд для баз шардов: внешние ключи на общие таблицы
+    убраны, потому что пользователи и команды живут в основной базе.
+    """
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        if table.name not in TENANT_TABLES:
+            continue
+        copy = table.to_metadata(metadata)
+        for constraint in list(copy.constraints):
+            if not isinstance(constraint, ForeignKeyConstraint):
+                continue
+            if constraint.elements[0].target_fullname.split(".")[0] in TENANT_TABLES:
+                continue
+            copy.constraints.discard(constraint)
+            for fk in constraint.elements:
+                copy.foreign_keys.discard(fk)
+                fk.parent.foreign_keys.discard(fk)
+    return metadata
+
+
+def create_schema(engines: Dict[str, Engine]):
+    """
+    Основная база получает все таблицы, остальные шарды - только таблицы
+    данных команд.
+    """
+    Base.metadata.create_all(bind=engines[DEFAULT_SHARD])
+    shard_tables = tenant_metadata()
+    for name, engine in engines.items():
+        if name != DEFAULT_SHARD:
+            shard_tables.create_all(bind=engine)
@@ -0,0 +1,127 @@
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from app.auth import create_access_token, create_refresh_token
+from app.config import settings
+from app.database import SessionLocal
+from app.jobs import job_runner
+from app.logging_config import logger
+from app.models import RefreshToken, utcnow
+from app.revocation import revocation_list
+from app.schemas import TokenData
+
+
+def issue_tokens(db: Session, user_id: int, family_id: Optional[str] = None) -> dict:
+    """
+    Выдаёт пару токенов. Без family_id начинается новое семейство (вход),
+    с ним - следующий токен того же семейства (обмен refresh-токена).
+    Запись refresh-токена попадает в транзакцию вызывающего кода.
+    """
+    family_id = family_id or uuid.uuid4().hex
+    jti = uuid.uuid4().hex
+    now = utcnow()
+    db.execute(insert(RefreshToken).values(
+        jti=jti,
+        family_id=family_id,
+        user_id=user_id,
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        created_at=now,
+    ))
+    return {
+        "access_token": create_access_token(data={"sub": user_id, "fam": family_id}),
+        "refresh_token": create_refresh_token(data={"sub": user_id, "fam": family_id, "jti": jti}),
+        "token_type": "bearer"
+    }
+
+
+def rotate_refresh_token(db: Session, token_data: TokenData) -> dict:
+    """
+    Обменивает refresh-токен на новую пару. Токен помечается использованным
+    одним условным UPDATE; повторное предъявление уже обменянного токена
+    считается кражей и отзывает всё семейство. Исключение - повтор в течение
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS после обмена: так выглядят параллельные
+    обновления из нескольких вкладок или повтор после обрыва ответа, и клиент
+    получает ещё одну пару того же семейства.
+    """
+    if not token_data.jti or not token_data.family_id:
+        raise _invalid_refresh_token()
+
+    now = utcnow()
+    result = db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.jti == token_data.jti,
+            RefreshToken.user_id == token_data.user_id,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(used_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 1:
+        return issue_tokens(db, token_data.user_id, token_data.family_id)
+
+    row = db.query(RefreshToken.used_at, RefreshToken.revoked_at).filter(
+        RefreshToken.jti == token_data.jti,
+        RefreshToken.user_id == token_data.user_id,
+    ).first()
+    if row is None or row.revoked_at is not None:
+        raise _invalid_refresh_token()
+    if row.used_at is not None:
+        grace = timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+        if row.used_at > now - grace:
+            return issue_tokens(db, token_data.user_id, token_data.family_id)
+        logger.warning(
+            "Refresh token reuse detected, revoking family %s",
+            token_data.family_id,
+            extra={"user_id": token_data.user_id},
+        )
+        revoke_family(db, token_data.family_id)
+    raise _invalid_refresh_token()
+
+
+def revoke_family(db: Session, family_id: str):
+    """
+    Отзывает все токены семейства и сразу добавляет его в локальный
+    список отзыва; остальные воркеры узнают об этом при синхронизации.
+    """
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    revocation_list.revoke(family_id)
+
+
+@job_runner.handler("auth.purge_refresh_tokens", max_attempts=1)
+def purge_refresh_tokens(payload: dict) -> int:
+    """
+    Периодическое задание: удаляет истёкшие refresh-токены.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.expires_at < utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
@@ -0,0 +1,122 @@
+"""
+Encode time and payload size of the board response, JSON vs MessagePack.
+
+Builds a synthetic board and encodes it the way the API does: the response
+model is dumped once (same for both formats), then rendered by
+NegotiatedResponse as JSON or MessagePack. The compact column-oriented
+format is measured as well.
+
+    python benchmarks/board_formats.py --sections 6 --tickets 2000
+"""
+import argparse
+import gzip
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.board import PRIORITY_CODES, TICKET_FIELDS  # noqa: E402
+from app.models import PriorityEnum  # noqa: E402
+from app.negotiation import packb  # noqa: E402
+from app.schemas import BoardResponse, BoardSection, TicketResponse  # noqa: E402
+
+
+def build_board(sections: int, tickets_per_section: int) -> BoardResponse:
+    now = datetime(2025, 1, 1, 12, 0, 0, 123456)
+    priorities = list(PriorityEnum)
+    board_sections = []
+    ticket_id = 1
+    for section_id in range(1, sections + 1):
+        tickets = []
+        for i in range(tickets_per_section):
+            tickets.append(TicketResponse(
+                id=ticket_id,
+                name=f"Ticket {ticket_id}",
+                task=f"Description of ticket {ticket_id}, a sentence or two of text",
+                priority=priorities[i % len(priorities)],
+                complexity=i % 8 + 1,
+                section_id=section_id,
+                version=1,
+                created_at=now + timedelta(seconds=ticket_id),
+                updated_at=now + timedelta(seconds=ticket_id, minutes=5),
+            ))
+            ticket_id += 1
+        board_sections.append(BoardSection(
+            id=section_id,
+            desk_id=1,
+            name=f"Section {section_id}",
+            order=section_id,
+            version=1,
+            created_at=now,
+            updated_at=now,
+            tickets=tickets,
+        ))
+    return BoardResponse(desk_id=1, desk_name="Benchmark", sections=board_sections)
+
+
+def compact(content: dict) -> dict:
+    # Same layout as app.board.compact_board_response produces
+    return {
+        "desk_id": content["desk_id"],
+        "desk_name": content["desk_name"],
+        "ticket_fields": TICKET_FIELDS,
+        "priorities": PRIORITY_CODES,
+        "sections": [
+            {
+                **{key: value for key, value in section.items() if key != "tickets"},
+                "tickets": [
+                    [
+                        PRIORITY_CODES.index(ticket[field]) if field == "priority" else ticket[field]
+                        for field in TICKET_FIELDS
+                    ]
+                    for ticket in section["tickets"]
+                ],
+            }
+            for section in content["sections"]
+        ],
+    }
+
+
+def per_call_ms(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark board encoding: JSON vs MessagePack")
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--tickets", type=int, default=2000, help="tickets per section")
+    parser.add_argument("--number", type=int, default=10)
+    args = parser.parse_args()
+
+    board = build_board(args.sections, args.tickets)
+    dump_ms = per_call_ms(lambda: board.model_dump(mode="json"), args.number)
+    full = board.model_dump(mode="json")
+    short = compact(full)
+
+    render_json = JSONResponse(None).render
+    cases = [
+        ("full json", lambda: render_json(full)),
+        ("full msgpack", lambda: packb(full)),
+        ("compact json", lambda: render_json(short)),
+        ("compact msgpack", lambda: packb(short)),
+    ]
+
+    print(f"{args.sections * args.tickets} tickets, model dump {dump_ms:.2f} ms (shared by all formats)")
+    baseline_size = len(cases[0][1]())
+    for name, encode in cases:
+        body = encode()
+        ms = per_call_ms(encode, args.number)
+        size = len(body)
+        gzipped = len(gzip.compress(body, compresslevel=6))
+        print(
+            f"{name:<16} {ms:8.2f} ms  {size / 1024:9.1f} KiB ({size / baseline_size:5.1%})"
+            f"  gzip {gzipped / 1024:8.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Pick password hashing cost for this machine.
+
+Measures verification time for increasing cost parameters and prints the
+most expensive setting that still fits the target latency, as .env lines.
+Existing hashes are upgraded on the next login after the cost changes.
+
+    python calibrate_hashing.py --target-ms 250
+    python calibrate_hashing.py --scheme argon2 --target-ms 250
+"""
+import argparse
+import time
+
+from app.auth import build_pwd_context
+from app.config import settings
+
+PASSWORD = "calibration-password"
+
+
+def verify_ms(context, repeat: int) -> float:
+    hashed = context.hash(PASSWORD)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        context.verify(PASSWORD, hashed)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def calibrate_bcrypt(target_ms: float, repeat: int) -> dict:
+    best = None
+    for rounds in range(8, 20):
+        elapsed = verify_ms(build_pwd_context(["bcrypt"], bcrypt__rounds=rounds), repeat)
+        print(f"bcrypt rounds={rounds}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        best = rounds
+    return {"PASSWORD_SCHEMES": "bcrypt", "BCRYPT_ROUNDS": best or 8}
+
+
+def calibrate_argon2(target_ms: float, repeat: int, memory_cost: int, parallelism: int) -> dict:
+    best = None
+    for time_cost in range(1, 20):
+        context = build_pwd_context(
+            ["argon2"],
+            argon2__time_cost=time_cost,
+            argon2__memory_cost=memory_cost,
+            argon2__parallelism=parallelism,
+        )
+        elapsed = verify_ms(context, repeat)
+        print(f"argon2 time_cost={time_cost} memory_cost={memory_cost}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        best = time_cost
+    return {
+        # bcrypt stays in the list so existing hashes still verify and get upgraded
+        "PASSWORD_SCHEMES": "argon2,bcrypt",
+        "ARGON2_TIME_COST": best or 1,
+        "ARGON2_MEMORY_COST": memory_cost,
+        "ARGON2_PARALLELISM": parallelism,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate password hashing cost")
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--memory-cost", type=int, default=settings.ARGON2_MEMORY_COST, help="argon2, KiB")
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM, help="argon2")
+    args = parser.parse_args()
+
+    if args.scheme == "bcrypt":
+        result = calibrate_bcrypt(args.target_ms, args.repeat)
+    else:
+        result = calibrate_argon2(args.target_ms, args.repeat, args.memory_cost, args.parallelism)
+
+    print()
+    print("# Add to .env:")
+    for key, value in result.items():
+        print(f"{key}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ CREATE TABLE `teams`(
     `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
     `name` VARCHAR(255) NOT NULL,
     `owner_id` BIGINT UNSIGNED NOT NULL,
+    `shard` VARCHAR(32) NULL,
     `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
@@ -42,6 +43,8 @@ CREATE TABLE `section`(
     `desk_id` BIGINT UNSIGNED NOT NULL,
     `name` VARCHAR(255) NOT NULL,
     `order` INT NOT NULL,
+    `archive_after_days` INT NULL,
+    `version` INT NOT NULL DEFAULT 1,
     `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
@@ -52,9 +55,117 @@ CREATE TABLE `ticket`(
     `priority` ENUM('low', 'medium', 'high') NOT NULL DEFAULT 'medium',
     `complexity` INT NOT NULL DEFAULT 1,
     `section_id` BIGINT UNSIGNED NOT NULL,
+    `due_at` DATETIME NULL,
+    `comment_count` INT NOT NULL DEFAULT 0,
+    `version` INT NOT NULL DEFAULT 1,
     `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
+CREATE TABLE `ticket_assignee`(
+    `ticket_id` BIGINT UNSIGNED NOT NULL,
+    `user_id` BIGINT UNSIGNED NOT NULL,
+    `project_id` BIGINT UNSIGNED NOT NULL,
+    `priority_rank` SMALLINT NOT NULL,
+    `ticket_updated_at` TIMESTAMP NOT NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY(`ticket_id`, `user_id`)
+);
+CREATE TABLE `ticket_comment`(
+    `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `ticket_id` BIGINT UNSIGNED NOT NULL,
+    `user_id` BIGINT UNSIGNED NOT NULL,
+    `body` TEXT NOT NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE `ticket_archive`(
+    `id` BIGINT UNSIGNED NOT NULL PRIMARY KEY,
+    `name` VARCHAR(50) NOT NULL,
+    `task` TEXT NOT NULL,
+    `priority` ENUM('low', 'medium', 'high') NOT NULL,
+    `complexity` INT NOT NULL,
+    `section_id` BIGINT UNSIGNED NOT NULL,
+    `due_at` DATETIME NULL,
+    `comment_count` INT NOT NULL DEFAULT 0,
+    `version` INT NOT NULL,
+    `created_at` TIMESTAMP NULL,
+    `updated_at` TIMESTAMP NULL,
+    `archived_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE `ticket_archive_assignee`(
+    `ticket_id` BIGINT UNSIGNED NOT NULL,
+    `user_id` BIGINT UNSIGNED NOT NULL,
+    `project_id` BIGINT UNSIGNED NOT NULL,
+    `created_at` TIMESTAMP NULL,
+    PRIMARY KEY(`ticket_id`, `user_id`)
+);
+CREATE TABLE `import_job`(
+    `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `project_id` BIGINT UNSIGNED NOT NULL,
+    `user_id` BIGINT UNSIGNED NOT NULL,
+    `format` VARCHAR(10) NOT NULL,
+    `status` VARCHAR(20) NOT NULL DEFAULT 'pending',
+    `rows_processed` INT NOT NULL DEFAULT 0,
+    `tickets_created` INT NOT NULL DEFAULT 0,
+    `sections_created` INT NOT NULL DEFAULT 0,
+    `errors` TEXT NULL,
+    `error` VARCHAR(255) NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+CREATE TABLE `job`(
+    `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `name` VARCHAR(100) NOT NULL,
+    `payload` TEXT NULL,
+    `status` VARCHAR(20) NOT NULL DEFAULT 'pending',
+    `attempts` INT NOT NULL DEFAULT 0,
+    `max_attempts` INT NOT NULL DEFAULT 5,
+    `run_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `dedup_key` VARCHAR(150) NULL UNIQUE,
+    `locked_by` VARCHAR(100) NULL,
+    `locked_at` TIMESTAMP NULL,
+    `last_error` TEXT NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+CREATE TABLE `refresh_token`(
+    `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `jti` VARCHAR(32) NOT NULL UNIQUE,
+    `family_id` VARCHAR(32) NOT NULL,
+    `user_id` BIGINT UNSIGNED NOT NULL,
+    `expires_at` TIMESTAMP NOT NULL,
+    `used_at` TIMESTAMP NULL,
+    `revoked_at` TIMESTAMP NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE `desk_template`(
+    `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `team_id` BIGINT UNSIGNED NOT NULL,
+    `name` VARCHAR(255) NOT NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+CREATE TABLE `desk_template_section`(
+    `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `template_id` BIGINT UNSIGNED NOT NULL,
+    `name` VARCHAR(255) NOT NULL,
+    `order` INT NOT NULL
+);
+CREATE TABLE `activity`(
+    `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `project_id` BIGINT UNSIGNED NOT NULL,
+    `user_id` BIGINT UNSIGNED NOT NULL,
+    `entity_type` VARCHAR(20) NOT NULL,
+    `entity_id` BIGINT UNSIGNED NOT NULL,
+    `action` VARCHAR(20) NOT NULL,
+    `changes` TEXT NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE `project_shard`(
+    `project_id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    `team_id` BIGINT UNSIGNED NOT NULL,
+    `shard` VARCHAR(32) NOT NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
 ALTER TABLE
     `teams` ADD CONSTRAINT `teams_owner_id_foreign` FOREIGN KEY(`owner_id`) REFERENCES `user`(`id`) ON DELETE CASCADE;
 ALTER TABLE
@@ -73,10 +184,71 @@ ALTER TABLE
     `section` ADD CONSTRAINT `section_desk_id_foreign` FOREIGN KEY(`desk_id`) REFERENCES `desk`(`id`) ON DELETE CASCADE;
 ALTER TABLE
     `ticket` ADD CONSTRAINT `ticket_section_id_foreign` FOREIGN KEY(`section_id`) REFERENCES `section`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `ticket_archive` ADD CONSTRAINT `ticket_archive_section_id_foreign` FOREIGN KEY(`section_id`) REFERENCES `section`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `ticket_archive_assignee` ADD CONSTRAINT `ticket_archive_assignee_ticket_id_foreign` FOREIGN KEY(`ticket_id`) REFERENCES `ticket_archive`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `ticket_archive_assignee` ADD CONSTRAINT `ticket_archive_assignee_user_id_foreign` FOREIGN KEY(`user_id`) REFERENCES `user`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `ticket_archive_assignee` ADD CONSTRAINT `ticket_archive_assignee_project_id_foreign` FOREIGN KEY(`project_id`) REFERENCES `projects`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `import_job` ADD CONSTRAINT `import_job_project_id_foreign` FOREIGN KEY(`project_id`) REFERENCES `projects`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `import_job` ADD CONSTRAINT `import_job_user_id_foreign` FOREIGN KEY(`user_id`) REFERENCES `user`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `refresh_token` ADD CONSTRAINT `refresh_token_user_id_foreign` FOREIGN KEY(`user_id`) REFERENCES `user`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `desk_template` ADD CONSTRAINT `desk_template_team_id_foreign` FOREIGN KEY(`team_id`) REFERENCES `teams`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `desk_template_section` ADD CONSTRAINT `desk_template_section_template_id_foreign` FOREIGN KEY(`template_id`) REFERENCES `desk_template`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `activity` ADD CONSTRAINT `activity_project_id_foreign` FOREIGN KEY(`project_id`) REFERENCES `projects`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `activity` ADD CONSTRAINT `activity_user_id_foreign` FOREIGN KEY(`user_id`) REFERENCES `user`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `ticket_assignee` ADD CONSTRAINT `ticket_assignee_ticket_id_foreign` FOREIGN KEY(`ticket_id`) REFERENCES `ticket`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `ticket_assignee` ADD CONSTRAINT `ticket_assignee_user_id_foreign` FOREIGN KEY(`user_id`) REFERENCES `user`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `ticket_assignee` ADD CONSTRAINT `ticket_assignee_project_id_foreign` FOREIGN KEY(`project_id`) REFERENCES `projects`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `ticket_comment` ADD CONSTRAINT `ticket_comment_user_id_foreign` FOREIGN KEY(`user_id`) REFERENCES `user`(`id`) ON DELETE CASCADE;
+ALTER TABLE
+    `project_shard` ADD CONSTRAINT `project_shard_team_id_foreign` FOREIGN KEY(`team_id`) REFERENCES `teams`(`id`) ON DELETE CASCADE;
 
 -- Create indexes for better performance
 CREATE INDEX `idx_user_email` ON `user`(`email`);
 CREATE INDEX `idx_projects_owner` ON `projects`(`owner_id`);
 CREATE INDEX `idx_projects_team` ON `projects`(`team_id`);
 CREATE INDEX `idx_section_desk` ON `section`(`desk_id`);
-CREATE INDEX `idx_ticket_section` ON `ticket`(`section_id`);
\ No newline at end of file
+CREATE INDEX `idx_ticket_section` ON `ticket`(`section_id`);
+CREATE INDEX `idx_ticket_section_updated` ON `ticket`(`section_id`, `updated_at`);
+CREATE INDEX `idx_ticket_section_due` ON `ticket`(`section_id`, `due_at`);
+CREATE INDEX `idx_ticket_assignee_user_rank` ON `ticket_assignee`(`user_id`, `priority_rank`, `ticket_id`, `project_id`);
+CREATE INDEX `idx_ticket_assignee_user_updated` ON `ticket_assignee`(`user_id`, `ticket_updated_at`, `ticket_id`, `project_id`);
+CREATE INDEX `idx_ticket_comment_ticket` ON `ticket_comment`(`ticket_id`, `id`);
+CREATE INDEX `idx_ticket_archive_section` ON `ticket_archive`(`section_id`, `id`);
+CREATE INDEX `idx_import_job_project` ON `import_job`(`project_id`);
+CREATE INDEX `idx_job_status_run_at` ON `job`(`status`, `run_at`);
+CREATE INDEX `idx_refresh_token_family` ON `refresh_token`(`family_id`);
+CREATE INDEX `idx_refresh_token_user` ON `refresh_token`(`user_id`);
+CREATE INDEX `idx_refresh_token_revoked` ON `refresh_token`(`revoked_at`);
+CREATE INDEX `idx_desk_template_team` ON `desk_template`(`team_id`);
+CREATE INDEX `idx_desk_template_section_template` ON `desk_template_section`(`template_id`);
+CREATE INDEX `idx_activity_project` ON `activity`(`project_id`, `id`);
+CREATE INDEX `idx_project_shard_team` ON `project_shard`(`team_id`);
+
+-- Existing projects stay in the main database:
+-- INSERT INTO `project_shard` (`project_id`, `team_id`, `shard`, `created_at`)
+--     SELECT `id`, `team_id`, 'default', `created_at` FROM `projects`;
+
+-- Sort keys of existing assignments (ticket_assignee):
+-- UPDATE `ticket_assignee` a JOIN `ticket` t ON t.`id` = a.`ticket_id`
+--     SET a.`priority_rank` = CASE t.`priority` WHEN 'high' THEN 0 WHEN 'medium' THEN 1 ELSE 2 END,
+--         a.`ticket_updated_at` = t.`updated_at`;
+
+-- Due dates after 2038 (TIMESTAMP -> DATETIME, stored values are UTC):
+-- SET time_zone = '+00:00';
+-- ALTER TABLE `ticket` MODIFY `due_at` DATETIME NULL;
+-- ALTER TABLE `ticket_archive` MODIFY `due_at` DATETIME NULL;
@@ -2,12 +2,13 @@
 Database initialization script.
 Run this to create all tables if they don't exist.
 """
-from app.database import engine, Base
+from app.database import shard_engines
 from app.models import User, Team, Desk, Project, Section, Ticket, UserToTeam
+from app.sharding import create_schema
 
 if __name__ == "__main__":
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    create_schema(shard_engines)
     print("Database tables created successfully!")
 
 
@@ -1,17 +1,83 @@
-from fastapi import FastAPI
+import hmac
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, user, teams, projects, sections, tasks
-from app.database import engine, Base
+from app.routers import auth, user, teams, projects, sections, tasks, batch
+from app.database import shard_engines
+from app.sharding import create_schema
+from app.idempotency import IdempotencyMiddleware
+from app.logging_config import RequestLoggingMiddleware
+from app.monitoring import loop_monitor, blocking_detector, metrics_snapshot
+from app.activity import activity_log
+from app.jobs import job_runner
+from app.revocation import revocation_list
+from app.config import settings
+from app import archive, tokens  # noqa: F401  register job handlers
+from app.ratelimit import RateLimitMiddleware, LoadSheddingMiddleware
+from app.negotiation import (
+    ContentNegotiationMiddleware,
+    NegotiatedResponse,
+    http_exception_handler,
+    request_validation_exception_handler,
+)
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables (on every shard, if configured). serve.py does
+    # this once in the master and turns it off for the workers
+    if settings.CREATE_SCHEMA_ON_STARTUP:
+        create_schema(shard_engines)
+    loop_monitor.start()
+    blocking_detector.start()
+    activity_log.start()
+    revocation_list.start()
+    job_runner.schedule("auth.purge_refresh_tokens", 24 * 60 * 60)
+    job_runner.schedule("jobs.purge", 24 * 60 * 60)
+    if settings.ARCHIVE_ENABLED:
+        job_runner.schedule("tickets.archive", settings.ARCHIVE_INTERVAL_SECONDS)
+    if settings.JOBS_ENABLED:
+        job_runner.start()
+    yield
+    await job_runner.stop()
+    await revocation_list.stop()
+    await activity_log.stop()
+    blocking_detector.stop()
+    await loop_monitor.stop()
+    # Close pooled connections once in-flight requests have drained
+    for engine in shard_engines.values():
+        engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Kaban X API",
     description="Backend API for Kaban X project management system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # JSON or MessagePack depending on the Accept header
+    default_response_class=NegotiatedResponse,
+    exception_handlers={
+        StarletteHTTPException: http_exception_handler,
+        RequestValidationError: request_validation_exception_handler,
+    },
 )
 
+# Idempotency-Key support for POST endpoints
+app.add_middleware(IdempotencyMiddleware)
+
+# Per-user / per-IP rate limiting and load shedding under overload
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(LoadSheddingMiddleware)
+
+# Request ids and structured access log
+app.add_middleware(RequestLoggingMiddleware)
+
+# Accept: application/msgpack switches responses to MessagePack
+app.add_middleware(ContentNegotiationMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +94,7 @@ app.include_router(teams.router)
 app.include_router(projects.router)
 app.include_router(sections.router)
 app.include_router(tasks.router)
+app.include_router(batch.router)
 
 
 @app.get("/")
@@ -43,3 +110,12 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(x_metrics_token: Optional[str] = Header(None)):
+    # Internal endpoint: disabled unless METRICS_TOKEN is configured
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return metrics_snapshot()
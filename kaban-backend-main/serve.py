@@ -0,0 +1,100 @@
+"""
+Production entry point.
+
+Runs the API in several worker processes: gunicorn with uvicorn workers
+(uvloop + httptools) when gunicorn is available, plain uvicorn otherwise.
+
+    python serve.py --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+
+from app.config import settings
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn is not available on Windows
+    BaseApplication = None
+    UvicornWorker = None
+
+KabanApplication = None
+
+
+if UvicornWorker is not None:
+    class KabanUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+
+    class KabanApplication(BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+
+def resolve_workers(requested: int) -> int:
+    return requested if requested > 0 else multiprocessing.cpu_count()
+
+
+def prepare_database():
+    # Create tables once in the master so workers don't race on DDL
+    from app.database import shard_engines
+    from app.sharding import create_schema
+    create_schema(shard_engines)
+    for engine in shard_engines.values():
+        engine.dispose()
+    os.environ["CREATE_SCHEMA_ON_STARTUP"] = "false"
+    settings.CREATE_SCHEMA_ON_STARTUP = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Kaban X API in production mode")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    parser.add_argument("--max-requests", type=int, default=settings.WORKER_MAX_REQUESTS)
+    args = parser.parse_args()
+
+    workers = resolve_workers(args.workers)
+    # Workers size their DB pools from the shared connection budget
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    settings.WEB_CONCURRENCY = workers
+
+    prepare_database()
+
+    if KabanApplication is None:
+        import uvicorn
+        # uvicorn 0.24 does not respawn recycled workers, so no max requests here
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            timeout_keep_alive=settings.WORKER_KEEPALIVE,
+            timeout_graceful_shutdown=settings.WORKER_GRACEFUL_TIMEOUT,
+        )
+        return
+
+    KabanApplication({
+        "bind": f"{args.host}:{args.port}",
+        "workers": workers,
+        "worker_class": "serve.KabanUvicornWorker",
+        "max_requests": args.max_requests,
+        "max_requests_jitter": settings.WORKER_MAX_REQUESTS_JITTER,
+        "timeout": settings.WORKER_TIMEOUT,
+        "graceful_timeout": settings.WORKER_GRACEFUL_TIMEOUT,
+        "keepalive": settings.WORKER_KEEPALIVE,
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
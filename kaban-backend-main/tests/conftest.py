@@ -1,14 +1,19 @@
 import pytest
 from unittest.mock import patch
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.database import Base, get_db
-from app.models import User
+from app.models import Team, User, UserToTeam
 from main import app
-from app.auth import get_password_hash
+from app.auth import create_access_token, get_password_hash
+from app.ratelimit import rate_limit_backend
+from app.activity import activity_log
+from app.config import settings
+from app.jobs import job_runner
+from app.revocation import revocation_list
 
 
 # Тестовая база данных в памяти (SQLite для тестов)
@@ -19,7 +24,13 @@ engine = create_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Фоновые компоненты пишут в тестовую БД; задания в тестах запускаются явно
+activity_log.session_factory = TestingSessionLocal
+job_runner.session_factory = TestingSessionLocal
+revocation_list.session_factory = TestingSessionLocal
+settings.JOBS_ENABLED = False
 
 
 @pytest.fixture(scope="function")
@@ -42,6 +53,11 @@ def client(db):
             yield db
         finally:
             pass
+
+    # Сбрасываем лимиты запросов между тестами
+    rate_limit_backend.clear()
+    activity_log.clear()
+    revocation_list.clear()
     
     # Мокаем отправку email для всех тестов
     with patch('app.routers.auth.send_activation_email', return_value=True), \
@@ -52,6 +68,19 @@ def client(db):
         app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def statements(db):
+    """SQL-запросы, выполненные за время теста (перед проверяемым вызовом список очищают)"""
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(db.bind, "before_cursor_execute", record)
+    yield executed
+    event.remove(db.bind, "before_cursor_execute", record)
+
+
 @pytest.fixture
 def test_user(db):
     """Создает тестового пользователя"""
@@ -80,3 +109,63 @@ def inactive_user(db):
     db.commit()
     db.refresh(user)
     return user
+
+
+@pytest.fixture
+def auth_headers(test_user):
+    """Заголовок с access-токеном тестового пользователя"""
+    token = create_access_token(data={"sub": test_user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def team(db, test_user):
+    """Команда тестового пользователя"""
+    team = Team(name="My Team", owner_id=test_user.id)
+    db.add(team)
+    db.commit()
+    return team
+
+
+@pytest.fixture
+def project(client, team, auth_headers):
+    """Проект команды, созданный через API"""
+    return client.post(
+        "/projects",
+        headers=auth_headers,
+        json={"name": "Project", "team_id": team.id}
+    ).json()
+
+
+@pytest.fixture
+def projects(client, db, team, test_user, auth_headers):
+    """Два проекта команды тестового пользователя; section_id - первая колонка доски"""
+    db.add(UserToTeam(user_id=test_user.id, team_id=team.id))
+    db.commit()
+    created = []
+    for i in range(2):
+        project = client.post("/projects", headers=auth_headers, json={"name": f"Project {i}", "team_id": team.id}).json()
+        board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+        project["section_id"] = board["sections"][0]["id"]
+        created.append(project)
+    return created
+
+
+@pytest.fixture
+def create_task(client, auth_headers):
+    """Создаёт задачу в колонке section_id проекта из projects"""
+    def create(project, name, **fields):
+        return client.post(
+            f"/projects/{project['id']}/tasks",
+            headers=auth_headers,
+            json={"name": name, "task": "Do it", "section_id": project["section_id"], **fields}
+        ).json()
+    return create
+
+
+@pytest.fixture
+def board(client, project, auth_headers):
+    """Доска проекта с колонками по умолчанию, без задач"""
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    board["project_id"] = project["id"]
+    return board
@@ -0,0 +1,96 @@
+import pytest
+from fastapi import status
+from app import activity
+from app.activity import ActivityLog, activity_log
+
+
+def test_activity_feed(client, db, board, auth_headers):
+    """Тест журнала действий: создание и перемещение задачи"""
+    project_id = board["project_id"]
+    task = client.post(
+        f"/projects/{project_id}/tasks",
+        headers=auth_headers,
+        json={"name": "Task", "task": "Do it", "section_id": board["sections"][0]["id"]}
+    ).json()
+    client.patch(
+        f"/projects/{project_id}/tasks/{task['id']}",
+        headers=auth_headers,
+        json={"section_id": board["sections"][1]["id"]}
+    )
+    assert activity_log.flush(db) == 3
+
+    response = client.get(f"/projects/{project_id}/activity", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [(item["entity_type"], item["action"]) for item in data["items"]] == [
+        ("ticket", "moved"),
+        ("ticket", "created"),
+        ("project", "created"),
+    ]
+    assert data["items"][0]["changes"] == {"section_id": board["sections"][1]["id"]}
+    assert data["next_before_id"] is None
+
+
+def test_activity_pagination(client, db, board, auth_headers):
+    """Тест постраничного чтения журнала по before_id"""
+    project_id = board["project_id"]
+    for i in range(4):
+        client.post(
+            f"/projects/{project_id}/sections",
+            headers=auth_headers,
+            json={"name": f"Column {i}", "order": 10 + i}
+        )
+    activity_log.flush(db)
+
+    url = f"/projects/{project_id}/activity"
+    first = client.get(url, headers=auth_headers, params={"limit": 3}).json()
+    assert len(first["items"]) == 3
+    assert first["next_before_id"] == first["items"][-1]["id"]
+
+    second = client.get(
+        url, headers=auth_headers, params={"limit": 3, "before_id": first["next_before_id"]}
+    ).json()
+    assert len(second["items"]) == 2
+    assert second["next_before_id"] is None
+    ids = [item["id"] for item in first["items"] + second["items"]]
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_activity_buffer_overflow():
+    """Тест: при переполнении буфера записи отбрасываются, а не блокируют запрос"""
+    log = ActivityLog(max_buffer=2, batch_size=10, flush_interval=1)
+    for i in range(3):
+        log.record(project_id=1, user_id=1, entity_type="ticket", entity_id=i, action="created")
+    assert log.dropped == 1
+
+
+def test_flush_requeues_only_failed_shard(monkeypatch):
+    """Тест: при сбое второго шарда в буфер возвращаются только его строки"""
+    log = ActivityLog(max_buffer=10, batch_size=10, flush_interval=1)
+    for project_id in (1, 2, 3):
+        log.record(project_id=project_id, user_id=1, entity_type="ticket", entity_id=1, action="created")
+    monkeypatch.setattr(
+        activity, "group_by_project_shard", lambda db, rows: {"eu": rows[:2], "us": rows[2:]}
+    )
+    written = []
+
+    class ShardSession:
+        shard = None
+        pending = []
+
+        def execute(self, statement, rows):
+            if self.shard == "us":
+                raise RuntimeError("us shard is down")
+            self.pending = rows
+
+        def commit(self):
+            written.extend(self.pending)
+
+        def rollback(self):
+            self.pending = []
+
+    with pytest.raises(RuntimeError):
+        log.flush(ShardSession())
+
+    assert [row["project_id"] for row in written] == [1, 2]
+    assert [row["project_id"] for row in log._buffer] == [3]
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from sqlalchemy import update
+from app.models import Ticket, TicketArchive, TicketArchiveAssignee, TicketAssignee, utcnow
+from app import archive
+from app.archive import archive_tickets
+
+
+def _create_tasks(client, board, auth_headers, section_id, count):
+    return [
+        client.post(
+            f"/projects/{board['project_id']}/tasks",
+            headers=auth_headers,
+            json={"name": f"Task {i}", "task": "Do it", "section_id": section_id}
+        ).json()
+        for i in range(count)
+    ]
+
+
+def test_archive_stale_tickets(client, db, board, auth_headers, test_user):
+    """Тест архивации: старые задачи из колонки с archive_after_days уходят в архив"""
+    todo, done = board["sections"][0]["id"], board["sections"][2]["id"]
+    response = client.patch(
+        f"/projects/{board['project_id']}/sections/{done}",
+        headers=auth_headers,
+        json={"archive_after_days": 7}
+    )
+    assert response.json()["archive_after_days"] == 7
+
+    stale = _create_tasks(client, board, auth_headers, done, 5)
+    fresh = _create_tasks(client, board, auth_headers, done, 1)
+    _create_tasks(client, board, auth_headers, todo, 1)
+
+    response = client.post(
+        f"/projects/{board['project_id']}/tasks/{stale[0]['id']}/assignees",
+        headers=auth_headers,
+        json={"user_id": test_user.id}
+    )
+    assert response.status_code == 201
+
+    old = utcnow() - timedelta(days=30)
+    db.execute(update(Ticket).where(Ticket.id.in_([t["id"] for t in stale])).values(updated_at=old))
+    db.commit()
+
+    assert archive_tickets(db, batch_size=2) == 5
+    assert db.query(TicketArchive).count() == 5
+    # Исполнители уезжают в архив вместе с задачей
+    assert db.query(TicketAssignee).count() == 0
+    assert [row.ticket_id for row in db.query(TicketArchiveAssignee)] == [stale[0]["id"]]
+    assert archive_tickets(db, batch_size=2) == 0
+
+    board_data = client.get(f"/projects/{board['project_id']}/board", headers=auth_headers).json()
+    assert [t["id"] for t in board_data["sections"][2]["tickets"]] == [fresh[0]["id"]]
+    assert len(board_data["sections"][0]["tickets"]) == 1
+
+    url = f"/projects/{board['project_id']}/archive"
+    first = client.get(url, headers=auth_headers, params={"limit": 3}).json()
+    assert [t["id"] for t in first["items"]] == [t["id"] for t in reversed(stale)][:3]
+    assert first["items"][0]["archived_at"] is not None
+
+    second = client.get(
+        url, headers=auth_headers, params={"limit": 3, "before_id": first["next_before_id"]}
+    ).json()
+    assert len(second["items"]) == 2
+    assert second["next_before_id"] is None
+
+
+def test_archive_disabled_by_default(client, db, board, auth_headers):
+    """Тест: без archive_after_days задачи не архивируются"""
+    tasks = _create_tasks(client, board, auth_headers, board["sections"][2]["id"], 2)
+    db.execute(update(Ticket).where(Ticket.id.in_([t["id"] for t in tasks])).values(
+        updated_at=utcnow() - timedelta(days=365)
+    ))
+    db.commit()
+
+    assert archive_tickets(db, batch_size=10) == 0
+
+
+def test_archive_skips_ticket_edited_during_move(client, db, board, auth_headers, monkeypatch):
+    """Тест: задача, изменённая между выборкой id и переносом, остаётся на доске"""
+    done = board["sections"][2]["id"]
+    client.patch(
+        f"/projects/{board['project_id']}/sections/{done}", headers=auth_headers, json={"archive_after_days": 7}
+    )
+    tasks = _create_tasks(client, board, auth_headers, done, 2)
+    db.execute(update(Ticket).where(Ticket.id.in_([t["id"] for t in tasks])).values(
+        updated_at=utcnow() - timedelta(days=30)
+    ))
+    db.commit()
+
+    select_ids = archive._stale_ids
+
+    def edited_after_select(*args):
+        ids = select_ids(*args)
+        db.execute(update(Ticket).where(Ticket.id == tasks[0]["id"]).values(name="Edited", updated_at=utcnow()))
+        return ids
+
+    monkeypatch.setattr(archive, "_stale_ids", edited_after_select)
+
+    assert archive_tickets(db, batch_size=10) == 1
+    assert [row.id for row in db.query(TicketArchive).all()] == [tasks[1]["id"]]
+    board_data = client.get(f"/projects/{board['project_id']}/board", headers=auth_headers).json()
+    assert [t["name"] for t in board_data["sections"][2]["tickets"]] == ["Edited"]
@@ -0,0 +1,174 @@
+import pytest
+from datetime import datetime
+from fastapi import status
+from app.models import Ticket, TicketAssignee, User, UserToTeam
+from app.auth import create_access_token, get_password_hash
+
+
+@pytest.fixture
+def teammate(db, team):
+    """Второй участник команды проектов из projects"""
+    user = User(username="teammate", email="teammate@example.com", password=get_password_hash("testpassword123"))
+    db.add(user)
+    db.commit()
+    db.add(UserToTeam(user_id=user.id, team_id=team.id))
+    db.commit()
+    return user
+
+
+def assign(client, headers, project, task, user_id):
+    return client.post(
+        f"/projects/{project['id']}/tasks/{task['id']}/assignees",
+        headers=headers,
+        json={"user_id": user_id}
+    )
+
+
+def test_assign_and_unassign(client, projects, auth_headers, test_user, teammate, create_task):
+    """Тест: назначение и снятие исполнителей"""
+    project = projects[0]
+    task = create_task(project, "Task")
+
+    response = assign(client, auth_headers, project, task, teammate.id)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [user["id"] for user in response.json()] == [teammate.id]
+
+    assign(client, auth_headers, project, task, test_user.id)
+    response = assign(client, auth_headers, project, task, teammate.id)
+    assert [user["id"] for user in response.json()] == sorted([teammate.id, test_user.id])
+
+    path = f"/projects/{project['id']}/tasks/{task['id']}/assignees"
+    assert client.delete(f"{path}/{teammate.id}", headers=auth_headers).status_code == status.HTTP_204_NO_CONTENT
+    assert client.delete(f"{path}/{teammate.id}", headers=auth_headers).status_code == status.HTTP_404_NOT_FOUND
+    assert [user["id"] for user in client.get(path, headers=auth_headers).json()] == [test_user.id]
+
+
+def test_assign_outsider(client, db, projects, auth_headers, create_task):
+    """Тест: назначить можно только участника проекта"""
+    outsider = User(username="outsider", email="outsider@example.com", password=get_password_hash("testpassword123"))
+    db.add(outsider)
+    db.commit()
+    task = create_task(projects[0], "Task")
+
+    response = assign(client, auth_headers, projects[0], task, outsider.id)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_my_tasks_by_priority(client, projects, auth_headers, test_user, teammate, create_task):
+    """Тест: задачи пользователя из всех проектов постранично по приоритету"""
+    expected = []
+    for project in projects:
+        for priority in ("low", "high", "medium"):
+            task = create_task(project, f"{priority} {project['id']}", priority=priority)
+            assign(client, auth_headers, project, task, test_user.id)
+            expected.append(task)
+        # Чужая задача в том же проекте
+        other = create_task(project, "Not mine", priority="high")
+        assign(client, auth_headers, project, other, teammate.id)
+
+    rank = {"high": 0, "medium": 1, "low": 2}
+    expected.sort(key=lambda task: (rank[task["priority"]], task["id"]))
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/user/me/tasks", headers=auth_headers, params=params).json()
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [task["id"] for task in seen] == [task["id"] for task in expected]
+    assert {task["project_name"] for task in seen} == {"Project 0", "Project 1"}
+
+
+def test_my_tasks_by_updated_at(client, db, projects, auth_headers, test_user, create_task):
+    """Тест: сортировка по времени изменения, новые сначала"""
+    tasks = [create_task(projects[i % 2], f"Task {i}") for i in range(3)]
+    for i, (task, day) in enumerate(zip(tasks, (3, 1, 2))):
+        assign(client, auth_headers, projects[i % 2], task, test_user.id)
+        db.query(Ticket).filter(Ticket.id == task["id"]).update({"updated_at": datetime(2030, 1, day)})
+        db.query(TicketAssignee).filter(TicketAssignee.ticket_id == task["id"]).update(
+            {"ticket_updated_at": datetime(2030, 1, day)}
+        )
+    db.commit()
+
+    first = client.get("/user/me/tasks?sort=updated_at&limit=2", headers=auth_headers).json()
+    rest = client.get(
+        "/user/me/tasks", headers=auth_headers, params={"sort": "updated_at", "cursor": first["next_cursor"]}
+    ).json()
+
+    assert [task["id"] for task in first["items"] + rest["items"]] == [tasks[0]["id"], tasks[2]["id"], tasks[1]["id"]]
+    assert rest["next_cursor"] is None
+
+
+def test_my_tasks_follow_ticket_updates(client, db, projects, auth_headers, test_user, create_task):
+    """Тест: изменение задачи переносится в ключи сортировки назначений"""
+    project = projects[0]
+    low, high = (create_task(project, name, priority=name) for name in ("low", "high"))
+    for task in (low, high):
+        assign(client, auth_headers, project, task, test_user.id)
+
+    response = client.patch(
+        f"/projects/{project['id']}/tasks/{low['id']}", headers=auth_headers, json={"priority": "high"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    row = db.query(TicketAssignee).filter(TicketAssignee.ticket_id == low["id"]).populate_existing().one()
+    assert row.priority_rank == 0
+    assert row.ticket_updated_at.isoformat() == response.json()["updated_at"]
+
+    items = client.get("/user/me/tasks?sort=priority", headers=auth_headers).json()["items"]
+    assert [task["id"] for task in items] == sorted([low["id"], high["id"]])
+
+
+def test_my_tasks_skip_boards(client, projects, auth_headers, test_user, statements, create_task):
+    """Тест: задачи пользователя без чтения колонок и досок"""
+    task = create_task(projects[0], "Task")
+    assign(client, auth_headers, projects[0], task, test_user.id)
+    statements.clear()
+    response = client.get("/user/me/tasks", headers=auth_headers)
+
+    assert [item["id"] for item in response.json()["items"]] == [task["id"]]
+    assert not any("FROM section" in s or "JOIN section" in s or "desk" in s for s in statements)
+
+
+@pytest.mark.parametrize("sort", ["priority", "updated_at"])
+def test_my_tasks_in_index_order(client, db, projects, auth_headers, test_user, statements, sort, create_task):
+    """Тест: страница читается по индексу назначений без отдельной сортировки"""
+    for name in ("First", "Second"):
+        assign(client, auth_headers, projects[0], create_task(projects[0], name), test_user.id)
+    first = client.get("/user/me/tasks", headers=auth_headers, params={"sort": sort, "limit": 1}).json()
+    statements.clear()
+    client.get("/user/me/tasks", headers=auth_headers, params={"sort": sort, "cursor": first["next_cursor"]})
+
+    query = next(s for s in statements if "FROM ticket_assignee" in s)
+    plan = " ".join(
+        row[-1] for row in db.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + query, (None,) * query.count("?")
+        )
+    )
+    assert "idx_ticket_assignee_user_" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_my_tasks_without_access(client, db, projects, auth_headers, teammate, create_task):
+    """Тест: после выхода из команды задачи её проектов не показываются"""
+    task = create_task(projects[0], "Task")
+    assign(client, auth_headers, projects[0], task, teammate.id)
+    teammate_headers = {"Authorization": f"Bearer {create_access_token(data={'sub': teammate.id})}"}
+    assert len(client.get("/user/me/tasks", headers=teammate_headers).json()["items"]) == 1
+
+    db.query(UserToTeam).filter(UserToTeam.user_id == teammate.id).delete()
+    db.commit()
+
+    assert client.get("/user/me/tasks", headers=teammate_headers).json()["items"] == []
+
+
+def test_my_tasks_invalid_cursor(client, auth_headers):
+    """Тест: некорректный курсор"""
+    response = client.get("/user/me/tasks?cursor=not-a-cursor", headers=auth_headers)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -1,7 +1,8 @@
 import pytest
 from fastapi import status
 from app.models import User
-from app.auth import create_access_token
+from app import auth
+from app.auth import build_pwd_context, create_access_token
 
 
 def test_register_success(client, db):
@@ -187,3 +188,40 @@ def test_reset_password_invalid_token(client):
     )
     assert response.status_code == status.HTTP_400_BAD_REQUEST
 
+
+def _login(client):
+    return client.post(
+        "/auth/login",
+        json={"email": "test@example.com", "password": "testpassword123"}
+    )
+
+
+def test_login_rehashes_outdated_cost(client, db, test_user, monkeypatch):
+    """Тест: при входе хеш с устаревшей стоимостью пересчитывается"""
+    test_user.password = build_pwd_context(["bcrypt"], bcrypt__rounds=4).hash("testpassword123")
+    db.commit()
+    monkeypatch.setattr(auth, "pwd_context", build_pwd_context(["bcrypt"], bcrypt__rounds=5))
+
+    assert _login(client).status_code == status.HTTP_200_OK
+    db.refresh(test_user)
+    assert test_user.password.startswith("$2b$05$")
+
+    # Повторный вход хеш не трогает
+    password = test_user.password
+    assert _login(client).status_code == status.HTTP_200_OK
+    db.refresh(test_user)
+    assert test_user.password == password
+
+
+def test_login_migrates_scheme(client, db, test_user, monkeypatch):
+    """Тест: при смене схемы старый bcrypt-хеш заменяется новым"""
+    pytest.importorskip("argon2")
+    test_user.password = build_pwd_context(["bcrypt"], bcrypt__rounds=4).hash("testpassword123")
+    db.commit()
+    monkeypatch.setattr(auth, "pwd_context", build_pwd_context(
+        ["argon2", "bcrypt"], argon2__time_cost=1, argon2__memory_cost=1024, argon2__parallelism=1
+    ))
+
+    assert _login(client).status_code == status.HTTP_200_OK
+    db.refresh(test_user)
+    assert test_user.password.startswith("$argon2")
@@ -0,0 +1,138 @@
+import msgpack
+from fastapi import Request, status
+from app.config import settings
+from app.database import get_db
+from app.negotiation import MSGPACK_MEDIA_TYPE
+
+
+def test_batch_page_load(client, project, auth_headers):
+    """Тест: несколько GET в одном запросе совпадают с отдельными вызовами"""
+    paths = ["/user/me", "/teams", "/projects", f"/projects/{project['id']}/board"]
+    response = client.post(
+        "/batch",
+        headers=auth_headers,
+        json={"requests": [{"id": path, "path": path} for path in paths]}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["responses"]
+    assert [result["id"] for result in results] == paths
+    for path, result in zip(paths, results):
+        assert result["status"] == status.HTTP_200_OK
+        assert result["body"] == client.get(path, headers=auth_headers).json()
+
+
+def test_batch_authenticates_once(client, project, auth_headers, statements):
+    """Тест: пользователь загружается один раз на весь пакет"""
+    statements.clear()
+    client.post(
+        "/batch",
+        headers=auth_headers,
+        json={"requests": [{"path": "/user/me"}, {"path": "/teams"}, {"path": f"/projects/{project['id']}"}]}
+    )
+
+    assert len([s for s in statements if "FROM user" in s]) == 1
+
+
+def test_batch_writes_run_in_order(client, project, auth_headers):
+    """Тест: запись выполняется до следующих за ней чтений"""
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    section_id = board["sections"][0]["id"]
+    response = client.post(
+        "/batch",
+        headers=auth_headers,
+        json={"requests": [
+            {
+                "id": "create",
+                "method": "POST",
+                "path": f"/projects/{project['id']}/tasks",
+                "body": {"name": "Batched", "task": "Do it", "section_id": section_id}
+            },
+            {"id": "board", "path": f"/projects/{project['id']}/board"},
+        ]}
+    )
+
+    create, board = response.json()["responses"]
+    assert create["status"] == status.HTTP_201_CREATED
+    assert [t["name"] for t in board["body"]["sections"][0]["tickets"]] == ["Batched"]
+
+
+def test_batch_sessions(client, db, project, auth_headers):
+    """Тест: запись и одиночное чтение идут в сессии основного запроса, подряд идущие GET - каждый в своей"""
+    shared = []
+
+    def recording_get_db(request: Request):
+        shared.append(getattr(request.state, "batch_db", None))
+        yield db
+
+    client.app.dependency_overrides[get_db] = recording_get_db
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    shared.clear()
+    response = client.post(
+        "/batch",
+        headers=auth_headers,
+        json={"requests": [
+            {"path": "/user/me"},
+            {"path": f"/projects/{project['id']}"},
+            {
+                "method": "POST",
+                "path": f"/projects/{project['id']}/tasks",
+                "body": {"name": "Batched", "task": "Do it", "section_id": board["sections"][0]["id"]}
+            },
+            {"path": f"/projects/{project['id']}/board"},
+        ]}
+    )
+
+    assert [result["status"] for result in response.json()["responses"]] == [200, 200, 201, 200]
+    # Первая запись - сам POST /batch
+    assert shared[1:] == [None, None, db, db]
+
+
+def test_batch_reports_errors_per_request(client, project, auth_headers):
+    """Тест: ошибки подзапросов не ломают остальной пакет"""
+    response = client.post(
+        "/batch",
+        headers=auth_headers,
+        json={"requests": [
+            {"path": "/projects/999999/board"},
+            {"path": "/no-such-endpoint"},
+            {"method": "POST", "path": "/auth/login", "body": {"email": "a@b.c", "password": "x"}},
+            {"method": "POST", "path": "/batch", "body": {"requests": []}},
+            {"method": "POST", "path": f"/projects/{project['id']}/tasks", "body": {"name": "No section"}},
+            {"path": "/user/me"},
+        ]}
+    )
+
+    results = response.json()["responses"]
+    assert [result["status"] for result in results] == [404, 404, 400, 400, 422, 200]
+    assert results[0]["body"] == {"detail": "Project not found"}
+    assert results[2]["body"] == {"detail": "Endpoint is not available in batch"}
+
+
+def test_batch_limit(client, auth_headers):
+    """Тест: слишком большой пакет отклоняется"""
+    requests = [{"path": "/user/me"}] * (settings.BATCH_MAX_REQUESTS + 1)
+    response = client.post("/batch", headers=auth_headers, json={"requests": requests})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_batch_requires_auth(client):
+    """Тест: пакет без токена"""
+    response = client.post("/batch", json={"requests": [{"path": "/user/me"}]})
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_batch_msgpack(client, project, auth_headers):
+    """Тест: пакет в MessagePack"""
+    response = client.post(
+        "/batch",
+        headers={**auth_headers, "Accept": MSGPACK_MEDIA_TYPE},
+        json={"requests": [{"path": "/user/me"}, {"path": f"/projects/{project['id']}/board"}]}
+    )
+
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    me, board = msgpack.unpackb(response.content)["responses"]
+    assert me["body"] == client.get("/user/me", headers=auth_headers).json()
+    assert board["body"]["desk_id"] == project["desk_id"]
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import status
+from app.board import COMPACT_MEDIA_TYPE
+
+
+@pytest.fixture
+def board(client, board, auth_headers):
+    """Доска с тремя задачами разного приоритета в каждой колонке"""
+    for i, section in enumerate(board["sections"]):
+        for j in range(3):
+            client.post(
+                f"/projects/{board['project_id']}/tasks",
+                headers=auth_headers,
+                json={
+                    "name": f"Task {i}-{j}",
+                    "task": "Do it",
+                    "priority": ["low", "medium", "high"][j],
+                    "section_id": section["id"]
+                }
+            )
+    return board
+
+
+def _expand(compact):
+    """Разворачивает компактную доску обратно в полный формат"""
+    fields = compact["ticket_fields"]
+    sections = []
+    for section in compact["sections"]:
+        tickets = []
+        for row in section["tickets"]:
+            ticket = dict(zip(fields, row))
+            ticket["priority"] = compact["priorities"][ticket["priority"]]
+            ticket["section_id"] = section["id"]
+            tickets.append(ticket)
+        sections.append({**section, "tickets": tickets})
+    return sections
+
+
+@pytest.mark.parametrize("negotiation", ["query", "accept"])
+def test_compact_board_matches_full(client, board, auth_headers, negotiation):
+    """Тест: компактный формат содержит те же данные, что и полный"""
+    url = f"/projects/{board['project_id']}/board"
+    full = client.get(url, headers=auth_headers).json()
+
+    if negotiation == "query":
+        response = client.get(url, headers=auth_headers, params={"format": "compact"})
+    else:
+        response = client.get(url, headers={**auth_headers, "Accept": COMPACT_MEDIA_TYPE})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith(COMPACT_MEDIA_TYPE)
+    compact = response.json()
+
+    expanded = _expand(compact)
+    assert [s["id"] for s in expanded] == [s["id"] for s in full["sections"]]
+    for compact_section, full_section in zip(expanded, full["sections"]):
+        assert len(compact_section["tickets"]) == 3
+        for compact_ticket, full_ticket in zip(compact_section["tickets"], full_section["tickets"]):
+            for field in compact["ticket_fields"] + ["section_id"]:
+                assert compact_ticket[field] == full_ticket[field]
+    assert len(response.content) < len(client.get(url, headers=auth_headers).content)
+
+
+def test_board_loads_tickets_in_one_query(client, board, auth_headers, statements):
+    """Тест: задачи доски читаются одним запросом, а не по одному на колонку"""
+    statements.clear()
+    response = client.get(f"/projects/{board['project_id']}/board", headers=auth_headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len([s for s in statements if "FROM ticket" in s]) == 1
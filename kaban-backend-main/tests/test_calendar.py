@@ -0,0 +1,117 @@
+import pytest
+from datetime import date, timedelta
+from fastapi import status
+from app.config import settings
+
+
+def test_due_at_on_task(client, projects, auth_headers, create_task):
+    """Тест: срок задачи приводится к UTC и снимается через null"""
+    project = projects[0]
+    task = create_task(project, "Task", due_at="2030-01-05T12:30:00+03:00")
+    assert task["due_at"] == "2030-01-05T09:30:00"
+
+    url = f"/projects/{project['id']}/tasks/{task['id']}"
+    assert client.patch(url, headers=auth_headers, json={"name": "Renamed"}).json()["due_at"] == "2030-01-05T09:30:00"
+    assert client.patch(url, headers=auth_headers, json={"due_at": None}).json()["due_at"] is None
+
+
+def test_due_at_range(client, projects, auth_headers, create_task):
+    """Тест: срок после 2038 года сохраняется, вне диапазона DATETIME - 422"""
+    project = projects[0]
+    task = create_task(project, "Far", due_at="2040-06-01T00:00:00")
+    assert task["due_at"] == "2040-06-01T00:00:00"
+
+    response = client.post(
+        f"/projects/{project['id']}/tasks",
+        headers=auth_headers,
+        json={"name": "Ancient", "task": "Do it", "section_id": project["section_id"], "due_at": "0999-12-31T00:00:00"}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_project_calendar(client, projects, auth_headers, create_task):
+    """Тест: календарь проекта - задачи по дням в диапазоне"""
+    project = projects[0]
+    late = create_task(project, "Late", due_at="2030-01-05T18:00:00")
+    early = create_task(project, "Early", due_at="2030-01-05T09:00:00")
+    next_day = create_task(project, "Next day", due_at="2030-01-06T00:00:00")
+    create_task(project, "Outside", due_at="2030-01-08T00:00:00")
+    create_task(project, "No due date")
+    create_task(projects[1], "Other project", due_at="2030-01-05T10:00:00")
+
+    response = client.get(f"/projects/{project['id']}/calendar?from=2030-01-05&to=2030-01-07", headers=auth_headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    days = response.json()["days"]
+    assert [day["date"] for day in days] == ["2030-01-05", "2030-01-06"]
+    assert [t["id"] for t in days[0]["tickets"]] == [early["id"], late["id"]]
+    assert [t["id"] for t in days[1]["tickets"]] == [next_day["id"]]
+    assert set(days[0]["tickets"][0]) == {"id", "name", "priority", "project_id", "section_id", "due_at"}
+
+
+def test_project_calendar_skips_ticket_bodies(client, projects, auth_headers, statements, create_task):
+    """Тест: календарь читает только поля задач со сроком в диапазоне"""
+    project = projects[0]
+    create_task(project, "Task", due_at="2030-01-05T09:00:00")
+    statements.clear()
+    client.get(f"/projects/{project['id']}/calendar?from=2030-01-01&to=2030-01-31", headers=auth_headers)
+
+    ticket_queries = [s for s in statements if "FROM ticket" in s]
+    assert len(ticket_queries) == 1
+    assert "ticket.due_at >=" in ticket_queries[0]
+    assert "ticket.task" not in ticket_queries[0]
+
+
+def test_my_calendar(client, projects, auth_headers, create_task):
+    """Тест: календарь пользователя по всем проектам"""
+    first = create_task(projects[1], "First", due_at="2030-02-01T08:00:00")
+    second = create_task(projects[0], "Second", due_at="2030-02-01T09:00:00")
+    third = create_task(projects[1], "Third", due_at="2030-02-03T09:00:00")
+
+    response = client.get("/user/me/calendar?from=2030-02-01&to=2030-02-28", headers=auth_headers)
+
+    days = response.json()["days"]
+    assert [day["date"] for day in days] == ["2030-02-01", "2030-02-03"]
+    assert [(t["id"], t["project_id"]) for t in days[0]["tickets"]] == [
+        (first["id"], projects[1]["id"]),
+        (second["id"], projects[0]["id"]),
+    ]
+    assert [t["id"] for t in days[1]["tickets"]] == [third["id"]]
+
+
+def test_calendar_time_zone(client, projects, auth_headers, create_task):
+    """Тест: дни календаря считаются в часовом поясе tz"""
+    project = projects[0]
+    evening = create_task(project, "Evening", due_at="2030-01-05T22:00:00")
+    create_task(project, "Earlier", due_at="2030-01-05T20:00:00")
+    url = f"/projects/{project['id']}/calendar"
+    params = {"from": "2030-01-06", "to": "2030-01-06"}
+
+    # 22:00 UTC - уже 6 января в Москве (UTC+3), 20:00 UTC - ещё 5-е
+    days = client.get(url, headers=auth_headers, params={**params, "tz": "Europe/Moscow"}).json()["days"]
+    assert [day["date"] for day in days] == ["2030-01-06"]
+    assert [t["id"] for t in days[0]["tickets"]] == [evening["id"]]
+    assert days[0]["tickets"][0]["due_at"] == "2030-01-05T22:00:00"
+
+    assert client.get(url, headers=auth_headers, params=params).json()["days"] == []
+    response = client.get(url, headers=auth_headers, params={**params, "tz": "Mars/Olympus"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize("query", ["from=2030-01-10&to=2030-01-01", "from=2030-01-01&to=2031-01-01"])
+def test_calendar_invalid_range(client, projects, auth_headers, query):
+    """Тест: некорректный или слишком длинный диапазон"""
+    response = client.get(f"/projects/{projects[0]['id']}/calendar?{query}", headers=auth_headers)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_calendar_max_range(client, projects, auth_headers):
+    """Тест: диапазон ровно в CALENDAR_MAX_DAYS дней допустим"""
+    start = date(2030, 1, 1)
+    end = start + timedelta(days=settings.CALENDAR_MAX_DAYS - 1)
+    url = f"/projects/{projects[0]['id']}/calendar"
+
+    assert client.get(url, headers=auth_headers, params={"from": start, "to": end}).status_code == status.HTTP_200_OK
+    too_long = {"from": start, "to": end + timedelta(days=1)}
+    assert client.get(url, headers=auth_headers, params=too_long).status_code == status.HTTP_400_BAD_REQUEST
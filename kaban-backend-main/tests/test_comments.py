@@ -0,0 +1,90 @@
+import pytest
+from fastapi import status
+from app.models import Ticket, User, UserToTeam
+from app.auth import create_access_token, get_password_hash
+
+
+@pytest.fixture
+def task(client, board, auth_headers):
+    task = client.post(
+        f"/projects/{board['project_id']}/tasks",
+        headers=auth_headers,
+        json={"name": "Task", "task": "Do it", "section_id": board["sections"][0]["id"]}
+    ).json()
+    task["project_id"] = board["project_id"]
+    task["url"] = f"/projects/{board['project_id']}/tasks/{task['id']}/comments"
+    return task
+
+
+def board_ticket(client, task, headers):
+    board = client.get(f"/projects/{task['project_id']}/board", headers=headers).json()
+    return next(t for s in board["sections"] for t in s["tickets"] if t["id"] == task["id"])
+
+
+def test_comment_count_on_board(client, task, auth_headers):
+    """Тест: счётчик комментариев на доске без изменения задачи"""
+    for i in range(3):
+        response = client.post(task["url"], headers=auth_headers, json={"body": f"Comment {i}"})
+        assert response.status_code == status.HTTP_201_CREATED
+
+    ticket = board_ticket(client, task, auth_headers)
+    assert ticket["comment_count"] == 3
+    assert ticket["version"] == task["version"]
+    assert ticket["updated_at"] == task["updated_at"]
+
+    compact = client.get(f"/projects/{task['project_id']}/board?format=compact", headers=auth_headers).json()
+    row = compact["sections"][0]["tickets"][0]
+    assert row[compact["ticket_fields"].index("comment_count")] == 3
+
+
+def test_comments_pagination(client, task, auth_headers):
+    """Тест: комментарии постранично, новые сначала"""
+    created = [
+        client.post(task["url"], headers=auth_headers, json={"body": f"Comment {i}"}).json()
+        for i in range(5)
+    ]
+
+    first = client.get(f"{task['url']}?limit=2", headers=auth_headers).json()
+    second = client.get(f"{task['url']}?limit=2&before_id={first['next_before_id']}", headers=auth_headers).json()
+    last = client.get(f"{task['url']}?limit=2&before_id={second['next_before_id']}", headers=auth_headers).json()
+
+    ids = [c["id"] for page in (first, second, last) for c in page["items"]]
+    assert ids == [c["id"] for c in reversed(created)]
+    assert last["next_before_id"] is None
+
+
+def test_delete_comment(client, db, team, task, auth_headers):
+    """Тест: удалить комментарий может только автор, счётчик уменьшается"""
+    comment = client.post(task["url"], headers=auth_headers, json={"body": "Mine"}).json()
+    other = User(username="other", email="other@example.com", password=get_password_hash("testpassword123"))
+    db.add(other)
+    db.commit()
+    db.add(UserToTeam(user_id=other.id, team_id=team.id))
+    db.commit()
+    other_headers = {"Authorization": f"Bearer {create_access_token(data={'sub': other.id})}"}
+
+    url = f"{task['url']}/{comment['id']}"
+    assert client.delete(url, headers=other_headers).status_code == status.HTTP_403_FORBIDDEN
+    assert client.delete(url, headers=auth_headers).status_code == status.HTTP_204_NO_CONTENT
+    assert client.delete(url, headers=auth_headers).status_code == status.HTTP_404_NOT_FOUND
+
+    assert board_ticket(client, task, auth_headers)["comment_count"] == 0
+    assert db.query(Ticket.comment_count).filter(Ticket.id == task["id"]).scalar() == 0
+
+
+def test_board_does_not_count_comments(client, task, auth_headers, statements):
+    """Тест: доска не обращается к таблице комментариев"""
+    client.post(task["url"], headers=auth_headers, json={"body": "Comment"})
+    statements.clear()
+    client.get(f"/projects/{task['project_id']}/board", headers=auth_headers)
+
+    assert not any("FROM ticket_comment" in s for s in statements)
+
+
+def test_comment_validation(client, task, auth_headers):
+    """Тест: пустой комментарий и чужая задача"""
+    assert client.post(task["url"], headers=auth_headers, json={"body": ""}).status_code == \
+        status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    url = f"/projects/{task['project_id']}/tasks/999999/comments"
+    assert client.get(url, headers=auth_headers).status_code == status.HTTP_404_NOT_FOUND
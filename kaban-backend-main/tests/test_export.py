@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi import status
+
+
+@pytest.fixture
+def board(client, board, auth_headers):
+    """Доска с двумя задачами в каждой колонке"""
+    for section in board["sections"]:
+        for i in range(2):
+            client.post(
+                f"/projects/{board['project_id']}/tasks",
+                headers=auth_headers,
+                json={"name": f"{section['name']} {i}", "task": "Do it, now", "section_id": section["id"]}
+            )
+    return board
+
+
+def test_export_project_csv(client, board, auth_headers):
+    """Тест выгрузки задач проекта в CSV"""
+    response = client.get(f"/projects/{board['project_id']}/export", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 6
+    assert [r["section"] for r in rows[::2]] == ["To Do", "In Progress", "Done"]
+    assert rows[0]["task"] == "Do it, now"
+    assert rows[0]["priority"] == "medium"
+
+
+def test_export_project_ndjson(client, board, auth_headers):
+    """Тест выгрузки задач проекта в NDJSON"""
+    response = client.get(
+        f"/projects/{board['project_id']}/export",
+        headers=auth_headers,
+        params={"format": "ndjson"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 6
+    assert rows[-1]["name"] == "Done 1"
+    assert rows[-1]["section_order"] == 3
+
+
+def test_export_team(client, team, board, auth_headers):
+    """Тест выгрузки задач всех проектов команды"""
+    response = client.get(f"/teams/{team.id}/export", headers=auth_headers, params={"format": "ndjson"})
+    assert response.status_code == status.HTTP_200_OK
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert {r["project_id"] for r in rows} == {board["project_id"]}
+    assert rows[0]["project"] == "Project"
+
+
+def test_export_invalid_format(client, board, auth_headers):
+    """Тест выгрузки в неподдерживаемом формате"""
+    response = client.get(
+        f"/projects/{board['project_id']}/export",
+        headers=auth_headers,
+        params={"format": "xml"}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,109 @@
+import pytest
+from fastapi import status
+from app.fields import parse_fields
+
+
+@pytest.fixture
+def projects(projects, create_task):
+    """Проекты из conftest с одной и двумя задачами"""
+    for i, project in enumerate(projects):
+        for j in range(i + 1):
+            create_task(project, f"Task {j}")
+    return projects
+
+
+def test_parse_fields():
+    """Тест: разбор вложенного выбора полей"""
+    assert parse_fields("id, name,team(name),sections(id,tickets(id,name))") == {
+        "id": None,
+        "name": None,
+        "team": {"name": None},
+        "sections": {"id": None, "tickets": {"id": None, "name": None}},
+    }
+
+
+@pytest.mark.parametrize("spec", ["", "id,", "team(name", "team)", "id;name", "team()"])
+def test_parse_fields_invalid(client, projects, auth_headers, spec):
+    """Тест: некорректный выбор полей даёт 400"""
+    response = client.get(f"/projects?fields={spec}", headers=auth_headers)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_list_projects_with_relations(client, projects, auth_headers, test_user):
+    """Тест: список проектов с командой, владельцем и числом задач"""
+    response = client.get(
+        "/projects?fields=id,name,team(name),owner(username),sections(name,ticket_count),ticket_count",
+        headers=auth_headers
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    data = sorted(response.json(), key=lambda project: project["id"])
+    assert [project["ticket_count"] for project in data] == [1, 2]
+    first = data[0]
+    assert set(first) == {"id", "name", "team", "owner", "sections", "ticket_count"}
+    assert first["team"] == {"name": "My Team"}
+    assert first["owner"] == {"username": test_user.username}
+    assert set(first["sections"][0]) == {"name", "ticket_count"}
+    assert [section["ticket_count"] for section in first["sections"]] == [1] + [0] * (len(first["sections"]) - 1)
+
+
+def test_relations_load_once_per_type(client, projects, auth_headers, statements):
+    """Тест: одна выборка на тип связи независимо от числа проектов"""
+    statements.clear()
+    client.get("/projects?fields=id,team,owner,sections,ticket_count", headers=auth_headers)
+
+    assert len([s for s in statements if "FROM teams" in s and "IN" in s]) == 1
+    assert len([s for s in statements if "FROM section" in s and "IN" in s]) == 1
+    assert len([s for s in statements if "FROM ticket" in s and "GROUP BY" in s]) == 1
+
+
+def test_unknown_field(client, projects, auth_headers):
+    """Тест: неизвестное поле"""
+    response = client.get(f"/projects/{projects[0]['id']}?fields=id,secret", headers=auth_headers)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Unknown field: secret"
+
+
+def test_get_project_with_owner(client, projects, auth_headers, test_user):
+    """Тест: проект с информацией о владельце"""
+    response = client.get(f"/projects/{projects[0]['id']}?fields=name,owner", headers=auth_headers)
+
+    assert response.json() == {
+        "name": "Project 0",
+        "owner": {"id": test_user.id, "username": test_user.username, "avatar_url": test_user.avatar_url},
+    }
+
+
+def test_board_fields(client, projects, auth_headers, test_user):
+    """Тест: доска с выбранными полями задач и владельцем"""
+    project = projects[1]
+    full = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    response = client.get(
+        f"/projects/{project['id']}/board?fields=desk_name,owner(username),sections(id,tickets(id,name))",
+        headers=auth_headers
+    )
+
+    data = response.json()
+    assert data["desk_name"] == full["desk_name"]
+    assert data["owner"] == {"username": test_user.username}
+    assert data["sections"] == [
+        {"id": s["id"], "tickets": [{"id": t["id"], "name": t["name"]} for t in s["tickets"]]}
+        for s in full["sections"]
+    ]
+
+
+def test_board_counts_without_tickets(client, projects, auth_headers, statements):
+    """Тест: счётчики задач без чтения самих задач"""
+    project = projects[1]
+    statements.clear()
+    response = client.get(
+        f"/projects/{project['id']}/board?fields=sections(name,ticket_count)",
+        headers=auth_headers
+    )
+
+    counts = [section["ticket_count"] for section in response.json()["sections"]]
+    assert sorted(counts, reverse=True)[0] == 2
+    assert sum(counts) == 2
+    assert not any("ticket.task" in s for s in statements)
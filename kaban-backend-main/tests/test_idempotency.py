@@ -0,0 +1,108 @@
+import asyncio
+import uuid
+
+import msgpack
+from fastapi import status
+from app.models import Project, Desk
+from app.config import settings
+from app.idempotency import IdempotencyMiddleware, IdempotencyStore
+from app.negotiation import MSGPACK_MEDIA_TYPE
+
+
+def test_create_project_retry_is_idempotent(client, db, team, auth_headers):
+    """Тест: повтор с тем же Idempotency-Key не создаёт дубликат проекта"""
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+    payload = {"name": "Project", "team_id": team.id}
+
+    first = client.post("/projects", headers=headers, json=payload)
+    second = client.post("/projects", headers=headers, json=payload)
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert second.status_code == status.HTTP_201_CREATED
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert db.query(Project).count() == 1
+    assert db.query(Desk).count() == 1
+
+
+def test_replay_follows_accept(client, auth_headers):
+    """Тест: повтор отдаёт сохранённый ответ в формате из своего Accept"""
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post("/teams", headers=headers, json={"name": "A"})
+    replay = client.post("/teams", headers={**headers, "Accept": MSGPACK_MEDIA_TYPE}, json={"name": "A"})
+
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert replay.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(replay.content) == first.json()
+
+    replay = client.post("/teams", headers=headers, json={"name": "A"})
+    assert replay.headers["content-type"] == "application/json"
+    assert replay.json() == first.json()
+
+
+def test_idempotency_key_reused_with_other_body(client, auth_headers):
+    """Тест: тот же ключ с другим телом запроса отклоняется"""
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+    assert client.post("/teams", headers=headers, json={"name": "A"}).status_code == status.HTTP_201_CREATED
+    response = client.post("/teams", headers=headers, json={"name": "B"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_idempotency_body_size_limit(client, auth_headers, monkeypatch):
+    """Тест: слишком большое тело с Idempotency-Key не буферизуется, а отклоняется"""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_MAX_BODY_BYTES", 64)
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+    response = client.post("/teams", headers=headers, json={"name": "x" * 100})
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def chunks():
+        yield b'{"name": "'
+        yield b"x" * 100
+        yield b'"}'
+
+    response = client.post("/teams", headers={**headers, "Content-Type": "application/json"}, content=chunks())
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+
+def test_concurrent_requests_are_coalesced():
+    """Тест: одновременные одинаковые запросы выполняются один раз"""
+    calls = 0
+
+    async def app(scope, receive, send):
+        nonlocal calls
+        calls += 1
+        await receive()
+        await asyncio.sleep(0.01)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"created"})
+
+    middleware = IdempotencyMiddleware(app, store=IdempotencyStore(max_keys=10, ttl_seconds=60))
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/teams",
+        "headers": [(b"idempotency-key", b"abc")],
+        "client": ("127.0.0.1", 1234),
+    }
+
+    async def call():
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware(scope, receive, send)
+        return messages
+
+    async def main():
+        return await asyncio.gather(*(call() for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(messages[-1]["body"] == b"created" for messages in results)
@@ -0,0 +1,112 @@
+import json
+
+from fastapi import status
+
+
+def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _import(client, project, auth_headers, content, format="csv"):
+    job = client.post(f"/projects/{project['id']}/import", headers=auth_headers, params={"format": format}).json()
+    return client.put(f"/projects/{project['id']}/import/{job['id']}", headers=auth_headers, content=content)
+
+
+def test_import_csv(client, project, auth_headers):
+    """Тест потокового импорта CSV с созданием недостающих колонок"""
+    body = (
+        "Title,Description,Status,Priority,Points\r\n"
+        "First,\"multi\nline, with comma\",To Do,high,3\r\n"
+        "Second,plain,Backlog,low,\r\n"
+        ",no name,To Do,low,1\r\n"
+        "Third,x,Backlog,urgent,1\r\n"
+    ).encode()
+    response = client.post(f"/projects/{project['id']}/import", headers=auth_headers, params={"format": "csv"})
+    assert response.status_code == status.HTTP_201_CREATED
+    job = response.json()
+    assert job["status"] == "pending"
+
+    # Id задания известен до загрузки, прогресс можно опрашивать во время неё
+    url = f"/projects/{project['id']}/import/{job['id']}"
+    assert client.get(url, headers=auth_headers).json()["status"] == "pending"
+
+    response = client.put(url, headers=auth_headers, content=_chunks(body, 7))
+    assert response.status_code == status.HTTP_200_OK
+    job = response.json()
+    assert job["status"] == "done"
+    assert job["rows_processed"] == 4
+    assert job["tickets_created"] == 2
+    assert job["sections_created"] == 1
+    assert [e["row"] for e in job["errors"]] == [3, 4]
+
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    sections = {s["name"]: s["tickets"] for s in board["sections"]}
+    assert sections["To Do"][0]["task"] == "multi\nline, with comma"
+    assert sections["To Do"][0]["priority"] == "high"
+    assert sections["Backlog"][0]["complexity"] == 1
+    assert board["sections"][-1]["name"] == "Backlog"
+
+    status_response = client.get(url, headers=auth_headers)
+    assert status_response.json()["tickets_created"] == 2
+
+    # Файл загружается в задание один раз
+    assert client.put(url, headers=auth_headers, content=body).status_code == status.HTTP_409_CONFLICT
+
+
+def test_import_ndjson_in_batches(client, project, auth_headers, monkeypatch):
+    """Тест импорта NDJSON несколькими пачками"""
+    monkeypatch.setattr("app.importer.settings.IMPORT_BATCH_SIZE", 2)
+    lines = [json.dumps({"name": f"Task {i}", "section": "Done"}) for i in range(5)]
+    lines.append("not json")
+    response = _import(client, project, auth_headers, ("\n".join(lines) + "\n").encode(), format="ndjson")
+    job = response.json()
+    assert job["tickets_created"] == 5
+    assert job["sections_created"] == 0
+    assert job["errors"] == [{"row": 6, "error": "Expected a JSON object"}]
+
+
+def test_import_rejects_out_of_range_rows(client, project, auth_headers):
+    """Тест: слишком длинная колонка и сложность вне диапазона - ошибки строк, а не всего импорта"""
+    lines = [
+        {"name": "Long section", "section": "x" * 256},
+        {"name": "Huge", "complexity": 2 ** 31},
+        {"name": "Negative", "complexity": -1},
+        {"name": "Fine", "complexity": 5},
+    ]
+    body = "".join(json.dumps(line) + "\n" for line in lines).encode()
+    job = _import(client, project, auth_headers, body, format="ndjson").json()
+
+    assert job["status"] == "done"
+    assert job["tickets_created"] == 1
+    assert job["sections_created"] == 1
+    assert [e["row"] for e in job["errors"]] == [1, 2, 3]
+    assert job["errors"][0]["error"] == "Section is longer than 255 characters"
+
+
+def test_import_csv_without_name_column(client, project, auth_headers):
+    """Тест импорта CSV без колонки с названием задачи"""
+    response = _import(client, project, auth_headers, b"foo,bar\n1,2\n")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_import_failure_keeps_committed_batches(client, project, auth_headers, monkeypatch):
+    """Тест: при ошибке в середине файла задание помечается failed с числом записанных строк"""
+    monkeypatch.setattr("app.importer.settings.IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr("app.importer.settings.IMPORT_MAX_RECORD_BYTES", 50)
+    lines = [json.dumps({"name": f"Task {i}"}) for i in range(5)]
+    body = ("\n".join(lines) + "\n" + "x" * 100).encode()
+
+    job = client.post(f"/projects/{project['id']}/import", headers=auth_headers, params={"format": "ndjson"}).json()
+    url = f"/projects/{project['id']}/import/{job['id']}"
+    response = client.put(url, headers=auth_headers, content=_chunks(body, 20))
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    job = client.get(url, headers=auth_headers).json()
+    assert job["status"] == "failed"
+    assert job["error"] == "Record is too large"
+    # Пятая задача была в незаписанной пачке
+    assert job["tickets_created"] == 4
+    assert job["rows_processed"] == 4
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    assert sum(len(s["tickets"]) for s in board["sections"]) == 4
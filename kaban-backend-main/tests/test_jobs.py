@@ -0,0 +1,162 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from app.jobs import JobRunner, purge_finished_jobs
+from app.models import Job, utcnow
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def runner(db):
+    # В тестах одно соединение SQLite на все потоки, поэтому по одному заданию
+    return JobRunner(
+        concurrency=1,
+        poll_interval=0.1,
+        max_attempts=3,
+        retry_base=0,
+        lock_timeout=60,
+        session_factory=TestingSessionLocal,
+    )
+
+
+def test_enqueue_and_run(db, runner):
+    """Тест: задание из таблицы выполняется с переданными данными"""
+    calls = []
+
+    @runner.handler("collect")
+    async def collect(payload):
+        calls.append(payload)
+
+    @runner.handler("collect_sync")
+    def collect_sync(payload):
+        calls.append(payload)
+
+    runner.enqueue(db, "collect", {"value": 1})
+    runner.enqueue(db, "collect_sync", {"value": 2})
+    db.commit()
+
+    asyncio.run(runner.run_pending())
+
+    assert sorted(c["value"] for c in calls) == [1, 2]
+    assert {job.status for job in db.query(Job).populate_existing()} == {"done"}
+
+
+def test_delayed_job_is_not_claimed(db, runner):
+    """Тест: отложенное задание не выполняется раньше срока"""
+    runner.register("noop", lambda payload: None)
+    runner.enqueue(db, "noop", delay=3600)
+    db.commit()
+
+    assert runner.claim(10) == []
+
+
+def test_retry_then_fail(db, runner):
+    """Тест повторов: после max_attempts задание помечается как failed"""
+    attempts = []
+
+    @runner.handler("flaky", max_attempts=2)
+    def flaky(payload):
+        attempts.append(1)
+        raise RuntimeError("boom")
+
+    runner.enqueue(db, "flaky")
+    db.commit()
+
+    asyncio.run(runner.run_pending())
+
+    job = db.query(Job).populate_existing().one()
+    assert len(attempts) == 2
+    assert job.status == "failed"
+    assert job.attempts == 2
+    assert "boom" in job.last_error
+    assert runner.failed == 1
+
+
+def test_stale_running_job_is_resumed(db, runner):
+    """Тест: задание упавшего воркера подхватывается после таймаута блокировки"""
+    calls = []
+    runner.register("resume", lambda payload: calls.append(payload))
+    db.add(Job(
+        name="resume",
+        status="running",
+        attempts=1,
+        max_attempts=3,
+        run_at=utcnow() - timedelta(hours=1),
+        locked_by="dead-worker",
+        locked_at=utcnow() - timedelta(hours=1),
+    ))
+    db.commit()
+
+    asyncio.run(runner.run_pending())
+
+    job = db.query(Job).populate_existing().one()
+    assert calls == [{}]
+    assert job.status == "done"
+    assert job.attempts == 2
+
+
+def test_scheduled_job_enqueued_once_per_interval(db, runner):
+    """Тест: периодическое задание ставится один раз на интервал для всех воркеров"""
+    other = JobRunner(
+        concurrency=1, poll_interval=0.1, max_attempts=1, retry_base=0,
+        lock_timeout=60, session_factory=TestingSessionLocal,
+    )
+    runner.schedule("tick", 3600)
+    other.schedule("tick", 3600)
+
+    runner._enqueue_scheduled()
+    other._enqueue_scheduled()
+    runner._enqueue_scheduled()
+
+    assert db.query(Job).filter(Job.name == "tick").count() == 1
+
+
+def test_unknown_job(db, runner):
+    """Тест: нельзя поставить задание без обработчика"""
+    with pytest.raises(ValueError):
+        runner.enqueue(db, "missing")
+
+
+def test_scheduled_job_uses_handler_max_attempts(db, runner):
+    """Тест: периодическое задание получает max_attempts своего обработчика"""
+    runner.register("once", lambda payload: None, max_attempts=1)
+    runner.schedule("once", 3600)
+
+    runner._enqueue_scheduled()
+
+    assert db.query(Job).filter(Job.name == "once").one().max_attempts == 1
+
+
+def test_heartbeat_keeps_running_job_locked(db, runner):
+    """Тест: продлённое задание не забирает другой воркер"""
+    runner.register("long", lambda payload: None)
+    db.add(Job(
+        name="long",
+        status="running",
+        attempts=1,
+        max_attempts=3,
+        run_at=utcnow() - timedelta(hours=1),
+        locked_by=runner.worker_id,
+        locked_at=utcnow() - timedelta(hours=1),
+    ))
+    db.commit()
+
+    runner._heartbeat()
+
+    assert runner.claim(10) == []
+
+
+def test_purge_finished_jobs(db):
+    """Тест: старые выполненные и упавшие задания удаляются, остальные остаются"""
+    old = utcnow() - timedelta(days=30)
+    db.add_all([
+        Job(name="a", status="done", max_attempts=1, updated_at=old),
+        Job(name="b", status="failed", max_attempts=1, updated_at=old),
+        Job(name="c", status="done", max_attempts=1),
+        Job(name="d", status="pending", max_attempts=1, updated_at=old),
+    ])
+    db.commit()
+
+    assert purge_finished_jobs({}) == 2
+    assert sorted(job.name for job in db.query(Job).populate_existing()) == ["c", "d"]
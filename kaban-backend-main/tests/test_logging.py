@@ -0,0 +1,66 @@
+import json
+import logging
+import queue
+from fastapi import status
+from app.logging_config import JsonFormatter, ContextFilter, NonBlockingQueueHandler, request_id_var
+
+
+def _record(level=logging.INFO, **extra):
+    record = logging.LogRecord("kaban", level, __file__, 1, "User %s logged in", (42,), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter():
+    """Тест JSON-формата записи с request_id и временем ответа"""
+    record = _record(request_id="abc", duration_ms=1.5, status=200)
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "User 42 logged in"
+    assert data["request_id"] == "abc"
+    assert data["duration_ms"] == 1.5
+    assert data["status"] == 200
+    assert data["level"] == "INFO"
+
+
+def test_context_filter_sampling():
+    """Тест сэмплирования INFO-записей"""
+    log_filter = ContextFilter(info_sample_rate=0)
+    token = request_id_var.set("req-1")
+    try:
+        warning = _record(level=logging.WARNING)
+        assert log_filter.filter(_record()) is False
+        assert log_filter.filter(warning) is True
+        assert warning.request_id == "req-1"
+    finally:
+        request_id_var.reset(token)
+
+
+def test_request_id_header(client):
+    """Тест: ответ содержит request id"""
+    response = client.get("/health", headers={"X-Request-ID": "my-request"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["X-Request-ID"] == "my-request"
+    assert client.get("/health").headers["X-Request-ID"]
+
+
+def test_queue_handler_formats_message_immediately():
+    """Тест: аргументы подставляются при записи в очередь, а не в фоновом потоке"""
+    log_queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue)
+    items = ["first"]
+    record = logging.LogRecord("kaban", logging.INFO, __file__, 1, "Items: %s", (items,), None)
+
+    handler.handle(record)
+    items.append("second")
+
+    queued = log_queue.get_nowait()
+    assert queued.getMessage() == "Items: ['first']"
+
+
+def test_request_id_outside_request():
+    """Тест: вне запроса request_id в тексте - '-', в JSON его нет"""
+    record = _record()
+    ContextFilter(info_sample_rate=1).filter(record)
+
+    assert logging.Formatter("[%(request_id)s] %(message)s").format(record) == "[-] User 42 logged in"
+    assert "request_id" not in json.loads(JsonFormatter().format(record))
@@ -0,0 +1,84 @@
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI, status
+from app.config import settings
+from app.logging_config import RequestLoggingMiddleware
+from app.monitoring import LoopLagMonitor, BlockingCallDetector, blocking_detector
+
+
+def test_blocking_call_detected():
+    """Тест: блокирующий вызов в event loop фиксируется вместе со стеком"""
+    monitor = LoopLagMonitor(interval=0.01)
+    detector = BlockingCallDetector(monitor, threshold=0.05, history=5)
+
+    def slow_sync_call():
+        time.sleep(0.3)
+
+    async def main():
+        monitor.start()
+        detector.start()
+        await asyncio.sleep(0.05)
+        slow_sync_call()
+        await asyncio.sleep(0.05)
+        detector.stop()
+        await monitor.stop()
+
+    asyncio.run(main())
+
+    assert detector.blocking_count == 1
+    event = detector.events[0]
+    assert event["blocked_ms"] >= 50
+    assert "slow_sync_call" in event["stack"]
+    assert event["location"].startswith("tests/test_monitoring.py:")
+    assert event["location"].endswith(" in slow_sync_call")
+    assert monitor.max_lag >= 0.25
+    assert event["route"] is None
+
+
+def test_blocking_call_attributed_to_route():
+    """Тест: блокировка внутри запроса записывается с маршрутом этого запроса"""
+    monitor = LoopLagMonitor(interval=0.01)
+    detector = BlockingCallDetector(monitor, threshold=0.05, history=5)
+    app = FastAPI()
+
+    @app.get("/slow/{item_id}")
+    async def slow(item_id: int):
+        time.sleep(0.3)
+        return {"id": item_id}
+
+    async def main():
+        monitor.start()
+        detector.start()
+        transport = httpx.ASGITransport(app=RequestLoggingMiddleware(app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await asyncio.sleep(0.05)
+            response = await client.get("/slow/7")
+            await asyncio.sleep(0.05)
+        detector.stop()
+        await monitor.stop()
+        return response
+
+    response = asyncio.run(main())
+
+    assert response.status_code == status.HTTP_200_OK
+    assert detector.blocking_count == 1
+    event = detector.events[0]
+    assert event["route"] == "GET /slow/{item_id}"
+    assert event["location"].endswith(" in slow")
+
+
+def test_metrics_endpoint(client, monkeypatch):
+    """Тест эндпоинта метрик: только с токеном и без стеков"""
+    assert client.get("/metrics").status_code == status.HTTP_404_NOT_FOUND
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "secret")
+    monkeypatch.setattr(blocking_detector, "events", [{"blocked_ms": 300, "location": "app/x.py:1 in f", "stack": "..."}])
+    assert client.get("/metrics").status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get("/metrics", headers={"X-Metrics-Token": "wrong"}).status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = client.get("/metrics", headers={"X-Metrics-Token": "secret"})
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert "lag_ms" in data["event_loop"]
+    assert data["blocking_calls"]["recent"] == [{"blocked_ms": 300, "location": "app/x.py:1 in f"}]
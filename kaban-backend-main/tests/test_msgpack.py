@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import msgpack
+from fastapi import status
+from app.models import PriorityEnum
+from app.negotiation import MSGPACK_MEDIA_TYPE, accepts_msgpack, packb
+
+
+def _msgpack_headers(auth_headers):
+    return {**auth_headers, "Accept": MSGPACK_MEDIA_TYPE, "Content-Type": MSGPACK_MEDIA_TYPE}
+
+
+def test_encoder_handles_datetimes_and_enums():
+    """Тест: даты и перечисления кодируются так же, как в JSON"""
+    created_at = datetime(2025, 1, 2, 3, 4, 5, 6)
+    data = msgpack.unpackb(packb({"priority": PriorityEnum.high, "created_at": created_at}))
+    assert data == {"priority": "high", "created_at": "2025-01-02T03:04:05.000006"}
+
+
+def test_accept_q_values():
+    """Тест: MessagePack выбирается по q-значениям Accept, а не по подстроке"""
+    assert accepts_msgpack("application/msgpack")
+    assert accepts_msgpack("application/json;q=0.5, application/x-msgpack")
+    assert accepts_msgpack("application/msgpack, */*")
+    assert not accepts_msgpack("application/msgpack;q=0")
+    assert not accepts_msgpack("application/msgpack;q=0.5, application/json")
+    assert not accepts_msgpack("application/msgpack;q=0.1, */*;q=0.8")
+    assert not accepts_msgpack("application/json")
+    assert not accepts_msgpack(None)
+
+
+def test_board_msgpack_matches_json(client, project, auth_headers):
+    """Тест: доска в MessagePack совпадает с JSON"""
+    url = f"/projects/{project['id']}/board"
+    board = client.get(url, headers=auth_headers).json()
+    client.post(
+        f"/projects/{project['id']}/tasks",
+        headers=auth_headers,
+        json={"name": "Task", "task": "Do it", "priority": "high", "section_id": board["sections"][0]["id"]}
+    )
+
+    as_json = client.get(url, headers=auth_headers)
+    as_msgpack = client.get(url, headers={**auth_headers, "Accept": MSGPACK_MEDIA_TYPE})
+
+    assert as_json.headers["content-type"] == "application/json"
+    assert as_msgpack.status_code == status.HTTP_200_OK
+    assert as_msgpack.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert "Accept" in as_msgpack.headers["vary"]
+    assert msgpack.unpackb(as_msgpack.content) == as_json.json()
+
+
+def test_compact_board_msgpack(client, project, auth_headers):
+    """Тест: компактная доска тоже отдаётся в MessagePack"""
+    url = f"/projects/{project['id']}/board?format=compact"
+    response = client.get(url, headers={**auth_headers, "Accept": MSGPACK_MEDIA_TYPE})
+
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(response.content) == client.get(url, headers=auth_headers).json()
+
+
+def test_create_task_from_msgpack_body(client, project, auth_headers):
+    """Тест: создание задачи с телом в MessagePack"""
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    response = client.post(
+        f"/projects/{project['id']}/tasks",
+        headers=_msgpack_headers(auth_headers),
+        content=packb({
+            "name": "Binary task",
+            "task": "Sent as msgpack",
+            "priority": "low",
+            "section_id": board["sections"][0]["id"]
+        })
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    data = msgpack.unpackb(response.content)
+    assert data["name"] == "Binary task"
+    assert data["priority"] == "low"
+
+
+def test_update_section_from_msgpack_body(client, project, auth_headers):
+    """Тест: обновление колонки с телом в MessagePack"""
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    section = board["sections"][0]
+    response = client.patch(
+        f"/projects/{project['id']}/sections/{section['id']}",
+        headers={**auth_headers, "Content-Type": MSGPACK_MEDIA_TYPE},
+        content=packb({"name": "Renamed"})
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["name"] == "Renamed"
+
+
+def test_invalid_msgpack_body(client, project, auth_headers):
+    """Тест: битое тело MessagePack даёт 422"""
+    response = client.post(
+        f"/projects/{project['id']}/tasks",
+        headers=_msgpack_headers(auth_headers),
+        content=b"\xc1"
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert msgpack.unpackb(response.content)["detail"][0]["type"] == "msgpack_invalid"
+
+
+def test_errors_follow_accept(client, auth_headers):
+    """Тест: ошибки тоже отдаются в запрошенном формате"""
+    response = client.get("/projects/999999/board", headers={**auth_headers, "Accept": MSGPACK_MEDIA_TYPE})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert msgpack.unpackb(response.content) == {"detail": "Project not found"}
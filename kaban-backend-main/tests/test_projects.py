@@ -0,0 +1,94 @@
+from fastapi import status
+from app.models import Ticket
+
+
+def test_create_project_default_sections(client, auth_headers, team):
+    """Тест создания проекта с колонками по умолчанию"""
+    response = client.post(
+        "/projects",
+        headers=auth_headers,
+        json={"name": "Project", "team_id": team.id}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    data = response.json()
+    assert data["name"] == "Project"
+    assert data["created_at"] is not None
+
+    board = client.get(f"/projects/{data['id']}/board", headers=auth_headers).json()
+    assert board["desk_name"] == "Project Board"
+    assert [s["name"] for s in board["sections"]] == ["To Do", "In Progress", "Done"]
+
+
+def test_create_project_from_template(client, auth_headers, team):
+    """Тест создания проекта по шаблону доски команды"""
+    response = client.post(
+        f"/teams/{team.id}/templates",
+        headers=auth_headers,
+        json={
+            "name": "Scrum",
+            "sections": [
+                {"name": "Backlog", "order": 1},
+                {"name": "Sprint", "order": 2},
+                {"name": "Review", "order": 3},
+                {"name": "Done", "order": 4}
+            ]
+        }
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    template_id = response.json()["id"]
+
+    templates = client.get(f"/teams/{team.id}/templates", headers=auth_headers).json()
+    assert [t["name"] for t in templates] == ["Scrum"]
+
+    response = client.post(
+        "/projects",
+        headers=auth_headers,
+        json={"name": "Sprint Project", "team_id": team.id, "template_id": template_id}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    board = client.get(f"/projects/{response.json()['id']}/board", headers=auth_headers).json()
+    assert [s["name"] for s in board["sections"]] == ["Backlog", "Sprint", "Review", "Done"]
+
+
+def test_create_project_unknown_template(client, auth_headers, team):
+    """Тест создания проекта с несуществующим шаблоном"""
+    response = client.post(
+        "/projects",
+        headers=auth_headers,
+        json={"name": "Project", "team_id": team.id, "template_id": 999}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_clone_project(client, auth_headers, team, db):
+    """Тест копирования проекта вместе с колонками и задачами"""
+    project = client.post(
+        "/projects",
+        headers=auth_headers,
+        json={"name": "Original", "description": "Desc", "team_id": team.id}
+    ).json()
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    for section, name in zip(board["sections"], ("A", "B", "C")):
+        client.post(
+            f"/projects/{project['id']}/tasks",
+            headers=auth_headers,
+            json={"name": name, "task": "Task", "priority": "high", "section_id": section["id"]}
+        )
+
+    response = client.post(
+        f"/projects/{project['id']}/clone",
+        headers=auth_headers,
+        json={}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    clone = response.json()
+    assert clone["name"] == "Original (copy)"
+    assert clone["description"] == "Desc"
+    assert clone["desk_id"] != project["desk_id"]
+
+    cloned_board = client.get(f"/projects/{clone['id']}/board", headers=auth_headers).json()
+    assert [s["name"] for s in cloned_board["sections"]] == ["To Do", "In Progress", "Done"]
+    assert [[t["name"] for t in s["tickets"]] for s in cloned_board["sections"]] == [["A"], ["B"], ["C"]]
+    assert all(t["priority"] == "high" for s in cloned_board["sections"] for t in s["tickets"])
+    assert db.query(Ticket).count() == 6
@@ -0,0 +1,59 @@
+import msgpack
+from fastapi import status
+from app.auth import create_access_token, token_cache
+from app.config import settings
+from app.monitoring import loop_monitor
+from app.negotiation import MSGPACK_MEDIA_TYPE
+
+
+def test_auth_rate_limit(client):
+    """Тест ограничения частоты запросов к /auth/* по IP"""
+    payload = {"email": "nobody@example.com", "password": "password123"}
+    for _ in range(settings.RATE_LIMIT_AUTH_BURST):
+        response = client.post("/auth/login", json=payload)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = client.post("/auth/login", json=payload)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_load_shedding(client, monkeypatch):
+    """Тест сброса нагрузки при большой задержке event loop"""
+    monkeypatch.setattr(loop_monitor, "smoothed_lag", settings.LOAD_SHED_LOOP_LAG_MS / 1000 + 1)
+
+    response = client.get("/")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == str(settings.LOAD_SHED_RETRY_AFTER_SECONDS)
+
+    response = client.get("/", headers={"Accept": MSGPACK_MEDIA_TYPE})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert msgpack.unpackb(response.content)["detail"]
+
+    # Health check не отбрасывается
+    assert client.get("/health").status_code == status.HTTP_200_OK
+
+
+def test_token_verified_once(client, test_user):
+    """Тест: токен проверяется один раз - в middleware, не в get_current_user"""
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': test_user.id})}"}
+    token_cache.clear()
+    hits, misses = token_cache.hits, token_cache.misses
+
+    assert client.get("/user/me", headers=headers).status_code == status.HTTP_200_OK
+    assert token_cache.hits + token_cache.misses == hits + misses + 1
+
+
+def test_batch_charges_per_sub_request(client, test_user, monkeypatch):
+    """Тест: каждый подзапрос POST /batch списывает токен пользователя"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_BURST", 5)
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_PER_SECOND", 0.01)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': test_user.id})}"}
+
+    response = client.post("/batch", headers=headers, json={"requests": [{"path": "/user/me"}] * 3})
+    assert response.status_code == status.HTTP_200_OK
+
+    # Осталось 2 токена: пакет из трёх подзапросов уже не проходит
+    response = client.post("/batch", headers=headers, json={"requests": [{"path": "/user/me"}] * 3})
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) >= 1
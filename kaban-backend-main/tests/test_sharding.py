@@ -0,0 +1,187 @@
+import pytest
+from fastapi import Request, status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.activity import activity_log
+from app.auth import create_access_token, get_password_hash
+from app.database import DEFAULT_SHARD, ShardedSession, ShardNotSelected, get_db
+from app.models import Activity, Project, ProjectShard, Team, Ticket, User
+from app.ratelimit import rate_limit_backend
+from app.sharding import create_schema, tenant_metadata
+from main import app
+
+SHARDS = (DEFAULT_SHARD, "eu", "us")
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """Три базы SQLite в файлах: основная и два шарда"""
+    engines = {
+        name: create_engine(f"sqlite:///{tmp_path / name}.db", connect_args={"check_same_thread": False})
+        for name in SHARDS
+    }
+    create_schema(engines)
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engines):
+    return sessionmaker(class_=ShardedSession, engines=engines, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def client(session_factory):
+    """Клиент, у которого каждый запрос получает свою шардированную сессию"""
+    def override_get_db(request: Request):
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    rate_limit_backend.clear()
+    activity_log.clear()
+    previous_factory = activity_log.session_factory
+    activity_log.session_factory = session_factory
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+    activity_log.session_factory = previous_factory
+
+
+@pytest.fixture
+def auth_headers(session_factory):
+    db = session_factory()
+    user = User(username="sharded", email="sharded@example.com", password=get_password_hash("testpassword123"))
+    db.add(user)
+    db.commit()
+    db.close()
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user.id})}"}
+
+
+def rows(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(select(table)).all()
+
+
+def create_teams(client, auth_headers, count):
+    return [
+        client.post("/teams", headers=auth_headers, json={"name": f"Team {i}"}).json()
+        for i in range(count)
+    ]
+
+
+def team_shards(session_factory):
+    db = session_factory()
+    try:
+        return dict(db.execute(select(Team.id, Team.shard)).all())
+    finally:
+        db.close()
+
+
+def test_teams_spread_across_shards(client, auth_headers, session_factory):
+    """Тест: новые команды распределяются по всем шардам"""
+    teams = create_teams(client, auth_headers, len(SHARDS))
+
+    shards = team_shards(session_factory)
+    assert set(shards) == {team["id"] for team in teams}
+    assert set(shards.values()) == set(SHARDS)
+
+
+def test_project_data_on_team_shard(client, auth_headers, engines, session_factory):
+    """Тест: проект, доска и задачи лежат в базе шарда команды"""
+    teams = create_teams(client, auth_headers, len(SHARDS))
+    shards = team_shards(session_factory)
+    team = next(team for team in teams if shards[team["id"]] != DEFAULT_SHARD)
+    shard = shards[team["id"]]
+
+    project = client.post("/projects", headers=auth_headers, json={"name": "Sharded", "team_id": team["id"]}).json()
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    response = client.post(
+        f"/projects/{project['id']}/tasks",
+        headers=auth_headers,
+        json={"name": "Task", "task": "Do it", "section_id": board["sections"][0]["id"]}
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    for name, engine in engines.items():
+        expected = 1 if name == shard else 0
+        assert len(rows(engine, Project.__table__)) == expected
+        assert len(rows(engine, Ticket.__table__)) == expected
+    directory = rows(engines[DEFAULT_SHARD], ProjectShard.__table__)
+    assert [(row.project_id, row.shard) for row in directory] == [(project["id"], shard)]
+
+    board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+    assert [t["name"] for t in board["sections"][0]["tickets"]] == ["Task"]
+
+    # Журнал действий пишется в базу проекта
+    activity_log.flush()
+    assert len(rows(engines[shard], Activity.__table__)) > 0
+    assert rows(engines[DEFAULT_SHARD], Activity.__table__) == []
+
+
+def test_list_projects_fans_out(client, auth_headers, session_factory):
+    """Тест: список проектов собирается со всех шардов"""
+    teams = create_teams(client, auth_headers, len(SHARDS))
+    created = [
+        client.post("/projects", headers=auth_headers, json={"name": f"Project {i}", "team_id": team["id"]}).json()
+        for i, team in enumerate(teams)
+    ]
+
+    response = client.get("/projects", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [project["id"] for project in response.json()] == sorted(project["id"] for project in created)
+
+    shaped = client.get("/projects?fields=id,team(name),ticket_count", headers=auth_headers).json()
+    assert [project["team"]["name"] for project in shaped] == [team["name"] for team in teams]
+
+
+def test_session_requires_shard(session_factory):
+    """Тест: данные команд нельзя читать без выбранного шарда"""
+    db = session_factory()
+    try:
+        assert db.query(User).all() == []
+        with pytest.raises(ShardNotSelected):
+            db.query(Project).all()
+        db.shard = "eu"
+        assert db.query(Project).all() == []
+    finally:
+        db.close()
+
+
+def test_tenant_metadata_without_global_keys():
+    """Тест: в базах шардов нет внешних ключей на пользователей и команды"""
+    targets = {
+        fk.column.table.name
+        for table in tenant_metadata().tables.values()
+        for fk in table.foreign_keys
+    }
+
+    assert targets and not targets & {"user", "teams", "UsersToTeams"}
+
+
+def test_my_tasks_across_shards(client, auth_headers, session_factory):
+    """Тест: задачи пользователя собираются со всех шардов по одному порядку"""
+    me = client.get("/user/me", headers=auth_headers).json()
+    expected = []
+    for i, team in enumerate(create_teams(client, auth_headers, len(SHARDS))):
+        project = client.post("/projects", headers=auth_headers, json={"name": f"Project {i}", "team_id": team["id"]}).json()
+        board = client.get(f"/projects/{project['id']}/board", headers=auth_headers).json()
+        task = client.post(
+            f"/projects/{project['id']}/tasks",
+            headers=auth_headers,
+            json={"name": f"Task {i}", "task": "Do it", "priority": "high", "section_id": board["sections"][0]["id"]}
+        ).json()
+        client.post(f"/projects/{project['id']}/tasks/{task['id']}/assignees", headers=auth_headers, json={"user_id": me["id"]})
+        expected.append((task["id"], project["id"]))
+
+    first = client.get("/user/me/tasks?limit=2", headers=auth_headers).json()
+    rest = client.get("/user/me/tasks", headers=auth_headers, params={"cursor": first["next_cursor"]}).json()
+
+    # id задач в разных шардах могут совпадать, порядок доопределяется проектом
+    assert [(task["id"], task["project_id"]) for task in first["items"] + rest["items"]] == sorted(expected)
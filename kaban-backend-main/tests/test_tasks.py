@@ -0,0 +1,97 @@
+import pytest
+from fastapi import status
+
+
+@pytest.fixture
+def task(client, board, auth_headers):
+    response = client.post(
+        f"/projects/{board['project_id']}/tasks",
+        headers=auth_headers,
+        json={"name": "Task", "task": "Do it", "section_id": board["sections"][0]["id"]}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()
+
+
+def test_update_task_increments_version(client, board, task, auth_headers):
+    """Тест: обновление задачи увеличивает версию и возвращает ETag"""
+    assert task["version"] == 1
+
+    response = client.patch(
+        f"/projects/{board['project_id']}/tasks/{task['id']}",
+        headers={**auth_headers, "If-Match": '"1"'},
+        json={"name": "Renamed", "section_id": board["sections"][1]["id"]}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["name"] == "Renamed"
+    assert data["task"] == "Do it"
+    assert data["section_id"] == board["sections"][1]["id"]
+    assert data["version"] == 2
+    assert response.headers["ETag"] == '"2"'
+
+
+def test_update_task_stale_version(client, board, task, auth_headers):
+    """Тест: обновление устаревшей версии задачи возвращает 412"""
+    url = f"/projects/{board['project_id']}/tasks/{task['id']}"
+    assert client.patch(url, headers=auth_headers, json={"name": "First"}).status_code == status.HTTP_200_OK
+
+    response = client.patch(
+        url,
+        headers={**auth_headers, "If-Match": '"1"'},
+        json={"name": "Second"}
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+def test_update_task_not_found(client, board, auth_headers):
+    """Тест обновления несуществующей задачи"""
+    response = client.patch(
+        f"/projects/{board['project_id']}/tasks/999",
+        headers=auth_headers,
+        json={"name": "Renamed"}
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_update_section_stale_version(client, board, auth_headers):
+    """Тест: обновление устаревшей версии колонки возвращает 412"""
+    section = board["sections"][0]
+    url = f"/projects/{board['project_id']}/sections/{section['id']}"
+
+    response = client.patch(url, headers={**auth_headers, "If-Match": '"1"'}, json={"name": "Backlog"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["version"] == 2
+
+    response = client.patch(url, headers={**auth_headers, "If-Match": '"1"'}, json={"order": 5})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+def test_create_task_not_reread(client, board, auth_headers, statements):
+    """Тест: после INSERT задачи строка не перечитывается из БД"""
+    statements.clear()
+    response = client.post(
+        f"/projects/{board['project_id']}/tasks",
+        headers=auth_headers,
+        json={"name": "Task", "task": "Do it", "section_id": board["sections"][0]["id"]}
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["version"] == 1
+    ticket_statements = [s for s in statements if "ticket" in s]
+    assert len(ticket_statements) == 1
+    assert ticket_statements[0].startswith("INSERT INTO ticket")
+    assert statements[-1] == ticket_statements[0]
+
+
+
+def test_task_complexity_range(client, board, auth_headers):
+    """Тест: сложность вне диапазона столбца INT отклоняется с 422"""
+    url = f"/projects/{board['project_id']}/tasks"
+    payload = {"name": "Task", "task": "Do it", "section_id": board["sections"][0]["id"]}
+
+    for complexity in (-1, 2 ** 31):
+        response = client.post(url, headers=auth_headers, json={**payload, "complexity": complexity})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert client.post(url, headers=auth_headers, json={**payload, "complexity": 0}).status_code == \
+        status.HTTP_201_CREATED
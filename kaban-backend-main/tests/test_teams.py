@@ -1,6 +1,6 @@
 import pytest
 from fastapi import status
-from app.models import Team
+from app.models import Team, User, UserToTeam
 from app.auth import create_access_token
 
 
@@ -68,3 +68,94 @@ def test_list_teams_empty(client, test_user):
     assert len(data) == 0
 
 
+def test_list_teams_includes_memberships(client, test_user, db):
+    """Тест: в списке команд есть команды, где пользователь участник"""
+    token = create_access_token(data={"sub": test_user.id})
+
+    owner = User(username="owner", email="owner@example.com", password="x")
+    db.add(owner)
+    db.commit()
+    team = Team(name="Foreign Team", owner_id=owner.id)
+    db.add(team)
+    db.commit()
+    db.add(UserToTeam(user_id=test_user.id, team_id=team.id))
+    db.commit()
+
+    response = client.get(
+        "/teams",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [t["name"] for t in data] == ["Foreign Team"]
+
+
+def test_team_overview(client, test_user, db):
+    """Тест сводки по всем проектам команды"""
+    token = create_access_token(data={"sub": test_user.id})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    team = Team(name="My Team", owner_id=test_user.id)
+    db.add(team)
+    db.commit()
+
+    for name in ("Alpha", "Beta"):
+        response = client.post(
+            "/projects",
+            headers=headers,
+            json={"name": name, "team_id": team.id}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    project_id = response.json()["id"]
+    board = client.get(f"/projects/{project_id}/board", headers=headers).json()
+    client.post(
+        f"/projects/{project_id}/tasks",
+        headers=headers,
+        json={"name": "Task", "task": "Do it", "section_id": board["sections"][0]["id"]}
+    )
+
+    response = client.get(f"/teams/{team.id}/overview", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [p["name"] for p in data["projects"]] == ["Alpha", "Beta"]
+    beta = data["projects"][1]
+    assert beta["desk_name"] == "Beta Board"
+    assert [s["name"] for s in beta["sections"]] == ["To Do", "In Progress", "Done"]
+    assert [s["ticket_count"] for s in beta["sections"]] == [1, 0, 0]
+
+
+def test_team_overview_forbidden(client, test_user, db):
+    """Тест сводки по чужой команде"""
+    token = create_access_token(data={"sub": test_user.id})
+
+    owner = User(username="owner", email="owner@example.com", password="x")
+    db.add(owner)
+    db.commit()
+    team = Team(name="Foreign Team", owner_id=owner.id)
+    db.add(team)
+    db.commit()
+
+    response = client.get(
+        f"/teams/{team.id}/overview",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_create_team_single_statement(client, test_user, statements):
+    """Тест: создание команды - один INSERT без перечитывания строки"""
+    token = create_access_token(data={"sub": test_user.id})
+    statements.clear()
+    response = client.post(
+        "/teams",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"name": "Test Team"}
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["created_at"] is not None
+    team_statements = [s for s in statements if "teams" in s]
+    assert len(team_statements) == 1
+    assert team_statements[0].startswith("INSERT INTO teams")
+
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException, status
+from app import auth
+from app.auth import create_access_token, token_cache, verify_token
+from app.models import RefreshToken, utcnow
+from app.revocation import BloomFilter, revocation_list
+
+
+def _login(client):
+    response = client.post(
+        "/auth/login",
+        json={"email": "test@example.com", "password": "testpassword123"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def _me(client, access_token):
+    return client.get("/user/me", headers={"Authorization": f"Bearer {access_token}"})
+
+
+def _age_used_tokens(db, seconds):
+    db.query(RefreshToken).filter(RefreshToken.used_at.isnot(None)).update(
+        {"used_at": utcnow() - timedelta(seconds=seconds)}
+    )
+    db.commit()
+
+
+def test_refresh_rotates_token(client, db, test_user):
+    """Тест: обмен refresh-токена выдаёт новый, старый становится одноразовым"""
+    tokens = _login(client)
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == status.HTTP_200_OK
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    rows = db.query(RefreshToken).populate_existing().order_by(RefreshToken.id).all()
+    assert len(rows) == 2
+    assert rows[0].family_id == rows[1].family_id
+    assert rows[0].used_at is not None
+    assert _me(client, rotated["access_token"]).status_code == status.HTTP_200_OK
+
+
+def test_refresh_reuse_revokes_family(client, db, test_user):
+    """Тест: повторное использование refresh-токена отзывает всё семейство"""
+    tokens = _login(client)
+    rotated = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+    _age_used_tokens(db, seconds=60)
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    # Украденный и легитимный токены семейства больше не работают
+    response = client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert _me(client, rotated["access_token"]).status_code == status.HTTP_401_UNAUTHORIZED
+
+    # Другие входы пользователя не затронуты
+    assert _me(client, _login(client)["access_token"]).status_code == status.HTTP_200_OK
+
+
+def test_concurrent_refresh_within_grace(client, db, test_user):
+    """Тест: повтор обмена сразу после первого не отзывает семейство"""
+    tokens = _login(client)
+    first = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    second = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_200_OK
+
+    for pair in (first.json(), second.json()):
+        assert _me(client, pair["access_token"]).status_code == status.HTTP_200_OK
+    response = client.post("/auth/refresh", json={"refresh_token": second.json()["refresh_token"]})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_logout_revokes_tokens(client, test_user):
+    """Тест выхода: access- и refresh-токены семейства отзываются"""
+    tokens = _login(client)
+    assert _me(client, tokens["access_token"]).status_code == status.HTTP_200_OK
+
+    response = client.post("/auth/logout", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    assert _me(client, tokens["access_token"]).status_code == status.HTTP_401_UNAUTHORIZED
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_revocation_check_skips_db(client, test_user):
+    """Тест: проверка не отозванного токена не обращается к БД"""
+    tokens = _login(client)
+    lookups = revocation_list.db_lookups
+    for _ in range(5):
+        assert _me(client, tokens["access_token"]).status_code == status.HTTP_200_OK
+    assert revocation_list.db_lookups == lookups
+
+
+def test_revocation_synced_from_db(client, db, test_user):
+    """Тест: отзыв, сделанный другим воркером, подтягивается синхронизацией"""
+    tokens = _login(client)
+    db.query(RefreshToken).update({"revoked_at": RefreshToken.created_at})
+    db.commit()
+
+    revocation_list.sync()
+    assert _me(client, tokens["access_token"]).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_bloom_filter():
+    """Тест фильтра Блума: добавленные ключи всегда находятся"""
+    bloom = BloomFilter(size_bits=1 << 12, hashes=5)
+    keys = [f"family-{i}" for i in range(100)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+def test_revocation_lookup_off_event_loop():
+    """Тест: обращение к БД при промахе кэша идёт не в потоке цикла событий"""
+    revocation_list.clear()
+    revocation_list._bloom.add("family-x")
+    threads = []
+
+    def lookup(family_id):
+        threads.append(threading.get_ident())
+        return True
+
+    assert asyncio.run(revocation_list.is_revoked("family-x", lookup)) is True
+    assert threads and threads[0] != threading.get_ident()
+    revocation_list.clear()
+
+
+def test_verified_token_cache(monkeypatch):
+    """Тест: повторная проверка токена не декодирует JWT"""
+    token_cache.clear()
+    decode_calls = []
+    original_decode = auth.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decode_calls.append(1)
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    token = create_access_token(data={"sub": 42})
+
+    for _ in range(3):
+        assert verify_token(token, "access").user_id == 42
+    assert len(decode_calls) == 1
+
+    # Тип токена проверяется и для записей из кэша
+    with pytest.raises(HTTPException):
+        verify_token(token, "refresh")
+
+
+def test_verified_token_cache_respects_exp(monkeypatch):
+    """Тест: запись кэша перестаёт действовать после exp токена"""
+    token_cache.clear()
+    token = create_access_token(data={"sub": 42})
+    verify_token(token, "access")
+
+    later = time.time() + 60 * 60
+    monkeypatch.setattr(auth.time, "time", lambda: later)
+    assert token_cache.get(token_cache.key(token)) is None